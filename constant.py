@@ -1,4 +1,5 @@
 # constant.py
+from bisect import bisect_right
 
 # 基本風險定義風險閾值
 HIGH_WIND_SPEED_kts = 25   # kts
@@ -13,20 +14,12 @@ def wind_kts_to_ms(wind_kts: float) -> float:
     """風速轉換:Kts to m/s """
     return wind_kts * 0.514444
 
+# 蒲福風級下限 (kts)：第 i 個值為 BFT i+1 的起點，超過最後一級即為 12
+BFT_THRESHOLDS_KTS = (1, 4, 7, 11, 17, 22, 28, 34, 41, 48, 56, 64)
+
 def kts_to_bft(speed_kts: float) -> int:
-    if speed_kts < 1: return 0
-    if speed_kts < 4: return 1
-    if speed_kts < 7: return 2
-    if speed_kts < 11: return 3
-    if speed_kts < 17: return 4
-    if speed_kts < 22: return 5
-    if speed_kts < 28: return 6
-    if speed_kts < 34: return 7
-    if speed_kts < 41: return 8
-    if speed_kts < 48: return 9
-    if speed_kts < 56: return 10
-    if speed_kts < 64: return 11
-    return 12
+    """風速轉換:Kts to BFT（查表，不再逐級 if 比較）"""
+    return bisect_right(BFT_THRESHOLDS_KTS, speed_kts)
 
 def wind_dir_deg(wind_direction: str) -> float:
     """風向轉換 方位角 to 度數 """
@@ -2,36 +2,99 @@
 import os
 import sys
 import json
+import logging
 import traceback
 import smtplib
 import io
-import base64
+import heapq
+from collections import Counter
+from functools import lru_cache, cached_property
+from html import escape as _html_escape
+from types import MappingProxyType
+from enum import IntEnum
 from datetime import datetime, timezone, timedelta  # ✅ 確認這裡已 import
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Any, Optional, TextIO, NamedTuple
+from dataclasses import dataclass, field, fields
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # 第三方套件
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from PIL import Image  # matplotlib 的相依套件
 from dotenv import load_dotenv
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.image import MIMEImage
+from email.generator import BytesGenerator
+from email.utils import formatdate
+
+# 選用套件：orjson（較快的 JSON 序列化，未安裝時退回標準 json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # 載入環境變數
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ================= 自定義模組導入檢查 =================
 try:
     from wni_crawler import PortWeatherCrawler, WeatherDatabase
     from weather_parser import WeatherParser, WeatherRecord
+    from constant import BFT_THRESHOLDS_KTS, kts_to_bft as _kts_to_bft
 except ImportError as e:
     print(f"❌ 錯誤: 找不到必要的模組 ({e})。請確認 wni_crawler.py 與 weather_parser.py 是否在同一目錄下。")
     sys.exit(1)
 
+# ================= 工具函式 =================
+
+def _dump_json_bytes(obj: Any, indent: bool = True) -> bytes:
+    """✅ 序列化為 JSON 的 UTF-8 bytes（優先使用 orjson；indent=False 時輸出緊湊格式）"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+    return _dumps_json(obj, indent).encode('utf-8')
+
+def _dumps_json(obj: Any, indent: bool = True) -> str:
+    """✅ 序列化為 JSON 字串（優先使用 orjson；indent=False 時輸出緊湊格式）"""
+    if orjson is not None:
+        return _dump_json_bytes(obj, indent).decode('utf-8')
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str)
+
+@lru_cache(maxsize=4096)
+def _parse_ts(ts: str) -> datetime:
+    """✅ 解析固定格式 'YYYY-MM-DD HH:MM'（直接切片，避免 strptime 的格式解析成本）"""
+    return datetime(int(ts[0:4]), int(ts[5:7]), int(ts[8:10]), int(ts[11:13]), int(ts[14:16]))
+
+@lru_cache(maxsize=4096)
+def _esc(text: str) -> str:
+    """✅ HTML 跳脫港口代碼 / 名稱等文字（同一字串只跳脫一次）"""
+    return _html_escape(text, quote=True)
+
+@lru_cache(maxsize=2048)
+def format_time_display(time_str: str) -> str:
+    """✅ 去除時間字串後的時區標記，例如 '01/05 06:00 (UTC)' → '01/05 06:00'（結果快取）"""
+    if not time_str:
+        return "N/A"
+    try:
+        if '(' in time_str:
+            return time_str.partition('(')[0].strip()
+        return time_str
+    except:
+        return time_str
+
 # ================= 設定區 =================
 
 # 1. WNI 氣象網站爬蟲帳密
@@ -55,6 +118,13 @@ TEAMS_WEBHOOK_URL = os.getenv('TEAMS_WEBHOOK_URL', '')
 EXCEL_FILE_PATH = os.getenv('EXCEL_FILE_PATH', 'WHL_all_ports_list.xlsx')
 CHART_OUTPUT_DIR = 'charts'
 
+# ✅ 台北時區（模組載入時建立一次，報告產生時直接沿用）
+try:
+    from zoneinfo import ZoneInfo
+    TAIPEI_TZ = ZoneInfo('Asia/Taipei')
+except Exception:
+    TAIPEI_TZ = timezone(timedelta(hours=8))
+
 # 6. 風險閾值
 RISK_THRESHOLDS = {
     'wind_caution': 22,
@@ -73,6 +143,12 @@ RISK_THRESHOLDS = {
     'visibility_poor': 2778      # ✅ 能見度 < 1.5 海浬 (約 2778 公尺)
 }
 
+# 7. 除錯模式（設定 WMS_DEBUG=1 才輸出完整 traceback）
+DEBUG = os.getenv('WMS_DEBUG', '').strip().lower() in ('1', 'true', 'yes')
+
+# 8. 圖表存檔（設定 WMS_SAVE_CHARTS=1 才另存 PNG 至 CHART_OUTPUT_DIR，供本機除錯檢視）
+SAVE_CHARTS = os.getenv('WMS_SAVE_CHARTS', '').strip().lower() in ('1', 'true', 'yes')
+
 @dataclass
 class RiskAssessment:
     """風險評估結果資料結構"""
@@ -118,40 +194,71 @@ class RiskAssessment:
     
     raw_records: Optional[List[WeatherRecord]] = None
     weather_records: Optional[List] = None
-    chart_base64_list: List[str] = field(default_factory=list)
+    # ✅ 以 Content-ID 內嵌於郵件的原始 PNG 圖表（不經 base64 字串）
+    chart_png_list: List[bytes] = field(default_factory=list)
     
+    @cached_property
+    def risk_label(self) -> str:
+        """✅ 風險等級標籤（每個評估只查表一次）"""
+        return _RISK_LABELS.get(self.risk_level, "未知 Unknown")
+
+    @cached_property
+    def level_meta(self) -> MappingProxyType:
+        """✅ 報告用的等級樣式（每個評估只查表一次，未知等級以 CAUTION 樣式呈現）"""
+        return _LEVEL_META.get(self.risk_level, _LEVEL_META[1])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """多程序傳遞時排除 level_meta 快取（MappingProxyType 無法 pickle，需要時會重新查表）"""
+        state = self.__dict__.copy()
+        state.pop('level_meta', None)
+        return state
+
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
-        for key in ['raw_records', 'weather_records', 'chart_base64_list']:
-            d.pop(key, None)
-        return d
+        """✅ 輸出 JSON 用欄位（不經 asdict 深層複製，也不碰原始紀錄與圖表；巢狀內容與物件共用，僅供序列化）"""
+        return {name: getattr(self, name) for name in _RISK_ASSESSMENT_EXPORT_FIELDS}
+
+
+# ✅ to_dict 輸出的欄位（排除原始紀錄與圖表），類別定義後計算一次
+_RISK_ASSESSMENT_EXPORT_FIELDS = tuple(
+    f.name for f in fields(RiskAssessment)
+    if f.name not in ('raw_records', 'weather_records', 'chart_png_list')
+)
 
     
     
 # ================= 繪圖模組 =================
 
+# ✅ 繪圖樣式與中文字體於匯入時設定一次（子程序匯入模組時也會各自套用），
+#    不再於每張圖重新載入樣式（原本每次 style.use 也會把字體設定重設掉）
+plt.style.use('default')
+try:
+    plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'Arial Unicode MS', 'DejaVu Sans', 'sans-serif']
+    plt.rcParams['axes.unicode_minus'] = False
+except:
+    print("⚠️ 無法設定中文字體")
+
+
 class ChartGenerator:
-    """圖表生成器 - 支援 Base64 輸出（高解析度版）"""
+    """圖表生成器 - 輸出 PNG bytes（高解析度版）"""
     
-    def __init__(self, output_dir: str = CHART_OUTPUT_DIR):
+    def __init__(self, output_dir: str = CHART_OUTPUT_DIR, clear_existing: bool = True,
+                 save_to_disk: bool = SAVE_CHARTS):
         self.output_dir = output_dir
+        self.save_to_disk = save_to_disk
         
-        if os.path.exists(self.output_dir):
-            for f in os.listdir(self.output_dir):
-                if f.endswith('.png'):
-                    try:
-                        os.remove(os.path.join(self.output_dir, f))
-                    except:
-                        pass
-        
-        os.makedirs(self.output_dir, exist_ok=True)
+        if self.save_to_disk:
+            # ✅ 子程序中的繪圖器不清除舊圖（避免刪掉其他程序剛產生的圖）
+            if clear_existing and os.path.exists(self.output_dir):
+                for f in os.listdir(self.output_dir):
+                    if f.endswith('.png'):
+                        try:
+                            os.remove(os.path.join(self.output_dir, f))
+                        except:
+                            pass
+            
+            os.makedirs(self.output_dir, exist_ok=True)
         
-        # 設定中文字體
-        try:
-            plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'Arial Unicode MS', 'DejaVu Sans', 'sans-serif']
-            plt.rcParams['axes.unicode_minus'] = False
-        except:
-            print("⚠️ 無法設定中文字體")
+        self._fig = None  # ✅ 各圖表共用的 Figure（第一次繪圖時才建立）
 
     def _prepare_dataframe(self, records: List[WeatherRecord]) -> pd.DataFrame:
         """準備風浪資料的 DataFrame"""
@@ -179,17 +286,48 @@ class ChartGenerator:
             })
         return pd.DataFrame(data)
 
-    def _fig_to_base64(self, fig, dpi=150) -> str:
-        """將 Matplotlib Figure 轉為 Base64 字串（高解析度）"""
+    def _new_figure(self):
+        """✅ 取得清空後的共用 Figure 與新座標軸（重用字型快取與繪圖物件，不再每張圖建立/關閉 Figure）"""
+        if self._fig is None:
+            self._fig = plt.figure(figsize=(16, 7), dpi=120)
+        else:
+            self._fig.clf()  # 連同 twinx 座標軸與 fig.text 一併清除
+        return self._fig, self._fig.add_subplot(111)
+
+    def _save_png(self, png_bytes: bytes, filename: str, label: str = "圖片") -> None:
+        """✅ 需要時將已產生的 PNG bytes 寫檔（同一次渲染結果，不再另外 savefig 一次）"""
+        if not self.save_to_disk:
+            return
+        filepath = os.path.join(self.output_dir, filename)
+        with open(filepath, 'wb') as f:
+            f.write(png_bytes)
+        print(f"      💾 {label}已存檔: {filepath}")
+
+    def _fig_to_png(self, fig, dpi=150) -> bytes:
+        """將 Matplotlib Figure 轉為 PNG bytes（高解析度）"""
         buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
-        buf.seek(0)
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
+        # ✅ PNG 開啟 optimize 壓縮（郵件內嵌體積較小，各郵件客戶端皆可顯示）
+        fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi,
+                    pil_kwargs={'optimize': True})
+        png_bytes = buf.getvalue()
+        
+        # ✅ 線條圖色彩有限：轉為 256 色調色盤 PNG 再壓縮，通常可再縮小一半以上
+        try:
+            buf.seek(0)
+            with Image.open(buf) as im:
+                palette_img = im.convert('RGB').quantize(colors=256)
+            out = io.BytesIO()
+            palette_img.save(out, format='PNG', optimize=True, compress_level=9)
+            if out.tell() < len(png_bytes):
+                png_bytes = out.getvalue()
+        except Exception as e:
+            logger.debug(f"      ⚠️ 調色盤壓縮失敗，改用原始 PNG: {e}")
+        
         buf.close()
-        return img_str
+        return png_bytes
 
-    def generate_wind_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[str]:
-        """繪製風速趨勢圖，回傳 Base64 字串（48h 資料）"""
+    def generate_wind_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[bytes]:
+        """繪製風速趨勢圖，回傳 PNG bytes 供郵件以 Content-ID 內嵌（48h 資料）"""
         if not assessment.raw_records:
             print(f"      ⚠️ {port_code} 沒有原始資料記錄")
             return None
@@ -203,8 +341,7 @@ class ChartGenerator:
             
             print(f"      📊 準備繪製 {port_code} 的風速圖 (資料點數: {len(df)})")
             
-            plt.style.use('default')
-            fig, ax = plt.subplots(figsize=(16, 7), dpi=120)
+            fig, ax = self._new_figure()
             
             fig.patch.set_facecolor('#FFFFFF')
             ax.set_facecolor('#F8FAFC')
@@ -303,25 +440,20 @@ class ChartGenerator:
             fig.text(0.99, 0.01, 'WHL Marine Technology Division', 
                     ha='right', va='bottom', fontsize=9, color='#9CA3AF', alpha=0.6, style='italic')
             
-            plt.tight_layout(rect=[0, 0.02, 1, 0.96])
-            
-            filepath = os.path.join(self.output_dir, f"wind_{port_code}.png")
-            fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none', pad_inches=0.1)
-            print(f"      💾 圖片已存檔: {filepath}")
+            fig.tight_layout(rect=[0, 0.02, 1, 0.96])
             
-            base64_str = self._fig_to_base64(fig, dpi=150)
-            print(f"      ✅ Base64 轉換成功 (長度: {len(base64_str)} 字元)")
+            png_bytes = self._fig_to_png(fig, dpi=150)
+            print(f"      ✅ PNG 轉換成功 (大小: {len(png_bytes)} bytes)")
+            self._save_png(png_bytes, f"wind_{port_code}.png")
             
-            plt.close(fig)
-            return base64_str
+            return png_bytes
             
         except Exception as e:
-            print(f"      ❌ 繪製風速圖失敗 {port_code}: {e}")
-            traceback.print_exc()
+            logger.error(f"      ❌ 繪製風速圖失敗 {port_code}: {e}", exc_info=DEBUG)
             return None
 
-    def generate_wave_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[str]:
-        """繪製浪高趨勢圖，回傳 Base64 字串（48h 資料）"""
+    def generate_wave_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[bytes]:
+        """繪製浪高趨勢圖，回傳 PNG bytes 供郵件以 Content-ID 內嵌（48h 資料）"""
         if not assessment.raw_records:
             return None
             
@@ -331,8 +463,7 @@ class ChartGenerator:
             if df['wave_height'].max() < 1.0:
                 return None
 
-            plt.style.use('default')
-            fig, ax = plt.subplots(figsize=(16, 7), dpi=120)
+            fig, ax = self._new_figure()
             
             fig.patch.set_facecolor('#FFFFFF')
             ax.set_facecolor('#F0FDF4')
@@ -412,25 +543,20 @@ class ChartGenerator:
             fig.text(0.99, 0.01, 'WHL Marine Technology Division', 
                     ha='right', va='bottom', fontsize=9, color='#9CA3AF', alpha=0.6, style='italic')
             
-            plt.tight_layout(rect=[0, 0.02, 1, 0.96])
+            fig.tight_layout(rect=[0, 0.02, 1, 0.96])
             
-            filepath = os.path.join(self.output_dir, f"wave_{port_code}.png")
-            fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none', pad_inches=0.1)
-            print(f"      💾 圖片已存檔: {filepath}")
+            png_bytes = self._fig_to_png(fig, dpi=150)
+            print(f"      ✅ PNG 轉換成功 (大小: {len(png_bytes)} bytes)")
+            self._save_png(png_bytes, f"wave_{port_code}.png")
             
-            base64_str = self._fig_to_base64(fig, dpi=150)
-            print(f"      ✅ Base64 轉換成功 (長度: {len(base64_str)} 字元)")
-            
-            plt.close(fig)
-            return base64_str
+            return png_bytes
             
         except Exception as e:
-            print(f"      ❌ 繪製浪高圖失敗 {port_code}: {e}")
-            traceback.print_exc()
+            logger.error(f"      ❌ 繪製浪高圖失敗 {port_code}: {e}", exc_info=DEBUG)
             return None
 
-    def generate_temperature_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[str]:
-        """✅ 繪製溫度趨勢圖（使用 7 天資料，僅用於低溫警報）"""
+    def generate_temperature_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[bytes]:
+        """✅ 繪製溫度趨勢圖（使用 7 天資料，僅用於低溫警報），回傳 PNG bytes 供郵件以 Content-ID 內嵌"""
         if not assessment.weather_records:
             return None
         
@@ -445,8 +571,7 @@ class ChartGenerator:
             
             print(f"      📊 準備繪製 {port_code} 的溫度圖 (7天資料點數: {len(df)})")
             
-            plt.style.use('default')
-            fig, ax1 = plt.subplots(figsize=(16, 7), dpi=120)
+            fig, ax1 = self._new_figure()
             
             fig.patch.set_facecolor('#FFFFFF')
             ax1.set_facecolor('#F0F9FF')
@@ -456,7 +581,6 @@ class ChartGenerator:
             time_max = df['time'].max()
             
             # 確保顯示完整 7 天（168 小時）
-            from datetime import timedelta
             if (time_max - time_min).total_seconds() < 168 * 3600:
                 time_max = time_min + timedelta(days=7)
             
@@ -562,27 +686,22 @@ class ChartGenerator:
             fig.text(0.99, 0.01, 'WHL Marine Technology Division', 
                     ha='right', va='bottom', fontsize=9, color='#9CA3AF', alpha=0.6, style='italic')
             
-            plt.tight_layout(rect=[0, 0.02, 1, 0.96])
-            
-            # 儲存與轉換
-            filepath = os.path.join(self.output_dir, f"temp_7d_{port_code}.png")
-            fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none', pad_inches=0.1)
-            print(f"      💾 7天溫度圖已存檔: {filepath}")
+            fig.tight_layout(rect=[0, 0.02, 1, 0.96])
             
-            base64_str = self._fig_to_base64(fig, dpi=150)
-            print(f"      ✅ 7天溫度圖 Base64 轉換成功 (長度: {len(base64_str)} 字元)")
+            # 轉換（需要時另存同一份 PNG）
+            png_bytes = self._fig_to_png(fig, dpi=150)
+            print(f"      ✅ 7天溫度圖 PNG 轉換成功 (大小: {len(png_bytes)} bytes)")
+            self._save_png(png_bytes, f"temp_7d_{port_code}.png", "7天溫度圖")
             
-            plt.close(fig)
-            return base64_str
+            return png_bytes
             
         except Exception as e:
-            print(f"      ❌ 繪製7天溫度圖失敗 {port_code}: {e}")
-            traceback.print_exc()
+            logger.error(f"      ❌ 繪製7天溫度圖失敗 {port_code}: {e}", exc_info=DEBUG)
             return None
 
 
-    def generate_visibility_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[str]:
-        """✅ 繪製能見度趨勢圖（改用 48h 資料）"""
+    def generate_visibility_chart(self, assessment: RiskAssessment, port_code: str) -> Optional[bytes]:
+        """✅ 繪製能見度趨勢圖（改用 48h 資料），回傳 PNG bytes 供郵件以 Content-ID 內嵌"""
         if not assessment.weather_records:
             return None
         
@@ -604,8 +723,7 @@ class ChartGenerator:
             
             print(f"      📊 準備繪製 {port_code} 的能見度圖 (48h資料點數: {len(df)})")
             
-            plt.style.use('default')
-            fig, ax = plt.subplots(figsize=(16, 7), dpi=120)
+            fig, ax = self._new_figure()
             
             fig.patch.set_facecolor('#FFFFFF')
             ax.set_facecolor('#F3F4F6')
@@ -691,48 +809,146 @@ class ChartGenerator:
             fig.text(0.99, 0.01, 'WHL Marine Technology Division', 
                     ha='right', va='bottom', fontsize=9, color='#9CA3AF', alpha=0.6, style='italic')
             
-            plt.tight_layout(rect=[0, 0.02, 1, 0.96])
+            fig.tight_layout(rect=[0, 0.02, 1, 0.96])
             
-            # 儲存與轉換
-            filepath = os.path.join(self.output_dir, f"visibility_48h_{port_code}.png")
-            fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none', pad_inches=0.1)
-            print(f"      💾 48h能見度圖已存檔: {filepath}")
+            # 轉換（需要時另存同一份 PNG）
+            png_bytes = self._fig_to_png(fig, dpi=150)
+            print(f"      ✅ 48h能見度圖 PNG 轉換成功 (大小: {len(png_bytes)} bytes)")
+            self._save_png(png_bytes, f"visibility_48h_{port_code}.png", "48h能見度圖")
             
-            base64_str = self._fig_to_base64(fig, dpi=150)
-            print(f"      ✅ 48h能見度圖 Base64 轉換成功 (長度: {len(base64_str)} 字元)")
-            
-            plt.close(fig)
-            return base64_str
+            return png_bytes
             
         except Exception as e:
-            print(f"      ❌ 繪製48h能見度圖失敗 {port_code}: {e}")
-            traceback.print_exc()
+            logger.error(f"      ❌ 繪製48h能見度圖失敗 {port_code}: {e}", exc_info=DEBUG)
             return None
 
 
 
         
         
+# ✅ 每個子程序各自建立一個繪圖器（matplotlib 非執行緒安全，改用多程序）
+_worker_chart_generator: Optional[ChartGenerator] = None
+
+
+class _ChartJob(NamedTuple):
+    """✅ 送往繪圖子程序的最小資料（只含風浪圖用到的欄位，不 pickle 整個 RiskAssessment）"""
+    port_code: str
+    port_name: str
+    max_wave: float
+    raw_records: Optional[List[WeatherRecord]]
+
+    @classmethod
+    def from_assessment(cls, a: RiskAssessment) -> '_ChartJob':
+        return cls(a.port_code, a.port_name, a.max_wave, a.raw_records)
+
+
+def _gen_port_charts(generator: ChartGenerator, assessment) -> List[bytes]:
+    """生成單一港口的風浪圖表，回傳 PNG bytes 列表"""
+    charts = []
+    
+    # 1. 風速圖
+    png_wind = generator.generate_wind_chart(assessment, assessment.port_code)
+    if png_wind:
+        charts.append(png_wind)
+    
+    # 2. 浪高圖
+    if assessment.max_wave >= RISK_THRESHOLDS['wave_caution']:
+        png_wave = generator.generate_wave_chart(assessment, assessment.port_code)
+        if png_wave:
+            charts.append(png_wave)
+    
+    return charts
+
+
+def _worker_gen_charts(job: _ChartJob) -> List[bytes]:
+    """✅ ProcessPoolExecutor 子程序入口"""
+    global _worker_chart_generator
+    if _worker_chart_generator is None:
+        _worker_chart_generator = ChartGenerator(clear_existing=False)
+    return _gen_port_charts(_worker_chart_generator, job)
+
+
 # ================= 風險分析模組 =================
 
+def _to_soa(records: List[Any], fields: tuple) -> Dict[str, np.ndarray]:
+    """✅ 將記錄列表 (AoS) 一次轉成欄位陣列 (SoA)，None 轉為 NaN"""
+    n = len(records)
+    return {
+        name: np.fromiter(
+            (np.nan if v is None else v for v in (getattr(r, name) for r in records)),
+            dtype=np.float64, count=n
+        )
+        for name in fields
+    }
+
+
+def _pick_min_record(records: List[Any], values: np.ndarray):
+    """✅ 取出數值最小的記錄（忽略 NaN，全為 NaN 時回傳 None）"""
+    if values.size == 0 or np.isnan(values).all():
+        return None
+    return records[int(np.nanargmin(values))]
+
+
+def _classify(wind: np.ndarray, gust: np.ndarray, wave: np.ndarray,
+              temp: np.ndarray, press: np.ndarray, thresholds: Dict[str, float]):
+    """✅ 向量化風險分級（與 analyze_record 規則一致）
+    
+    Returns:
+        (levels, risk_mask): 每筆記錄的風險等級 (int8) 與「有風險訊息」遮罩
+    """
+    levels = np.zeros(wind.shape, dtype=np.int8)
+    
+    for values, key in ((wind, 'wind'), (gust, 'gust'), (wave, 'wave')):
+        band = np.select(
+            [values >= thresholds[f'{key}_danger'],
+             values >= thresholds[f'{key}_warning'],
+             values >= thresholds[f'{key}_caution']],
+            [3, 2, 1], default=0
+        )
+        np.maximum(levels, band, out=levels, casting='unsafe')
+    
+    # 低氣壓至少為警告等級；NaN（無天氣資料）比較結果為 False
+    levels[(press < thresholds['pressure_low']) & (levels < 2)] = 2
+    
+    # 低溫僅記錄訊息，不影響等級
+    risk_mask = (levels > 0) | (temp < thresholds['temp_freezing'])
+    return levels, risk_mask
+
+
+# ✅ 蒲福風級表（searchsorted 用的唯讀陣列）
+_BFT_THRESHOLDS = np.array(BFT_THRESHOLDS_KTS, dtype=np.float64)
+_BFT_THRESHOLDS.setflags(write=False)
+
+# ✅ analyze_record 逐筆比較用的門檻（模組載入時自 RISK_THRESHOLDS 取出一次）
+_RECORD_THRESHOLDS = tuple(RISK_THRESHOLDS[key] for key in (
+    'wind_danger', 'wind_warning', 'wind_caution',
+    'gust_danger', 'gust_warning', 'gust_caution',
+    'wave_danger', 'wave_warning', 'wave_caution',
+    'temp_freezing', 'pressure_low', 'visibility_poor',
+))
+
+
+# ✅ 風險等級標籤（模組層級唯讀表，查詢時不再每次建立 dict）
+_RISK_LABELS = MappingProxyType({
+    0: "安全 Safe",
+    1: "注意 Caution",
+    2: "警告 Warning",
+    3: "危險 Danger",
+})
+
+
 class WeatherRiskAnalyzer:
     """氣象風險分析器（✅ 能見度從主報告移除，獨立處理）"""
     
     @staticmethod
     def kts_to_bft(speed_kts: float) -> int:
-        if speed_kts < 1: return 0
-        if speed_kts < 4: return 1
-        if speed_kts < 7: return 2
-        if speed_kts < 11: return 3
-        if speed_kts < 17: return 4
-        if speed_kts < 22: return 5
-        if speed_kts < 28: return 6
-        if speed_kts < 34: return 7
-        if speed_kts < 41: return 8
-        if speed_kts < 48: return 9
-        if speed_kts < 56: return 10
-        if speed_kts < 64: return 11
-        return 12
+        """✅ 與 constant.kts_to_bft 共用同一份風級表"""
+        return _kts_to_bft(speed_kts)
+
+    @staticmethod
+    def kts_to_bft_array(speed_kts: np.ndarray) -> np.ndarray:
+        """✅ 批次風級轉換（整個欄位陣列一次查表，結果與 kts_to_bft 逐筆相同）"""
+        return np.searchsorted(_BFT_THRESHOLDS, speed_kts, side='right')
 
     @classmethod
     def analyze_record(cls, record: WeatherRecord, weather_record=None, include_temp=True, include_visibility=False) -> Dict:
@@ -747,54 +963,58 @@ class WeatherRiskAnalyzer:
         risks = []
         risk_level = 0
 
+        # ✅ 閾值已於模組層級取出，每筆記錄只做一次 tuple 解包
+        (wind_d, wind_w, wind_c, gust_d, gust_w, gust_c,
+         wave_d, wave_w, wave_c, temp_freezing, pressure_low, visibility_poor) = _RECORD_THRESHOLDS
+
         # 風速檢查
-        if record.wind_speed_kts >= RISK_THRESHOLDS['wind_danger']:
+        if record.wind_speed_kts >= wind_d:
             risks.append(f"⛔ 風速危險: {record.wind_speed_kts:.1f} kts")
             risk_level = max(risk_level, 3)
-        elif record.wind_speed_kts >= RISK_THRESHOLDS['wind_warning']:
+        elif record.wind_speed_kts >= wind_w:
             risks.append(f"⚠️ 風速警告: {record.wind_speed_kts:.1f} kts")
             risk_level = max(risk_level, 2)
-        elif record.wind_speed_kts >= RISK_THRESHOLDS['wind_caution']:
+        elif record.wind_speed_kts >= wind_c:
             risks.append(f"⚡ 風速注意: {record.wind_speed_kts:.1f} kts")
             risk_level = max(risk_level, 1)
 
         # 陣風檢查
-        if record.wind_gust_kts >= RISK_THRESHOLDS['gust_danger']:
+        if record.wind_gust_kts >= gust_d:
             risks.append(f"⛔ 陣風危險: {record.wind_gust_kts:.1f} kts")
             risk_level = max(risk_level, 3)
-        elif record.wind_gust_kts >= RISK_THRESHOLDS['gust_warning']:
+        elif record.wind_gust_kts >= gust_w:
             risks.append(f"⚠️ 陣風警告: {record.wind_gust_kts:.1f} kts")
             risk_level = max(risk_level, 2)
-        elif record.wind_gust_kts >= RISK_THRESHOLDS['gust_caution']:
+        elif record.wind_gust_kts >= gust_c:
             risks.append(f"⚡ 陣風注意: {record.wind_gust_kts:.1f} kts")
             risk_level = max(risk_level, 1)
 
         # 浪高檢查
-        if record.wave_height >= RISK_THRESHOLDS['wave_danger']:
+        if record.wave_height >= wave_d:
             risks.append(f"⛔ 浪高危險: {record.wave_height:.1f} m")
             risk_level = max(risk_level, 3)
-        elif record.wave_height >= RISK_THRESHOLDS['wave_warning']:
+        elif record.wave_height >= wave_w:
             risks.append(f"⚠️ 浪高警告: {record.wave_height:.1f} m")
             risk_level = max(risk_level, 2)
-        elif record.wave_height >= RISK_THRESHOLDS['wave_caution']:
+        elif record.wave_height >= wave_c:
             risks.append(f"⚡ 浪高注意: {record.wave_height:.1f} m")
             risk_level = max(risk_level, 1)
 
         # 天氣狀況檢查
         if weather_record:
             # ✅ 氣溫檢查（< 0°C）- 不計入風險等級，僅記錄
-            if weather_record.temperature < RISK_THRESHOLDS['temp_freezing']:
+            if weather_record.temperature is not None and weather_record.temperature < temp_freezing:
                 risks.append(f"❄️ 低溫警告: {weather_record.temperature:.1f}°C")
                 # 不更新 risk_level，低溫僅記錄
             
             # 氣壓檢查（< 1000 hPa）
-            if weather_record.pressure < RISK_THRESHOLDS['pressure_low']:
+            if weather_record.pressure is not None and weather_record.pressure < pressure_low:
                 risks.append(f"🌀 低氣壓警告: {weather_record.pressure:.0f} hPa")
                 risk_level = max(risk_level, 2)
             
             # ✅ 能見度檢查（< 2778m）- 不計入風險等級，僅記錄
             vis_m = weather_record.visibility_meters
-            if vis_m is not None and vis_m < RISK_THRESHOLDS['visibility_poor']:
+            if vis_m is not None and vis_m < visibility_poor:
                 if include_visibility:  # 只有在明確要求時才加入 risks
                     risks.append(f"🌫️ 能見度不良: {vis_m:.0f} m")
                 # 不更新 risk_level，能見度僅記錄
@@ -806,12 +1026,8 @@ class WeatherRiskAnalyzer:
 
     @classmethod
     def get_risk_label(cls, risk_level: int) -> str:
-        return {
-            0: "安全 Safe",
-            1: "注意 Caution",
-            2: "警告 Warning",
-            3: "危險 Danger"
-        }.get(risk_level, "未知 Unknown")
+        """等級標籤查表（已有 RiskAssessment 時直接使用 assessment.risk_label）"""
+        return _RISK_LABELS.get(risk_level, "未知 Unknown")
 
     @staticmethod
     def merge_visibility_periods(poor_visibility_periods: List[Dict]) -> List[Dict]:
@@ -837,7 +1053,6 @@ class WeatherRiskAnalyzer:
         min_vis = 999.0
         
         for i, period in enumerate(sorted_periods):
-            from datetime import datetime
             current_time = datetime.strptime(period['time_utc'], '%Y-%m-%d %H:%M')
             current_time_lct = period['time_lct']
             current_vis = period['visibility_km']
@@ -886,11 +1101,22 @@ class WeatherRiskAnalyzer:
         
         return merged
 
+    @staticmethod
+    def analyze_port_task(task: tuple) -> Optional['RiskAssessment']:
+        """✅ 多程序分析入口：task = (port_code, port_info, content_48h, content_7d, issued_time)"""
+        return WeatherRiskAnalyzer.analyze_port_risk_combined(*task)
+
     @classmethod
     def analyze_port_risk_combined(cls, port_code: str, port_info: Dict[str, Any],
                                 content_48h: str, content_7d: str, 
                                 issued_time: str) -> Optional[RiskAssessment]:
         """✅ 分析港口風險（風浪用 48h, 天氣用 7d）- 低溫與能見度不計入風險等級"""
+        # ✅ 預先取出閾值（本函式會被每個港口呼叫）
+        wind_c = RISK_THRESHOLDS['wind_caution']
+        gust_c = RISK_THRESHOLDS['gust_caution']
+        wave_c = RISK_THRESHOLDS['wave_caution']
+        press_l = RISK_THRESHOLDS['pressure_low']
+        
         try:
             parser = WeatherParser()
             
@@ -912,37 +1138,64 @@ class WeatherRiskAnalyzer:
                 for wr in weather_records:
                     weather_dict[wr.time] = wr
             
-            risk_periods = []
-            max_level = 0
+            # ✅ 轉為欄位陣列，極值改用 NumPy 一次歸約
+            wind_soa = _to_soa(wind_records_48h, ('wind_speed_kts', 'wind_gust_kts', 'wave_height'))
             
             # 找出極值記錄（風浪用 48h）
-            max_wind_record = max(wind_records_48h, key=lambda r: r.wind_speed_kts)
-            max_gust_record = max(wind_records_48h, key=lambda r: r.wind_gust_kts)
-            max_wave_record = max(wind_records_48h, key=lambda r: r.wave_height)
+            max_wind_record = wind_records_48h[int(wind_soa['wind_speed_kts'].argmax())]
+            max_gust_record = wind_records_48h[int(wind_soa['wind_gust_kts'].argmax())]
+            max_wave_record = wind_records_48h[int(wind_soa['wave_height'].argmax())]
+            
+            # ✅ 先以向量化方式分級，只對有風險的時段組出訊息
+            wx_aligned = [weather_dict.get(r.time) for r in wind_records_48h]
+            n = len(wind_records_48h)
+            temp_aligned = np.fromiter(
+                (np.nan if wx is None or wx.temperature is None else wx.temperature for wx in wx_aligned),
+                dtype=np.float64, count=n
+            )
+            press_aligned = np.fromiter(
+                (np.nan if wx is None or wx.pressure is None else wx.pressure for wx in wx_aligned),
+                dtype=np.float64, count=n
+            )
+            levels, risk_mask = _classify(
+                wind_soa['wind_speed_kts'], wind_soa['wind_gust_kts'], wind_soa['wave_height'],
+                temp_aligned, press_aligned, RISK_THRESHOLDS
+            )
+            
+            # ✅ 整體等級直接由陣列取得；max_level == 0 表示沒有風浪/氣壓風險，不納入主報告，
+            #    也就不必再組任何訊息字串
+            max_level = int(levels.max())
+            if max_level == 0:
+                return None
             
             # ✅ 天氣狀況極值（使用 7d 資料）
             min_temp_record = None
             min_pressure_record = None
             
             if weather_records:
-                min_temp_record = min(weather_records, key=lambda r: r.temperature)
-                min_pressure_record = min(weather_records, key=lambda r: r.pressure)
+                wx_soa = _to_soa(weather_records, ('temperature', 'pressure'))
+                min_temp_record = _pick_min_record(weather_records, wx_soa['temperature'])
+                min_pressure_record = _pick_min_record(weather_records, wx_soa['pressure'])
             
-            # ✅ 分析每個時段（使用 48h 風浪資料，能見度不計入風險等級）
-            for record in wind_records_48h:
-                wx_record = weather_dict.get(record.time)
+            # ✅ 分析有風險的時段（使用 48h 風浪資料，能見度不計入風險等級）
+            risk_periods = []
+            wind_bft = cls.kts_to_bft_array(wind_soa['wind_speed_kts'])
+            gust_bft = cls.kts_to_bft_array(wind_soa['wind_gust_kts'])
+            for i in np.flatnonzero(risk_mask):
+                record = wind_records_48h[i]
+                wx_record = wx_aligned[i]
                 analyzed = cls.analyze_record(record, wx_record, include_temp=False, include_visibility=False)
                 
                 if analyzed['risks']:
                     period_data = {
                         'time': record.time.strftime('%Y-%m-%d %H:%M'),
                         'wind_speed_kts': record.wind_speed_kts,
-                        'wind_speed_bft': record.wind_speed_bft,
+                        'wind_speed_bft': int(wind_bft[i]),
                         'wind_gust_kts': record.wind_gust_kts,
-                        'wind_gust_bft': record.wind_gust_bft,
+                        'wind_gust_bft': int(gust_bft[i]),
                         'wave_height': record.wave_height,
                         'risks': analyzed['risks'],
-                        'risk_level': analyzed['risk_level']
+                        'risk_level': int(levels[i])
                     }
                     
                     if wx_record:
@@ -954,27 +1207,27 @@ class WeatherRiskAnalyzer:
                         })
                     
                     risk_periods.append(period_data)
-                    max_level = max(max_level, analyzed['risk_level'])
-            
-            # ✅ 如果 max_level == 0，表示沒有風浪/氣壓風險，不納入主報告
-            if max_level == 0:
-                return None
             
-            # ✅ 建立風險因素列表（不包含低溫與能見度）
+            # ✅ 建立風險因素列表（不包含低溫與能見度，極值直接取自陣列）
+            max_wind = wind_soa['wind_speed_kts'].max()
+            max_gust = wind_soa['wind_gust_kts'].max()
+            max_wave = wind_soa['wave_height'].max()
             risk_factors = []
-            if max_wind_record.wind_speed_kts >= RISK_THRESHOLDS['wind_caution']:
-                risk_factors.append(f"風速 {max_wind_record.wind_speed_kts:.1f} kts")
-            if max_gust_record.wind_gust_kts >= RISK_THRESHOLDS['gust_caution']:
-                risk_factors.append(f"陣風 {max_gust_record.wind_gust_kts:.1f} kts")
-            if max_wave_record.wave_height >= RISK_THRESHOLDS['wave_caution']:
-                risk_factors.append(f"浪高 {max_wave_record.wave_height:.1f} m")
+            if max_wind >= wind_c:
+                risk_factors.append(f"風速 {max_wind:.1f} kts")
+            if max_gust >= gust_c:
+                risk_factors.append(f"陣風 {max_gust:.1f} kts")
+            if max_wave >= wave_c:
+                risk_factors.append(f"浪高 {max_wave:.1f} m")
             
             # ✅ 加入氣壓風險因素（不包含低溫與能見度）
-            if min_pressure_record and min_pressure_record.pressure < RISK_THRESHOLDS['pressure_low']:
+            if min_pressure_record and min_pressure_record.pressure < press_l:
                 risk_factors.append(f"低氣壓 {min_pressure_record.pressure:.0f} hPa")
             
-            # 計算 LCT 時區偏移
-            lct_offset_hours = int(max_wind_record.lct_time.utcoffset().total_seconds() / 3600)
+            # ✅ 計算 LCT 時區偏移（同一港口各筆記錄時區相同，只算一次並組成時間格式）
+            lct_offset_hours = int(wind_records_48h[0].lct_time.utcoffset().total_seconds() / 3600)
+            utc_fmt = '%m/%d %H:%M (UTC)'
+            lct_fmt = f'%Y-%m-%d %H:%M (LT+{lct_offset_hours})'
             
             # ✅ 建立正確的風險評估
             assessment = RiskAssessment(
@@ -990,19 +1243,19 @@ class WeatherRiskAnalyzer:
                 max_gust_bft=max_gust_record.wind_gust_bft,
                 max_wave=max_wave_record.wave_height,
                 
-                max_wind_time_utc=f"{max_wind_record.time.strftime('%m/%d %H:%M')} (UTC)",
-                max_wind_time_lct=f"{max_wind_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})",
-                max_gust_time_utc=f"{max_gust_record.time.strftime('%m/%d %H:%M')} (UTC)",
-                max_gust_time_lct=f"{max_gust_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})",
-                max_wave_time_utc=f"{max_wave_record.time.strftime('%m/%d %H:%M')} (UTC)",
-                max_wave_time_lct=f"{max_wave_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})",
+                max_wind_time_utc=max_wind_record.time.strftime(utc_fmt),
+                max_wind_time_lct=max_wind_record.lct_time.strftime(lct_fmt),
+                max_gust_time_utc=max_gust_record.time.strftime(utc_fmt),
+                max_gust_time_lct=max_gust_record.lct_time.strftime(lct_fmt),
+                max_wave_time_utc=max_wave_record.time.strftime(utc_fmt),
+                max_wave_time_lct=max_wave_record.lct_time.strftime(lct_fmt),
                 
                 min_temperature=min_temp_record.temperature if min_temp_record else 999.0,
                 min_pressure=min_pressure_record.pressure if min_pressure_record else 9999.0,
-                min_temp_time_utc=f"{min_temp_record.time.strftime('%m/%d %H:%M')} (UTC)" if min_temp_record else "",
-                min_temp_time_lct=f"{min_temp_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})" if min_temp_record else "",
-                min_pressure_time_utc=f"{min_pressure_record.time.strftime('%m/%d %H:%M')} (UTC)" if min_pressure_record else "",
-                min_pressure_time_lct=f"{min_pressure_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})" if min_pressure_record else "",
+                min_temp_time_utc=min_temp_record.time.strftime(utc_fmt) if min_temp_record else "",
+                min_temp_time_lct=min_temp_record.lct_time.strftime(lct_fmt) if min_temp_record else "",
+                min_pressure_time_utc=min_pressure_record.time.strftime(utc_fmt) if min_pressure_record else "",
+                min_pressure_time_lct=min_pressure_record.lct_time.strftime(lct_fmt) if min_pressure_record else "",
                 
                 risk_periods=risk_periods,
                 issued_time=issued_time,
@@ -1015,16 +1268,28 @@ class WeatherRiskAnalyzer:
             return assessment
             
         except Exception as e:
-            print(f"❌ 分析港口 {port_code} 時發生錯誤: {e}")
-            traceback.print_exc()
+            logger.error(f"❌ 分析港口 {port_code} 時發生錯誤: {e}", exc_info=DEBUG)
             return None
 # ================= Teams 通知器 =================
 
+# ✅ Adaptive Card 依風險等級的顏色 / 圖示（模組層級唯讀表）
+_TEAMS_RISK_COLOR = MappingProxyType({3: "Attention", 2: "Warning", 1: "Good"})
+_TEAMS_RISK_EMOJI = MappingProxyType({3: "🔴", 2: "🟠", 1: "🟡"})
+
+
 class TeamsNotifier:
     """Teams 通知發送器"""
     
     def __init__(self, webhook_url: str):
         self.webhook_url = webhook_url
+        
+        # ✅ 共用 Session，重複發送時沿用同一條 TLS 連線
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive'
+        })
     
     def send_risk_alert(self, risk_assessments: List[RiskAssessment]) -> bool:
         if not self.webhook_url:
@@ -1036,12 +1301,7 @@ class TeamsNotifier:
         
         try:
             card = self._create_adaptive_card(risk_assessments)
-            response = requests.post(
-                self.webhook_url, 
-                json=card, 
-                headers={'Content-Type': 'application/json'}, 
-                timeout=30
-            )
+            response = self.session.post(self.webhook_url, json=card, timeout=30)
             
             if response.status_code == 200:
                 print("✅ Teams 通知發送成功")
@@ -1051,8 +1311,7 @@ class TeamsNotifier:
                 return False
                 
         except Exception as e:
-            print(f"❌ 發送 Teams 通知時發生錯誤: {e}")
-            traceback.print_exc()
+            logger.error(f"❌ 發送 Teams 通知時發生錯誤: {e}", exc_info=DEBUG)
             return False
     
     def _send_all_safe_notification(self) -> bool:
@@ -1083,7 +1342,7 @@ class TeamsNotifier:
                     }
                 }]
             }
-            response = requests.post(self.webhook_url, json=card, headers={'Content-Type': 'application/json'})
+            response = self.session.post(self.webhook_url, json=card, timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -1091,9 +1350,8 @@ class TeamsNotifier:
     def _create_adaptive_card(self, risk_assessments: List[RiskAssessment]) -> Dict[str, Any]:
         """建立 Adaptive Card"""
         
-        danger_ports = [a for a in risk_assessments if a.risk_level == 3]
-        warning_ports = [a for a in risk_assessments if a.risk_level == 2]
-        caution_ports = [a for a in risk_assessments if a.risk_level == 1]
+        # ✅ 卡片只需要各等級數量：單次走訪計數，不另建港口清單
+        level_counts = Counter(a.risk_level for a in risk_assessments)
         
         body = [
             {
@@ -1112,20 +1370,20 @@ class TeamsNotifier:
             {
                 "type": "FactSet",
                 "facts": [
-                    {"title": "🔴 高度風險 (HEIGHT RISK)", "value": str(len(danger_ports))},
-                    {"title": "🟠 中度風險 (MEDIUM RISK)", "value": str(len(warning_ports))},
-                    {"title": "🟡 低度風險 (LOW RISK)", "value": str(len(caution_ports))},
+                    {"title": "🔴 高度風險 (HEIGHT RISK)", "value": str(level_counts[3])},
+                    {"title": "🟠 中度風險 (MEDIUM RISK)", "value": str(level_counts[2])},
+                    {"title": "🟡 低度風險 (LOW RISK)", "value": str(level_counts[1])},
                     {"title": "📅 更新時間", "value": datetime.now().strftime('%Y-%m-%d %H:%M')}
                 ],  
                 "spacing": "Medium"
             }
         ]
         
-        top_risks = sorted(risk_assessments, key=lambda x: x.risk_level, reverse=True)[:5]
+        top_risks = heapq.nlargest(5, risk_assessments, key=lambda x: x.risk_level)
         
         for port in top_risks:
-            risk_color = {3: "Attention", 2: "Warning", 1: "Good"}.get(port.risk_level, "Default")
-            risk_emoji = {3: "🔴", 2: "🟠", 1: "🟡"}.get(port.risk_level, "⚪")
+            risk_color = _TEAMS_RISK_COLOR.get(port.risk_level, "Default")
+            risk_emoji = _TEAMS_RISK_EMOJI.get(port.risk_level, "⚪")
             
             body.append({
                 "type": "Container",
@@ -1182,41 +1440,119 @@ class GmailRelayNotifier:
         self.subject_trigger = TRIGGER_SUBJECT
         self.subject_temp = TRIGGER_SUBJECT_TEMP
         self.subject_visibility = TRIGGER_SUBJECT_VISIBILITY  # ✅ 新增能見度警報主旨
+        self._server: Optional[smtplib.SMTP] = None  # ✅ 同一輪執行共用的 SMTP 連線
+        self._date_header: Optional[str] = None  # ✅ 同一輪寄出的信件共用 Date 標頭
+
+    def _smtp(self) -> smtplib.SMTP:
+        """✅ 取得已登入的 SMTP 連線（第一次呼叫時才連線與登入，之後直接沿用）"""
+        if self._server is not None:
+            # ✅ 沿用前先以 NOOP 確認連線仍有效（閒置過久可能被伺服器斷線），失效則重新連線
+            try:
+                if self._server.noop()[0] != 250:
+                    self._drop_connection()
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self._drop_connection()
+        if self._server is None:
+            server = smtplib.SMTP("smtp.gmail.com", 587, timeout=30)
+            server.ehlo()
+            server.starttls()
+            server.ehlo()
+            
+            print("   🔑 正在登入...")
+            server.login(self.user, self.password)
+            self._server = server
+        return self._server
 
-    def send_trigger_email(self, report_data: dict, report_html: str, 
-                           images: Dict[str, str] = None) -> bool:
-        """發送主要氣象風險報告"""
+    def connect(self) -> bool:
+        """✅ 預先建立並登入 SMTP 連線（可在背景執行緒呼叫；失敗時發信會再重試）"""
         if not self.user or not self.password:
-            print("⚠️ 未設定 Gmail 帳密 (MAIL_USER / MAIL_PASSWORD)")
+            return False
+        try:
+            self._smtp()
+            return True
+        except Exception as e:
+            self._drop_connection()
+            print(f"⚠️ SMTP 預先連線失敗，發信時將重試: {e}")
             return False
 
+    def _drop_connection(self) -> None:
+        """發送失敗時丟棄連線，下一封信會重新建立"""
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.close()
+            except:
+                pass
+
+    def close(self) -> None:
+        """✅ 結束共用的 SMTP 連線（由 run_daily_monitoring 在所有信件寄出後呼叫）"""
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except:
+                pass
+
+    @staticmethod
+    def _html_part(html, images: Optional[Dict[str, bytes]] = None):
+        """建立 HTML 郵件內容；有圖表時包成 multipart/related 並以 Content-ID 附上 PNG"""
+        html_part = MIMEText(html, 'html', 'utf-8')
+        if not images:
+            return html_part
+        
+        related = MIMEMultipart('related')
+        related.attach(html_part)
+        for cid, png_bytes in images.items():
+            img = MIMEImage(png_bytes, 'png')
+            img.add_header('Content-ID', f'<{cid}>')
+            img.add_header('Content-Disposition', 'inline', filename=f'{cid}.png')
+            related.attach(img)
+        return related
+
+    def _new_message(self, subject: str) -> MIMEMultipart:
+        """建立三種報告共用的郵件骨架（寄件者、收件者與主旨）"""
         msg = MIMEMultipart('alternative')
         msg['From'] = self.user
         msg['To'] = self.target
-        msg['Subject'] = self.subject_trigger
+        msg['Subject'] = subject
+        if self._date_header is None:
+            self._date_header = formatdate(localtime=True)
+        msg['Date'] = self._date_header
+        return msg
+
+    @staticmethod
+    def _as_bytes(msg) -> bytes:
+        """✅ 以 BytesGenerator 將郵件直接序列化為 bytes（省去 as_string 的 str 中間產物與再編碼）"""
+        buf = io.BytesIO()
+        BytesGenerator(buf, mangle_from_=False).flatten(msg)
+        return buf.getvalue()
+
+    def send_trigger_email(self, report_data: dict, report_html: bytes, 
+                           images: Optional[Dict[str, bytes]] = None) -> bool:
+        """發送主要氣象風險報告（report_html 為已編碼的 UTF-8 bytes；images: Content-ID → PNG bytes）"""
+        if not self.user or not self.password:
+            print("⚠️ 未設定 Gmail 帳密 (MAIL_USER / MAIL_PASSWORD)")
+            return False
+
+        msg = self._new_message(self.subject_trigger)
         
-        json_text = json.dumps(report_data, ensure_ascii=False, indent=2)
-        msg.attach(MIMEText(json_text, 'plain', 'utf-8'))
-        msg.attach(MIMEText(report_html, 'html', 'utf-8'))
+        # ✅ 供接力流程解析，不需縮排；直接以 UTF-8 bytes 建立內容，只做一次 base64 編碼
+        json_bytes = _dump_json_bytes(report_data, indent=False)
+        msg.attach(MIMEText(json_bytes, 'plain', 'utf-8'))
+        msg.attach(self._html_part(report_html, images))
 
         try:
             print(f"📧 正在透過 Gmail 發送主要氣象報表給 {self.target}...")
-            server = smtplib.SMTP("smtp.gmail.com", 587, timeout=30)
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            
-            print("   🔑 正在登入...")
-            server.login(self.user, self.password)
+            server = self._smtp()
             
             print("   📨 正在傳送...")
-            server.sendmail(self.user, self.target, msg.as_string())
-            server.quit()
+            server.sendmail(self.user, self.target, self._as_bytes(msg))
             
             print(f"✅ 主要氣象報告發送成功！")
             return True
             
         except smtplib.SMTPAuthenticationError:
+            self._drop_connection()
             print("❌ Gmail 認證失敗！請檢查:")
             print("   1. MAIL_USER 是否正確")
             print("   2. MAIL_PASSWORD 是否為「應用程式密碼」(非一般密碼)")
@@ -1224,804 +1560,382 @@ class GmailRelayNotifier:
             return False
             
         except Exception as e:
-            print(f"❌ Gmail 發送失敗: {e}")
-            traceback.print_exc()
+            self._drop_connection()
+            logger.error(f"❌ Gmail 發送失敗: {e}", exc_info=DEBUG)
             return False
 
-    def send_temperature_alert(self, temp_report_data: dict, temp_report_html: str) -> bool:
-        """發送低溫警報專用報告"""
+    def send_temperature_alert(self, temp_report_data: dict, temp_report_html: str,
+                               images: Optional[Dict[str, bytes]] = None) -> bool:
+        """發送低溫警報專用報告（images: Content-ID → PNG bytes）"""
         if not self.user or not self.password:
             print("⚠️ 未設定 Gmail 帳密 (MAIL_USER / MAIL_PASSWORD)")
             return False
 
-        msg = MIMEMultipart('alternative')
-        msg['From'] = self.user
-        msg['To'] = self.target
-        msg['Subject'] = self.subject_temp
+        msg = self._new_message(self.subject_temp)
         
-        json_text = json.dumps(temp_report_data, ensure_ascii=False, indent=2)
-        msg.attach(MIMEText(json_text, 'plain', 'utf-8'))
-        msg.attach(MIMEText(temp_report_html, 'html', 'utf-8'))
+        # ✅ 供接力流程解析，不需縮排；直接以 UTF-8 bytes 建立內容，只做一次 base64 編碼
+        json_bytes = _dump_json_bytes(temp_report_data, indent=False)
+        msg.attach(MIMEText(json_bytes, 'plain', 'utf-8'))
+        msg.attach(self._html_part(temp_report_html, images))
 
         try:
             print(f"❄️ 正在透過 Gmail 發送低溫警報給 {self.target}...")
-            server = smtplib.SMTP("smtp.gmail.com", 587, timeout=30)
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            
-            print("   🔑 正在登入...")
-            server.login(self.user, self.password)
+            server = self._smtp()
             
             print("   📨 正在傳送...")
-            server.sendmail(self.user, self.target, msg.as_string())
-            server.quit()
+            server.sendmail(self.user, self.target, self._as_bytes(msg))
             
             print(f"✅ 低溫警報發送成功！")
             return True
             
         except Exception as e:
-            print(f"❌ 低溫警報發送失敗: {e}")
-            traceback.print_exc()
+            self._drop_connection()
+            logger.error(f"❌ 低溫警報發送失敗: {e}", exc_info=DEBUG)
             return False
 
-    def send_visibility_alert(self, vis_report_data: dict, vis_report_html: str) -> bool:
-        """✅ 發送能見度警報專用報告（參考 2010-006 碰撞案例）"""
+    def send_visibility_alert(self, vis_report_data: dict, vis_report_html: str,
+                              images: Optional[Dict[str, bytes]] = None) -> bool:
+        """✅ 發送能見度警報專用報告（參考 2010-006 碰撞案例；images: Content-ID → PNG bytes）"""
         if not self.user or not self.password:
             print("⚠️ 未設定 Gmail 帳密 (MAIL_USER / MAIL_PASSWORD)")
             return False
 
-        msg = MIMEMultipart('alternative')
-        msg['From'] = self.user
-        msg['To'] = self.target
-        msg['Subject'] = self.subject_visibility
+        msg = self._new_message(self.subject_visibility)
         
-        json_text = json.dumps(vis_report_data, ensure_ascii=False, indent=2)
-        msg.attach(MIMEText(json_text, 'plain', 'utf-8'))
-        msg.attach(MIMEText(vis_report_html, 'html', 'utf-8'))
+        # ✅ 供接力流程解析，不需縮排；直接以 UTF-8 bytes 建立內容，只做一次 base64 編碼
+        json_bytes = _dump_json_bytes(vis_report_data, indent=False)
+        msg.attach(MIMEText(json_bytes, 'plain', 'utf-8'))
+        msg.attach(self._html_part(vis_report_html, images))
 
         try:
             print(f"🌫️ 正在透過 Gmail 發送能見度警報給 {self.target}...")
-            server = smtplib.SMTP("smtp.gmail.com", 587, timeout=30)
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            
-            print("   🔑 正在登入...")
-            server.login(self.user, self.password)
+            server = self._smtp()
             
             print("   📨 正在傳送...")
-            server.sendmail(self.user, self.target, msg.as_string())
-            server.quit()
+            server.sendmail(self.user, self.target, self._as_bytes(msg))
             
             print(f"✅ 能見度警報發送成功！")
             return True
             
         except Exception as e:
-            print(f"❌ 能見度警報發送失敗: {e}")
-            traceback.print_exc()
+            self._drop_connection()
+            logger.error(f"❌ 能見度警報發送失敗: {e}", exc_info=DEBUG)
             return False
-# ================= 主服務類別 =================
 
-class WeatherMonitorService:
-    """氣象監控服務（✅ 新增能見度獨立分析與報告）"""
-    
-    def __init__(self, username: str, password: str,
-                 teams_webhook_url: str = '',
-                 excel_path: str = EXCEL_FILE_PATH):
-        
-        print("🔧 正在初始化氣象監控服務...")
-        self.crawler = PortWeatherCrawler(username, password, excel_path, auto_login=False)
-        self.analyzer = WeatherRiskAnalyzer()
-        self.notifier = TeamsNotifier(teams_webhook_url)
-        self.db = WeatherDatabase()
-        self.email_notifier = GmailRelayNotifier()
-        self.chart_generator = ChartGenerator()
-        
-        print(f"✅ 系統初始化完成,共載入 {len(self.crawler.port_list)} 個港口")
-    
-    def run_daily_monitoring(self) -> Dict[str, Any]:
-        """執行每日監控（✅ 新增能見度獨立處理）"""
-        print("=" * 80)
-        print(f"🚀 開始執行每日氣象監控 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 80)
-        
-        # ✅ 1. 下載 48h 和 7d 資料
-        print("\n📡 步驟 1: 下載所有港口氣象資料 (48h + 7d)...")
-        download_stats = self.crawler.fetch_all_ports_both()
-        
-        # 2. 分析風險（不包含純低溫與能見度港口）
-        print("\n🔍 步驟 2: 分析港口風險（低溫與能見度單獨處理）...")
-        risk_assessments = self._analyze_all_ports()
-        
-        # ✅ 3. 分析低溫港口（獨立分析，不計入主報告）
-        print("\n❄️ 步驟 3: 分析低溫港口...")
-        temp_assessments = self._analyze_temperature_ports()
-        
-        # ✅ 4. 分析能見度不良港口（獨立分析，不計入主報告）
-        print("\n🌫️ 步驟 4: 分析能見度不良港口...")
-        visibility_assessments = self._analyze_visibility_ports()
-        
-        # 5. 生成圖表
-        print(f"\n📈 步驟 5: 生成氣象趨勢圖...")
-        self._generate_charts(risk_assessments)
-        charts_generated = sum(1 for r in risk_assessments if r.chart_base64_list)
-        print(f"   ✅ 成功為 {charts_generated}/{len(risk_assessments)} 個港口生成圖表")
-        
-        # 6. 為低溫港口生成溫度圖
-        if temp_assessments:
-            print(f"\n❄️ 步驟 6: 為 {len(temp_assessments)} 個低溫港口生成溫度圖...")
-            for assessment in temp_assessments:
-                b64_temp = self.chart_generator.generate_temperature_chart(
-                    assessment, assessment.port_code
-                )
-                if b64_temp:
-                    assessment.chart_base64_list.append(b64_temp)
-                    print(f"      ✅ {assessment.port_code} 溫度圖已生成")
 
-        # ✅ 6.5. 為能見度不良港口生成能見度圖
-        if visibility_assessments:
-            print(f"\n🌫️ 步驟 6.5: 為 {len(visibility_assessments)} 個能見度不良港口生成能見度圖（48h）...")
-            for assessment in visibility_assessments:
-                b64_vis = self.chart_generator.generate_visibility_chart(
-                    assessment, assessment.port_code
-                )
-                if b64_vis:
-                    assessment.chart_base64_list.append(b64_vis)
-            print(f"      ✅ {assessment.port_code} 能見度圖已生成")
-        
-        # 7. 發送 Teams 通知
-        teams_sent = False
-        if self.notifier.webhook_url:
-            print("\n📢 步驟 7: 發送 Teams 通知...")
-            teams_sent = self.notifier.send_risk_alert(risk_assessments)
-        else:
-            print("\n⚠️ 步驟 7: 跳過 Teams 通知 (未設定 Webhook)")
-        
-        # 8. 生成報告
-        print("\n📊 步驟 8: 生成數據報告...")
-        report_data = self._generate_data_report(download_stats, risk_assessments, teams_sent)
-        
-        # 9. 發送主要氣象報告 Email
-        print("\n📧 步驟 9: 發送主要氣象報告 Email...")
-        report_html = self._generate_html_report(risk_assessments)
-        
-        email_sent = False
-        try:
-            email_sent = self.email_notifier.send_trigger_email(
-                report_data, report_html, None
-            )
-        except Exception as e:
-            print(f"⚠️ 主要報告發信過程發生異常: {e}")
-            traceback.print_exc()
-        
-        # ✅ 10. 發送低溫警報 Email
-        print("\n❄️ 步驟 10: 檢查是否需要發送低溫警報...")
-        
-        temp_email_sent = False
-        if temp_assessments:
-            print(f"   🔍 發現 {len(temp_assessments)} 個港口有低溫警告,準備發送專用報告...")
-            temp_report_data = self._generate_temperature_report_data(temp_assessments)
-            temp_report_html = self._generate_temperature_html_report(temp_assessments)
-            
-            try:
-                temp_email_sent = self.email_notifier.send_temperature_alert(
-                    temp_report_data, temp_report_html
-                )
-            except Exception as e:
-                print(f"⚠️ 低溫警報發信過程發生異常: {e}")
-                traceback.print_exc()
-        else:
-            print("   ✅ 無低溫警告港口,跳過低溫警報發送")
-        
-        # ✅ 11. 發送能見度警報 Email
-        print("\n🌫️ 步驟 11: 檢查是否需要發送能見度警報...")
-        
-        vis_email_sent = False
-        if visibility_assessments:
-            print(f"   🔍 發現 {len(visibility_assessments)} 個港口有能見度警告,準備發送專用報告...")
-            vis_report_data = self._generate_visibility_report_data(visibility_assessments)
-            vis_report_html = self._generate_visibility_html_report(visibility_assessments)
-            
-            try:
-                vis_email_sent = self.email_notifier.send_visibility_alert(
-                    vis_report_data, vis_report_html
-                )
-            except Exception as e:
-                print(f"⚠️ 能見度警報發信過程發生異常: {e}")
-                traceback.print_exc()
-        else:
-            print("   ✅ 無能見度警告港口,跳過能見度警報發送")
-        
-        report_data['email_sent'] = email_sent
-        report_data['teams_sent'] = teams_sent
-        report_data['temp_email_sent'] = temp_email_sent
-        report_data['temp_ports_count'] = len(temp_assessments)
-        report_data['vis_email_sent'] = vis_email_sent  # ✅ 新增
-        report_data['vis_ports_count'] = len(visibility_assessments)  # ✅ 新增
-        
-        print("\n" + "=" * 80)
-        print("✅ 每日監控執行完成")
-        print(f"   - 風險港口（不含低溫/能見度）: {len(risk_assessments)}")
-        print(f"   - 低溫港口（獨立報告）: {len(temp_assessments)}")
-        print(f"   - 能見度不良港口（獨立報告）: {len(visibility_assessments)}")  # ✅ 新增
-        print(f"   - Teams 通知: {'✅' if teams_sent else '❌'}")
-        print(f"   - 主要報告 Email: {'✅' if email_sent else '❌'}")
-        print(f"   - 低溫警報 Email: {'✅' if temp_email_sent else '❌'}")
-        print(f"   - 能見度警報 Email: {'✅' if vis_email_sent else '❌'}")  # ✅ 新增
-        print("=" * 80)
-        
-        return report_data
+# ================= HTML 報告模板 =================
 
-    def _analyze_temperature_ports(self) -> List[RiskAssessment]:
-            """✅ 專門分析低溫港口（獨立於主風險分析）- 修正強健版"""
-            temp_assessments = []
-            total = len(self.crawler.port_list)
-            
-            print(f"   🔍 開始分析 {total} 個港口的溫度資料 (修正版)...")
-            
-            for i, port_code in enumerate(self.crawler.port_list, 1):
-                try:
-                    # 1. 取得資料來源 (7d 與 48h)
-                    data_7d = self.db.get_latest_content_7d(port_code)
-                    data_48h = self.db.get_latest_content(port_code)
-                    
-                    info = self.crawler.get_port_info(port_code)
-                    if not info:
-                        continue
+# ✅ 報告共用字型設定（模組載入時建立一次）
+_FONT_STYLE = "font-family: 'Noto Sans TC', 'Microsoft JhengHei UI', 'Microsoft YaHei UI', 'Segoe UI', Arial, sans-serif;"
 
-                    # 定義內部函式來處理天氣記錄，方便重複使用
-                    def process_weather_records(content, is_7d_source):
-                        parser = WeatherParser()
-                        try:
-                            if is_7d_source:
-                                p_name, _, w_records, _ = parser.parse_content_7d(content)
-                            else:
-                                p_name, _, w_records, _ = parser.parse_content_48h(content)
-                            return p_name, w_records
-                        except Exception as e:
-                            print(f"      ⚠️ 解析失敗 ({'7D' if is_7d_source else '48H'}): {e}")
-                            return None, []
 
-                    # 2. 嘗試解析與過濾溫度 (優先 7d -> 失敗則轉 48h)
-                    valid_temp_records = []
-                    weather_records = []
-                    port_name = info.get('port_name', port_code)
-                    issued_time = ""
-                    used_source = ""
+def _frozen_styles(table: Dict[int, Dict[str, str]]) -> MappingProxyType:
+    """將樣式表包成唯讀對映，避免執行中被意外修改"""
+    return MappingProxyType({level: MappingProxyType(style) for level, style in table.items()})
 
-                    # --- 嘗試 7D ---
-                    if data_7d:
-                        content_7d, issued_7d, name_7d = data_7d
-                        p_name_7d, records_7d = process_weather_records(content_7d, True)
-                        
-                        if records_7d:
-                            # 檢查 7D 資料是否有有效溫度
-                            temp_valid_7d = []
-                            for r in records_7d:
-                                try:
-                                    # 🔥 修正：強制轉型 float，避免字串型態導致漏抓
-                                    t_val = float(r.temperature)
-                                    if -60 < t_val < 60: # 合理溫度範圍
-                                        # 為了避免汙染原始資料，這裡僅用於判斷
-                                        r.temperature = t_val 
-                                        temp_valid_7d.append(r)
-                                except (ValueError, TypeError):
-                                    continue
-                            
-                            if temp_valid_7d:
-                                valid_temp_records = temp_valid_7d
-                                weather_records = records_7d
-                                port_name = info.get('port_name', p_name_7d)
-                                issued_time = issued_7d
-                                used_source = "7D"
 
-                    # --- 如果 7D 無效或沒抓到溫度，嘗試 48H ---
-                    if not valid_temp_records and data_48h:
-                        content_48h, issued_48h, name_48h = data_48h
-                        p_name_48h, records_48h = process_weather_records(content_48h, False)
-                        
-                        if records_48h:
-                            temp_valid_48h = []
-                            for r in records_48h:
-                                try:
-                                    t_val = float(r.temperature)
-                                    if -60 < t_val < 60:
-                                        r.temperature = t_val
-                                        temp_valid_48h.append(r)
-                                except (ValueError, TypeError):
-                                    continue
-                            
-                            if temp_valid_48h:
-                                valid_temp_records = temp_valid_48h
-                                weather_records = records_48h
-                                port_name = info.get('port_name', p_name_48h)
-                                issued_time = issued_48h
-                                used_source = "48H"
-                                print(f"   [{i}/{total}] ⚠️ {port_code}: 7D 無有效溫度，改用 48H 資料")
+def _build_level_meta(table: Dict[int, Dict[str, str]]) -> MappingProxyType:
+    """由各等級基本欄位推導摘要列、詳細表頭、港口標籤所需的其他欄位"""
+    return _frozen_styles({
+        level: {
+            **meta,
+            'border': meta['color'],
+            'title_zh': f"{meta['emoji']} {meta['label_zh']}港口",
+            'title_en': f"{meta['label']} LEVEL PORTS",
+            'desc': f"條件 Criteria: {meta['criteria']}",
+            'chip_text': f"{meta['label_zh']} {meta['label']}",
+        }
+        for level, meta in table.items()
+    })
+
+
+# ✅ 主要報告：各風險等級的樣式與文字（摘要列、詳細表頭、港口標籤共用同一份）
+_LEVEL_META = _build_level_meta({
+    3: {
+        'emoji': '🔴', 
+        'label': 'HIGH RISK', 
+        'label_zh': '高度風險', 
+        'color': '#DC2626', 
+        'bg': '#FEF2F2', 
+        'summary_border': '#FCA5A5',
+        'header_bg': '#FEE2E2', 
+        'criteria': '風速 Wind > 34 kts / 陣風 Gust > 41 kts / 浪高 Wave > 4.0 m'
+    },
+    2: {
+        'emoji': '🟠', 
+        'label': 'MEDIUM RISK', 
+        'label_zh': '中度風險', 
+        'color': '#F59E0B', 
+        'bg': '#FFFBEB', 
+        'summary_border': '#FCD34D',
+        'header_bg': '#FEF3C7', 
+        'criteria': '風速 Wind > 28 kts / 陣風 Gust > 34 kts / 浪高 Wave > 3.5 m '
+    },
+    1: {
+        'emoji': '🟡', 
+        'label': 'LOW RISK', 
+        'label_zh': '輕度風險', 
+        'color': '#0EA5E9', 
+        'bg': '#F0F9FF', 
+        'summary_border': '#7DD3FC',
+        'header_bg': '#E0F2FE', 
+        'criteria': '風速 Wind > 22 kts / 陣風 Gust > 28 kts / 浪高 Wave > 2.5 m'
+    }
+})
+
+# ✅ 主要報告：風速 / 陣風 / 浪高分級 (門檻, 文字, 顏色)，由高到低排列
+_WIND_BANDS = ((34, "強風", "#DC2626"), (28, "中強風", "#F59E0B"), (22, "微風", "#0EA5E9"))
+_GUST_BANDS = ((41, "危險陣風", "#DC2626"), (34, "強陣風", "#F59E0B"), (28, "中陣風", "#0EA5E9"))
+_WAVE_BANDS = ((4.0, "危險浪高", "#DC2626"), (3.5, "高浪", "#F59E0B"), (2.5, "中浪", "#0EA5E9"))
+
+
+def _band_for(value: float, bands: tuple, default: tuple = ("", "#333")) -> tuple:
+    """依分級表回傳 (文字, 顏色)，未達任何門檻時回傳 default"""
+    for threshold, text, color in bands:
+        if value >= threshold:
+            return text, color
+    return default
+
+
+# ✅ 主要報告：無風險港口時的「全部安全」頁面（字型樣式於匯入時帶入，僅剩時間待填）
+_EMPTY_REPORT_HTML = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="UTF-8">
+                <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            </head>
+            <body style="margin: 0; padding: 20px; background-color: #F0F4F8; {font_style}">
+                <div style="max-width: 900px; margin: 0 auto; background-color: #E8F5E9; padding: 40px; border-left: 8px solid #4CAF50; border-radius: 4px; text-align: center;">
+                    <div style="font-size: 48px; margin-bottom: 15px;">✅</div>
+                    <h2 style="margin: 0 0 10px 0; font-size: 28px; color: #2E7D32;">
+                        所有港口安全 All Ports Safe
+                    </h2>
+                    <p style="margin: 0; font-size: 18px; color: #1B5E20; line-height: 1.8;">
+                        未來 48 小時內所有靠泊港口均處於安全範圍<br>
+                        All ports are within safe limits for the next 48 hours.
+                    </p>
+                    <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid #A5D6A7; font-size: 13px; color: #558B2F;">
+                        📅 最後更新時間 Last Updated: {now_tpe} / {now_utc}
+                    </div>
+                </div>
+            </body>
+            </html>
+            """.replace("{font_style}", _FONT_STYLE)
 
-                    # 3. 最終檢查
-                    if not valid_temp_records:
-                        print(f"   [{i}/{total}] ⚠️ {port_code}: 無任何有效溫度資料")
-                        continue
-                    
-                    # 4. 找出最低溫
-                    min_temp_record = min(valid_temp_records, key=lambda r: r.temperature)
-                    
-                    # 🔥 修正：使用 <= 0，包含 0 度結冰點
-                    if min_temp_record.temperature <= RISK_THRESHOLDS['temp_freezing']:
-                        
-                        # 計算 LCT 時區偏移
-                        try:
-                            lct_offset_hours = int(min_temp_record.lct_time.utcoffset().total_seconds() / 3600)
-                        except:
-                            lct_offset_hours = 0
-                        
-                        # 建立評估報告
-                        assessment = RiskAssessment(
-                            port_code=port_code,
-                            port_name=port_name,
-                            country=info.get('country', 'N/A'),
-                            risk_level=0, # 低溫不計入風險等級
-                            risk_factors=[f"低溫 {min_temp_record.temperature:.1f}°C"],
-                            
-                            # 填入必填欄位 (Dummy values)
-                            max_wind_kts=0, max_wind_bft=0, max_gust_kts=0, max_gust_bft=0, max_wave=0,
-                            max_wind_time_utc="", max_wind_time_lct="", max_gust_time_utc="", max_gust_time_lct="", max_wave_time_utc="", max_wave_time_lct="",
-                            
-                            # 重要：溫度資料
-                            min_temperature=min_temp_record.temperature,
-                            min_temp_time_utc=f"{min_temp_record.time.strftime('%m/%d %H:%M')} (UTC)",
-                            min_temp_time_lct=f"{min_temp_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})",
-                            
-                            risk_periods=[],
-                            issued_time=issued_time,
-                            latitude=info.get('latitude', 0.0),
-                            longitude=info.get('longitude', 0.0),
-                            weather_records=weather_records # 保留供繪圖
-                        )
-                        
-                        temp_assessments.append(assessment)
-                        print(f"   [{i}/{total}] ❄️ {port_code}: 發現低溫 {min_temp_record.temperature:.1f}°C (來源: {used_source})")
-                    else:
-                        print(f"   [{i}/{total}] ✅ {port_code}: 最低溫 {min_temp_record.temperature:.1f}°C (安全)")
-                        
-                except Exception as e:
-                    print(f"   [{i}/{total}] ❌ {port_code}: 分析過程錯誤 - {e}")
-                    traceback.print_exc()
-            
-            print(f"\n✅ 低溫分析完成：共找到 {len(temp_assessments)} 個低溫港口")
-            return temp_assessments
 
+# ✅ 低溫報告：無低溫港口時的「溫度正常」頁面（字型樣式於匯入時帶入，僅剩時間待填）
+_EMPTY_TEMP_REPORT_HTML = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="UTF-8">
+                <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            </head>
+            <body style="margin: 0; padding: 20px; background-color: #F0F4F8; {font_style}">
+                <div style="max-width: 900px; margin: 0 auto; background-color: #E8F5E9; padding: 40px; border-left: 8px solid #4CAF50; border-radius: 4px; text-align: center;">
+                    <div style="font-size: 48px; margin-bottom: 15px;">✅</div>
+                    <h2 style="margin: 0 0 10px 0; font-size: 28px; color: #2E7D32;">
+                        所有港口溫度正常 All Ports Have Normal Temperature
+                    </h2>
+                    <p style="margin: 0; font-size: 18px; color: #1B5E20; line-height: 1.8;">
+                        未來 7 天內所有港口氣溫均在安全範圍<br>
+                        All ports have temperature within safe limits for the next 7 days.
+                    </p>
+                    <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid #A5D6A7; font-size: 13px; color: #558B2F;">
+                        📅 最後更新時間 Last Updated: {now_tpe} / {now_utc}
+                    </div>
+                </div>
+            </body>
+            </html>
+            """.replace("{font_style}", _FONT_STYLE)
 
 
-    def _analyze_visibility_ports(self) -> List[RiskAssessment]:
+def _chart_cid(kind: str, port_code: str, idx: int) -> str:
+    """內嵌圖表的 Content-ID（報告 HTML 與郵件附件共用同一命名）"""
+    return f"{kind}_{port_code}_{idx}"
 
-            """✅ 專門分析能見度不良港口（改用 48h 資料）"""
-            vis_assessments = []
-            total = len(self.crawler.port_list)    
 
-            for i, port_code in enumerate(self.crawler.port_list, 1):
-                try:
-                    # ✅ 改用 48h 資料
-                    data_48h = self.db.get_latest_content(port_code)
-                    if not data_48h:
-                        continue            
-                    content_48h, issued_48h, name_48h = data_48h              
-                    info = self.crawler.get_port_info(port_code)
-                    if not info:
-                        continue
-                    # ✅ 修正：正確呼叫 48h 解析函式
-                    parser = WeatherParser()
-                    port_name_48h, wind_records_48h, weather_records_48h, warnings_48h = parser.parse_content_48h(content_48h)
-                    if not weather_records_48h:
-                        print(f"   [{i}/{total}] ⚠️ {port_code}: 無天氣記錄")
-                        continue
-                    # 過濾有效的能見度記錄
-                    valid_vis_records = []
-                    for r in weather_records_48h:
-                        vis_m = r.visibility_meters
-                        if vis_m is not None and isinstance(vis_m, (int, float)) and vis_m > 0:
-                            valid_vis_records.append(r)     
-                    if not valid_vis_records:
-                        print(f"   [{i}/{total}] ⚠️ {port_code}: 無有效能見度資料")
-                        continue
-                    
-                    # 找出最低能見度
-                    min_vis_record = min(valid_vis_records, key=lambda r: r.visibility_meters)
-                    print(f"   [{i}/{total}] 🔍 {port_code}: 檢查能見度 {min_vis_record.visibility_meters / 1000:.2f} km (閾值: {RISK_THRESHOLDS['visibility_poor'] / 1000:.2f} km)")
-                    # 檢查是否低於閾值
-                    if min_vis_record.visibility_meters < RISK_THRESHOLDS['visibility_poor']:
-                        # 找出所有能見度不良時段
-                        poor_vis_periods = []
-                        in_poor_vis = False
-                        period_start = None
-                        period_min_vis = float('inf')                   
+def _chart_images(assessments: List[RiskAssessment], kind: str) -> Dict[str, bytes]:
+    """收集各港口 PNG 圖表，回傳 Content-ID → PNG bytes"""
+    return {
+        _chart_cid(kind, a.port_code, idx): png
+        for a in assessments
+        for idx, png in enumerate(a.chart_png_list)
+        if png
+    }
 
-                        for r in valid_vis_records:
-                            if r.visibility_meters < RISK_THRESHOLDS['visibility_poor']:
-                                if not in_poor_vis:
-                                    # 開始新時段
-                                    period_start = r
-                                    period_min_vis = r.visibility_meters
-                                    in_poor_vis = True
-                                else:
-                                    # 更新最低能見度
-                                    period_min_vis = min(period_min_vis, r.visibility_meters)
-                            else:
-                                if in_poor_vis:
-                                    # 結束時段
-                                    prev_record = valid_vis_records[valid_vis_records.index(r) - 1]
-                                    poor_vis_periods.append({
-                                        'start_utc': period_start.time.strftime('%Y-%m-%d %H:%M'),
-                                        'end_utc': prev_record.time.strftime('%Y-%m-%d %H:%M'),
-                                        'start_lct': period_start.lct_time.strftime('%Y-%m-%d %H:%M'),
-                                        'end_lct': prev_record.lct_time.strftime('%Y-%m-%d %H:%M'),
-                                        'min_visibility_m': period_min_vis,
-                                        'min_visibility_km': period_min_vis / 1000
-                                    })
 
-                                    in_poor_vis = False
-                        # 如果最後還在能見度不良狀態
-                        if in_poor_vis:
-                            poor_vis_periods.append({
-                                'start_utc': period_start.time.strftime('%Y-%m-%d %H:%M'),
-                                'end_utc': valid_vis_records[-1].time.strftime('%Y-%m-%d %H:%M'),
-                                'start_lct': period_start.lct_time.strftime('%Y-%m-%d %H:%M'),
-                                'end_lct': valid_vis_records[-1].lct_time.strftime('%Y-%m-%d %H:%M'),
-                                'min_visibility_m': period_min_vis,
-                                'min_visibility_km': period_min_vis / 1000
-                            })
-                        # 建立能見度評估
-                        assessment = RiskAssessment(
-                            port_code=port_code,
-                            port_name=info.get('port_name', port_name_48h),
-                            country=info.get('country', 'N/A'),
-                            risk_level=0,
-                            risk_factors=[f"能見度不良 {min_vis_record.visibility_meters / 1000:.2f} km"],                      
-                            max_wind_kts=0,
-                            max_wind_bft=0,
-                            max_gust_kts=0,
-                            max_gust_bft=0,
-                            max_wave=0,                       
-                            max_wind_time_utc="",
-                            max_wind_time_lct="",
-                            max_gust_time_utc="",
-                            max_gust_time_lct="",
-                            max_wave_time_utc="",
-                            max_wave_time_lct="",                        
+# ✅ 主要報告：數值醒目 / 一般樣式
+_HIGH_STYLE = "color: #DC2626; font-weight: bold;"
+_NORMAL_STYLE = "color: #333;"
 
-                            min_visibility=min_vis_record.visibility_meters,
-                            min_visibility_time_utc=f"{min_vis_record.time.strftime('%m/%d %H:%M')} (UTC)",
-                            min_visibility_time_lct=f"{min_vis_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT)",
-                            poor_visibility_periods=poor_vis_periods,
-                            
-                            risk_periods=[],
-                            issued_time=issued_48h,
-                            latitude=info.get('latitude', 0.0),
-                            longitude=info.get('longitude', 0.0),
-                            weather_records=weather_records_48h  # ✅ 使用 48h 資料
-                        )
-                        vis_assessments.append(assessment)
+# ✅ 主要報告：各等級詳細表格的標題與表頭（以 _LEVEL_META[level] 格式化）
+_DETAIL_LEVEL_HEADER_TPL = """
+    <tr>
+        <td style="padding: 0 25px;">
+            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-bottom: 10px;">
+                <tr>
+                    <td style="background-color: {color}; color: white; padding: 10px 15px; font-weight: bold; font-size: 15px;">
+                        {title_zh} {title_en}
+                    </td>
+                </tr>
+                <tr>
+                    <td style="font-size: 11px; color: #666; padding: 5px 0 8px 0;">
+                        {desc}
+                    </td>
+                </tr>
+            </table>
+            
+            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 1px solid #E5E7EB; margin-bottom: 30px;">
+                <tr style="background-color: {header_bg}; font-size: 12px; color: #666;">
+                    <th align="left" style="padding: 10px; border-bottom: 2px solid {border}; width: 18%; font-weight: 600;">港口資訊<br>Port Info</th>
+                    <th align="left" style="padding: 10px; border-bottom: 2px solid {border}; width: 25%; font-weight: 600;">未來 48 Hrs 氣象數據<br>48-Hr Weather Data</th>
+                    <th align="left" style="padding: 10px; border-bottom: 2px solid {border}; width: 57%; font-weight: 600;">高風險時段<br>High Risk Period</th>
+                </tr>
+            """
 
-                        print(f"   [{i}/{total}] 🌫️ {port_code}: 能見度不良 {min_vis_record.visibility_meters / 1000:.2f} km ({len(poor_vis_periods)} 個時段)")
-                except Exception as e:
 
-                    print(f"   [{i}/{total}] ❌ {port_code}: {e}")
+# ✅ 主要報告：單一氣象數值區塊（風速 / 陣風 / 浪高共用）
+_METRIC_ROW_TPL = """
+                    <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: {margin};">
+                        <tr>
+                            <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">{icon}</td>
+                            <td valign="top">
+                                <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">{label}</span>
+                                <span style="{value_style} font-size: 16px; font-weight: 700;">
+                                    {value} <span style="font-size: 12px; font-weight: 500;">{unit}</span>
+                                </span>
+                                <span style="font-size: 11px; color: {band_color}; margin-left: 6px; font-weight: 600;">
+                                    {band_text}
+                                </span>
+                            </td>
+                        </tr>
+                    </table>"""
 
-                    traceback.print_exc()
 
-        
+def _pressure_metric_html(p) -> str:
+    """主要報告：低氣壓時的氣壓數值區塊，未達門檻回傳空字串"""
+    if p.min_pressure >= RISK_THRESHOLDS['pressure_low']:
+        return ""
+    return f"""
+                    <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
+                        <tr>
+                            <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">🌀</td>
+                            <td valign="top">
+                                <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">氣壓 Pressure</span>
+                                <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
+                                    {p.min_pressure:.0f} <span style="font-size: 12px; font-weight: 500;">hPa</span>
+                                </span>
+                                <span style="font-size: 11px; color: #DC2626; margin-left: 6px; font-weight: 600;">
+                                    低氣壓
+                                </span>
+                            </td>
+                        </tr>
+                    </table>
+                    """
 
-            print(f"\n✅ 能見度分析完成：共找到 {len(vis_assessments)} 個能見度不良港口")
 
-            return vis_assessments
+def _pressure_time_row_html(p, pres_utc: str, pres_lct: str) -> str:
+    """主要報告：低氣壓時的最低氣壓時間列，未達門檻回傳空字串"""
+    if p.min_pressure >= RISK_THRESHOLDS['pressure_low']:
+        return ""
+    return f"""
+                        <tr>
+                            <td valign="top" style="color: #DC2626; width: 85px; padding-bottom: 8px; line-height: 1.3; font-weight: 600;">
+                                最低氣壓<br><span style="font-size: 10px;">Min Pressure:</span>
+                            </td>
+                            <td valign="top" style="padding-bottom: 8px;">
+                                <div style="color: #DC2626; font-weight: 600;">{pres_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
+                                <div style="color: #DC2626;">{pres_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
+                            </td>
+                        </tr>
+                    """
 
 
+# ✅ 主要報告：單一港口資料列（匯入時建立一次，每港以 format 填值）
+_PORT_ROW_TPL = """
+                <tr style="background-color: {row_bg}; border-bottom: 1px solid #E5E7EB;">
+                <td valign="top" style="padding: 15px; width: 25%;">
+                    <div style="font-size: 20px; font-weight: 800; color: #1E3A8A; margin-bottom: 4px; line-height: 1;">
+                        {port_code}
+                    </div>
+                    <div style="font-size: 13px; color: #4B5563; font-weight: 600; margin-bottom: 4px;">
+                        {port_name}
+                    </div>
+                    <div style="font-size: 12px; color: #6B7280; margin-bottom: 8px;">
+                        📍 {country}
+                    </div>
+                    <div>
+                        <span style="background-color: {risk_level_bg}; color: {risk_level_color}; font-size: 11px; font-weight: 700; padding: 3px 6px; border-radius: 3px; display: inline-block;">
+                            {risk_level_icon} {risk_level_text}
+                        </span>
+                    </div>
+                </td>
 
-    def _analyze_all_ports(self) -> List[RiskAssessment]:
-        """✅ 分析所有港口（風浪用 48h, 天氣用 7d）- 能見度不計入主報告"""
-        assessments = []
-        total = len(self.crawler.port_list)
-        
-        for i, port_code in enumerate(self.crawler.port_list, 1):
-            try:
-                # 取得 48h 風浪資料
-                data_48h = self.db.get_latest_content(port_code)
-                if not data_48h:
-                    print(f"   [{i}/{total}] ⚠️ {port_code}: 無 48h 資料")
-                    continue
-                
-                content_48h, issued_48h, name_48h = data_48h
-                
-                # ✅ 取得 7d 天氣資料
-                data_7d = self.db.get_latest_content_7d(port_code)
-                if not data_7d:
-                    print(f"   [{i}/{total}] ⚠️ {port_code}: 無 7d 資料,使用 48h 備用")
-                    # 如果沒有 7d 資料,使用 48h 資料作為備用
-                    content_7d = content_48h
-                    issued_7d = issued_48h
-                else:
-                    content_7d, issued_7d, name_7d = data_7d
-                
-                info = self.crawler.get_port_info(port_code)
-                if not info:
-                    continue
-                
-                # ✅ 分析風險（傳入 48h 和 7d 資料）
-                res = self.analyzer.analyze_port_risk_combined(
-                    port_code, info, content_48h, content_7d, issued_48h
-                )
-                
-                if res:
-                    assessments.append(res)
-                    print(f"   [{i}/{total}] ⚠️ {port_code}: {self.analyzer.get_risk_label(res.risk_level)}")
-                else:
-                    print(f"   [{i}/{total}] ✅ {port_code}: 安全")
-                    
-            except Exception as e:
-                print(f"   [{i}/{total}] ❌ {port_code}: {e}")
-                traceback.print_exc()
-        
-        assessments.sort(key=lambda x: x.risk_level, reverse=True)
-        return assessments
-    
-    def _generate_charts(self, assessments: List[RiskAssessment]):
-        """✅ 生成風浪圖表（不包含溫度圖）"""
-        
-        if not assessments:
-            print("   ⚠️ 沒有風險港口需要生成圖表")
-            return
-        
-        chart_targets = assessments[:20]
-        
-        print(f"   📊 準備為 {len(chart_targets)} 個港口生成風浪圖表...")
-        
-        success_count = 0
-        for i, assessment in enumerate(chart_targets, 1):
-            print(f"   [{i}/{len(chart_targets)}] 正在處理 {assessment.port_code}...")
-            
-            # 1. 風速圖
-            b64_wind = self.chart_generator.generate_wind_chart(
-                assessment, assessment.port_code
-            )
-            if b64_wind:
-                assessment.chart_base64_list.append(b64_wind)
-                success_count += 1
-                print(f"      ✅ 風速圖已生成")
-            
-            # 2. 浪高圖
-            if assessment.max_wave >= RISK_THRESHOLDS['wave_caution']:
-                b64_wave = self.chart_generator.generate_wave_chart(
-                    assessment, assessment.port_code
-                )
-                if b64_wave:
-                    assessment.chart_base64_list.append(b64_wave)
-                    print(f"      ✅ 浪高圖已生成")
-        
-        print(f"   ✅ 風浪圖表生成完成：{success_count}/{len(chart_targets)} 個港口成功")
+                <td valign="top" style="padding: 15px; width: 30%;">
+                    {metrics_html}
+                {pressure_metric}
+                </td>
 
-        
-    def _generate_data_report(self, stats, assessments, teams_sent):
-        """生成 JSON 報告"""
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "summary": {
-                "total_ports_checked": len(self.crawler.port_list),
-                "risk_ports_found": len(assessments),
-                "danger_count": len([a for a in assessments if a.risk_level == 3]),
-                "warning_count": len([a for a in assessments if a.risk_level == 2]),
-                "caution_count": len([a for a in assessments if a.risk_level == 1]),
-            },
-            "download_stats": stats,
-            "risk_assessments": [a.to_dict() for a in assessments],
-            "notifications": {
-                "teams_sent": teams_sent
-            }
-        }
-    
-    def _generate_temperature_report_data(self, temp_assessments: List[RiskAssessment]) -> dict:
-        """生成低溫警報專用 JSON 報告"""
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "alert_type": "LOW_TEMPERATURE",
-            "summary": {
-                "total_ports_with_freezing": len(temp_assessments),
-                "min_temperature": min(a.min_temperature for a in temp_assessments),
-            },
-            "freezing_ports": [
-                {
-                    "port_code": a.port_code,
-                    "port_name": a.port_name,
-                    "country": a.country,
-                    "min_temperature": a.min_temperature,
-                    "min_temp_time_utc": a.min_temp_time_utc,
-                    "min_temp_time_lct": a.min_temp_time_lct,
-                } for a in temp_assessments
-            ]
-        }
+                <td valign="top" style="padding: 15px; width: 45%;">
+                    <div style="margin-bottom: 12px;">
+                        <span style="background-color: #FEF2F2; color: #B91C1C; border: 1px solid #FCA5A5; font-size: 11px; font-weight: 600; padding: 4px 8px; border-radius: 4px; display: inline-block; line-height: 1.4;">
+                            ⚠️ 風險因素 Risk Factors: {risk_factors}
+                        </span>
+                    </div>
+                    
+                    <table border="0" cellpadding="2" cellspacing="0" width="100%" style="font-size: 12px; border-collapse: collapse;">
+                        <tr>
+                            <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
+                                最大風速<br><span style="font-size: 10px;">Max Wind:</span>
+                            </td>
+                            <td valign="top" style="padding-bottom: 8px;">
+                                <div style="color: #111827; font-weight: 600;">{w_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
+                                <div style="color: #4B5563;">{w_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
+                                最大陣風<br><span style="font-size: 10px;">Max Gust:</span>
+                            </td>
+                            <td valign="top" style="padding-bottom: 8px;">
+                                <div style="color: #111827; font-weight: 600;">{g_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
+                                <div style="color: #4B5563;">{g_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
+                            </td>
+                        </tr>
+                        <tr>
+                            <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
+                                最大浪高<br><span style="font-size: 10px;">Max Wave:</span>
+                            </td>
+                            <td valign="top" style="padding-bottom: 8px;">
+                                <div style="color: #111827; font-weight: 600;">{v_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
+                                <div style="color: #4B5563;">{v_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
+                            </td>
+                        </tr>
+                        {pressure_time_row}
+                        <tr>
+                            <td valign="top" style="color: #991B1B; width: 85px; padding-top: 8px; border-top: 1px dashed #E5E7EB; font-weight: 600; line-height: 1.3;">
+                                風險持續<br><span style="font-size: 10px;">Duration:</span>
+                            </td>
+                            <td valign="top" style="padding-top: 8px; border-top: 1px dashed #E5E7EB;">
+                                <div style="color: #991B1B; font-weight: 700; font-size: 13px;">
+                                    {risk_duration} <span style="font-size: 11px; font-weight: 600;">小時 Hrs</span>
+                                </div>
+                            </td>
+                        </tr>
+                    </table>
+                </td>
+            </tr>
+                """
 
-    def _generate_visibility_report_data(self, vis_assessments: List[RiskAssessment]) -> dict:
-        """✅ 生成能見度警報專用 JSON 報告"""
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "alert_type": "POOR_VISIBILITY",
-            "summary": {
-                "total_ports_with_poor_visibility": len(vis_assessments),
-                "min_visibility_km": min(a.min_visibility / 1000 for a in vis_assessments),
-            },
-            "poor_visibility_ports": [
-                {
-                    "port_code": a.port_code,
-                    "port_name": a.port_name,
-                    "country": a.country,
-                    "min_visibility_km": a.min_visibility / 1000,
-                    "poor_visibility_periods": a.poor_visibility_periods,
-                } for a in vis_assessments
-            ]
-        }
 
-    def save_report_to_file(self, report, output_dir='reports'):
-        """儲存報告到檔案"""
-        os.makedirs(output_dir, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        path = os.path.join(output_dir, f"report_{timestamp}.json")
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
-        
-        print(f"📄 報告已儲存: {path}")
-        return path
-    def _generate_html_report(self, assessments: List[RiskAssessment]) -> str:
-        """✅ 生成主要氣象風險 HTML 報告（完整版，能見度已移除）"""
-        
-        def format_time_display(time_str):
-            if not time_str:
-                return "N/A"
-            try:
-                if '(' in time_str:
-                    return time_str.split('(')[0].strip()
-                return time_str
-            except:
-                return time_str
-        
-        font_style = "font-family: 'Noto Sans TC', 'Microsoft JhengHei UI', 'Microsoft YaHei UI', 'Segoe UI', Arial, sans-serif;"
-        
-        try:
-            from zoneinfo import ZoneInfo
-            taipei_tz = ZoneInfo('Asia/Taipei')
-        except ImportError:
-            taipei_tz = timezone(timedelta(hours=8))
-        
-        utc_now = datetime.now(timezone.utc)
-        tpe_now = utc_now.astimezone(taipei_tz)
-        
-        now_str_TPE = f"{tpe_now.strftime('%Y-%m-%d %H:%M')} (TPE)"
-        now_str_UTC = f"{utc_now.strftime('%Y-%m-%d %H:%M')} (UTC)"
-
-        if not assessments:
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            </head>
-            <body style="margin: 0; padding: 20px; background-color: #F0F4F8; {font_style}">
-                <div style="max-width: 900px; margin: 0 auto; background-color: #E8F5E9; padding: 40px; border-left: 8px solid #4CAF50; border-radius: 4px; text-align: center;">
-                    <div style="font-size: 48px; margin-bottom: 15px;">✅</div>
-                    <h2 style="margin: 0 0 10px 0; font-size: 28px; color: #2E7D32;">
-                        所有港口安全 All Ports Safe
-                    </h2>
-                    <p style="margin: 0; font-size: 18px; color: #1B5E20; line-height: 1.8;">
-                        未來 48 小時內所有靠泊港口均處於安全範圍<br>
-                        All ports are within safe limits for the next 48 hours.
-                    </p>
-                    <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid #A5D6A7; font-size: 13px; color: #558B2F;">
-                        📅 最後更新時間 Last Updated: {now_str_TPE} / {now_str_UTC}
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-        risk_groups = {3: [], 2: [], 1: []}
-        for a in assessments:
-            risk_groups[a.risk_level].append(a)
-
-        summary_styles = {
-            3: {
-                'emoji': '🔴', 
-                'label': 'HIGH RISK', 
-                'label_zh': '高度風險', 
-                'color': '#DC2626', 
-                'bg': '#FEF2F2', 
-                'border': '#FCA5A5',
-                'criteria': '風速 Wind > 34 kts / 陣風 Gust > 41 kts / 浪高 Wave > 4.0 m'
-            },
-            2: {
-                'emoji': '🟠', 
-                'label': 'MEDIUM RISK', 
-                'label_zh': '中度風險', 
-                'color': '#F59E0B', 
-                'bg': '#FFFBEB', 
-                'border': '#FCD34D',
-                'criteria': '風速 Wind > 28 kts / 陣風 Gust > 34 kts / 浪高 Wave > 3.5 m '  #
-            },
-            1: {
-                'emoji': '🟡', 
-                'label': 'LOW RISK', 
-                'label_zh': '輕度風險', 
-                'color': '#0EA5E9', 
-                'bg': '#F0F9FF', 
-                'border': '#7DD3FC',
-                'criteria': '風速 Wind > 22 kts / 陣風 Gust > 28 kts / 浪高 Wave > 2.5 m'
-            }
-        }
-
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body bgcolor="#F0F4F8" style="margin: 0; padding: 0; {font_style}">
-    <center>
-    <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#ffffff" style="max-width: 900px; margin: 20px auto;">
-    <tr>
-        <td style="padding: 0 25px;">
-            <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                <tr>
-                    <td bgcolor="#7F1D1D" style="padding: 8px 20px;">
-                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                            <tr>
-                                <td align="left" style="font-size: 13px; color: #FEE2E2; font-weight: bold;">
-                                    📅 最後更新時間 Last Updated:
-                                </td>
-                                <td align="right" style="font-size: 13px; color: #ffffff; font-weight: bold;">
-                                    {now_str_TPE} | {now_str_UTC}
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-            </table>
-        </td>
-    </tr>
-    
-    <tr>
-        <td style="padding: 25px 25px 0 25px;">
-            <table role="presentation" border="0" cellpadding="0" cellspacing="0" width="100%">
-                <tr>
-                    <td bgcolor="#1E3A8A" style="padding: 20px 25px; border-radius: 8px 8px 0 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                        <h2 style="margin: 0; font-size: 24px; font-weight: 700; color: #ffffff; line-height: 1.4; letter-spacing: 0.3px;">
-                            WHL Port Weather Risk Monitor
-                        </h2>
-                        <p style="margin: 8px 0 0 0; font-size: 16px; font-weight: 500; color: #E0E7FF; line-height: 1.3;">
-                            Weather Warning for Next 48 Hours
-                        </p>
-                    </td>
-                </tr>
-            </table>
-        </td>
-    </tr>
-    
-    <tr>
-        <td style="padding: 0 25px;">
-            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 3px solid #1E3A8A; border-top: none;">
-        """
-        
-        for level in [3, 2, 1]:
-            ports = risk_groups[level]
-            style = summary_styles[level]
-            
-            if ports:
-                port_codes = ', '.join([f"<strong style='font-size: 17px; color: {style['color']};'>{p.port_code}</strong>" for p in ports])
-                html += f"""
+def _render_summary_row(ports: list, style) -> str:
+    """主要報告：摘要區單一風險等級列"""
+    port_codes = ', '.join(f"<strong style='font-size: 17px; color: {style['color']};'>{_esc(p.port_code)}</strong>" for p in ports)
+    return f"""
                 <tr>
-                    <td style="padding: 18px 20px; border-bottom: 2px solid {style['border']}; background-color: {style['bg']};">
+                    <td style="padding: 18px 20px; border-bottom: 2px solid {style['summary_border']}; background-color: {style['bg']};">
                         <table border="0" cellpadding="0" cellspacing="0" width="100%">
                             <tr>
                                 <td width="240" valign="middle">
@@ -2050,8 +1964,10 @@ class WeatherMonitorService:
                     </td>
                 </tr>
                 """
-        
-        html += f"""
+
+
+# ✅ 主要報告：摘要之後的固定區塊（資料來源、船隊應對措施、詳細資料分隔線）
+_RISK_ACTIONS_HTML = """
                         </table>
         </td>
     </tr>
@@ -2163,489 +2079,149 @@ class WeatherMonitorService:
 
 
         """
-        # ✅ 詳細港口資料表格（能見度已移除）
-        styles_detail = {
-            3: {
-                'color': '#DC2626', 
-                'bg': '#FEF2F2', 
-                'title_zh': '🔴 高度風險港口', 
-                'title_en': 'HIGH RISK LEVEL PORTS',
-                'border': '#DC2626', 
-                'header_bg': '#FEE2E2', 
-                'desc': '條件 Criteria: 風速 Wind > 34 kts / 陣風 Gust > 41 kts / 浪高 Wave > 4.0 m'
-            },
-            2: {
-                'color': '#F59E0B', 
-                'bg': '#FFFBEB', 
-                'title_zh': '🟠 中度風險港口', 
-                'title_en': 'MEDIUM RISK LEVEL PORTS',
-                'border': '#F59E0B', 
-                'header_bg': '#FEF3C7', 
-                'desc': '條件 Criteria: 風速 Wind > 28 kts / 陣風 Gust > 34 kts / 浪高 Wave > 3.5 m '
-            },
-            1: {
-                'color': '#0EA5E9', 
-                'bg': '#F0F9FF', 
-                'title_zh': '🟡 輕度風險港口', 
-                'title_en': 'LOW RISK LEVEL PORTS',
-                'border': '#0EA5E9', 
-                'header_bg': '#E0F2FE', 
-                'desc': '條件 Criteria: 風速 Wind > 22 kts / 陣風 Gust > 28 kts / 浪高 Wave > 2.5 m'
-            }
-        }
-
-        for level in [3, 2, 1]:
-            ports = risk_groups[level]
-            if not ports:
-                continue
-            
-            style = styles_detail[level]
-            
-            html += f"""
-    <tr>
-        <td style="padding: 0 25px;">
-            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-bottom: 10px;">
-                <tr>
-                    <td style="background-color: {style['color']}; color: white; padding: 10px 15px; font-weight: bold; font-size: 15px;">
-                        {style['title_zh']} {style['title_en']}
-                    </td>
-                </tr>
-                <tr>
-                    <td style="font-size: 11px; color: #666; padding: 5px 0 8px 0;">
-                        {style['desc']}
-                    </td>
-                </tr>
-            </table>
-            
-            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 1px solid #E5E7EB; margin-bottom: 30px;">
-                <tr style="background-color: {style['header_bg']}; font-size: 12px; color: #666;">
-                    <th align="left" style="padding: 10px; border-bottom: 2px solid {style['border']}; width: 18%; font-weight: 600;">港口資訊<br>Port Info</th>
-                    <th align="left" style="padding: 10px; border-bottom: 2px solid {style['border']}; width: 25%; font-weight: 600;">未來 48 Hrs 氣象數據<br>48-Hr Weather Data</th>
-                    <th align="left" style="padding: 10px; border-bottom: 2px solid {style['border']}; width: 57%; font-weight: 600;">高風險時段<br>High Risk Period</th>
-                </tr>
-            """
-            
-            for index, p in enumerate(ports):
-                row_bg = "#FFFFFF" if index % 2 == 0 else "#FAFBFC"
-                
-                wind_style = "color: #DC2626; font-weight: bold;" if p.max_wind_kts >= 28 else "color: #333;"
-                gust_style = "color: #DC2626; font-weight: bold;" if p.max_gust_kts >= 34 else "color: #333;"
-                wave_style = "color: #DC2626; font-weight: bold;" if p.max_wave >= 3.5 else "color: #333;"
-                
-                if p.risk_level == 3:
-                    risk_level_bg = "#FEF2F2"
-                    risk_level_color = "#DC2626"
-                    risk_level_text = "高度風險 HIGH RISK"
-                    risk_level_icon = "🔴"
-                elif p.risk_level == 2:
-                    risk_level_bg = "#FFFBEB"
-                    risk_level_color = "#F59E0B"
-                    risk_level_text = "中度風險 MEDIUM RISK"
-                    risk_level_icon = "🟠"
-                else:
-                    risk_level_bg = "#F0F9FF"
-                    risk_level_color = "#0EA5E9"
-                    risk_level_text = "輕度風險 LOW RISK"
-                    risk_level_icon = "🟡"
-
-                if p.max_wind_kts >= 34:
-                    wind_level_text = "強風"
-                    wind_level_color = "#DC2626"
-                elif p.max_wind_kts >= 28:
-                    wind_level_text = "中強風"
-                    wind_level_color = "#F59E0B"
-                elif p.max_wind_kts >= 22:
-                    wind_level_text = "微風"
-                    wind_level_color = "#0EA5E9"
-                else:
-                    wind_level_text = ""
-                    wind_level_color = "#333"
-
-                if p.max_gust_kts >= 41:
-                    gust_level_text = "危險陣風"
-                    gust_level_color = "#DC2626"
-                elif p.max_gust_kts >= 34:
-                    gust_level_text = "強陣風"
-                    gust_level_color = "#F59E0B"
-                elif p.max_gust_kts >= 28:
-                    gust_level_text = "中陣風"
-                    gust_level_color = "#0EA5E9"
-                else:
-                    gust_level_text = ""
-                    gust_level_color = "#333"
-
-                if p.max_wave >= 4.0:
-                    wave_level_text = "危險浪高"
-                    wave_level_color = "#DC2626"
-                elif p.max_wave >= 3.5:
-                    wave_level_text = "高浪"
-                    wave_level_color = "#F59E0B"
-                elif p.max_wave >= 2.5:
-                    wave_level_text = "中浪"
-                    wave_level_color = "#0EA5E9"
-                else:
-                    wave_level_text = ""
-                    wave_level_color = "#333"
-
-                if p.risk_periods:
-                    try:
-                        first_risk = datetime.strptime(p.risk_periods[0]['time'], '%Y-%m-%d %H:%M')
-                        last_risk = datetime.strptime(p.risk_periods[-1]['time'], '%Y-%m-%d %H:%M')
-                        duration_hours = int((last_risk - first_risk).total_seconds() / 3600) + 3
-                        risk_duration = str(min(duration_hours, 48))
-                    except:
-                        risk_duration = str(len(p.risk_periods) * 3)
-                else:
-                    risk_duration = "0"
-
-                w_utc = format_time_display(p.max_wind_time_utc)
-                w_lct = format_time_display(p.max_wind_time_lct)
-                g_utc = format_time_display(p.max_gust_time_utc)
-                g_lct = format_time_display(p.max_gust_time_lct)
-                v_utc = format_time_display(p.max_wave_time_utc)
-                v_lct = format_time_display(p.max_wave_time_lct)
-                
-                pres_utc = format_time_display(p.min_pressure_time_utc) if p.min_pressure_time_utc else "N/A"
-                pres_lct = format_time_display(p.min_pressure_time_lct) if p.min_pressure_time_lct else "N/A"
 
-                show_pressure_warning = p.min_pressure < RISK_THRESHOLDS['pressure_low']
-                # ✅ 能見度不再顯示在主報告中
-                
-                html += f"""
-                <tr style="background-color: {row_bg}; border-bottom: 1px solid #E5E7EB;">
-                <td valign="top" style="padding: 15px; width: 25%;">
-                    <div style="font-size: 20px; font-weight: 800; color: #1E3A8A; margin-bottom: 4px; line-height: 1;">
-                        {p.port_code}
-                    </div>
-                    <div style="font-size: 13px; color: #4B5563; font-weight: 600; margin-bottom: 4px;">
-                        {p.port_name}
-                    </div>
-                    <div style="font-size: 12px; color: #6B7280; margin-bottom: 8px;">
-                        📍 {p.country}
-                    </div>
-                    <div>
-                        <span style="background-color: {risk_level_bg}; color: {risk_level_color}; font-size: 11px; font-weight: 700; padding: 3px 6px; border-radius: 3px; display: inline-block;">
-                            {risk_level_icon} {risk_level_text}
-                        </span>
-                    </div>
-                </td>
 
-                <td valign="top" style="padding: 15px; width: 30%;">
-                    <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                        <tr>
-                            <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">💨</td>
-                            <td valign="top">
-                                <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">風速 Wind</span>
-                                <span style="{wind_style} font-size: 16px; font-weight: 700;">
-                                    {p.max_wind_kts:.0f} <span style="font-size: 12px; font-weight: 500;">kts</span>
-                                </span>
-                                <span style="font-size: 11px; color: {wind_level_color}; margin-left: 6px; font-weight: 600;">
-                                    {wind_level_text}
-                                </span>
-                            </td>
-                        </tr>
-                    </table>
-                    <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                        <tr>
-                            <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">🌪️</td>
-                            <td valign="top">
-                                <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">陣風 Gust</span>
-                                <span style="{gust_style} font-size: 16px; font-weight: 700;">
-                                    {p.max_gust_kts:.0f} <span style="font-size: 12px; font-weight: 500;">kts</span>
-                                </span>
-                                <span style="font-size: 11px; color: {gust_level_color}; margin-left: 6px; font-weight: 600;">
-                                    {gust_level_text}
-                                </span>
-                            </td>
-                        </tr>
-                    </table>
-                    <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                        <tr>
-                            <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">🌊</td>
-                            <td valign="top">
-                                <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">浪高 Wave</span>
-                                <span style="{wave_style} font-size: 16px; font-weight: 700;">
-                                    {p.max_wave:.1f} <span style="font-size: 12px; font-weight: 500;">m</span>
-                                </span>
-                                <span style="font-size: 11px; color: {wave_level_color}; margin-left: 6px; font-weight: 600;">
-                                    {wave_level_text}
-                                </span>
-                            </td>
-                        </tr>
-                    </table>
-                """
-                
-                if show_pressure_warning:
-                    html += f"""
-                    <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                        <tr>
-                            <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">🌀</td>
-                            <td valign="top">
-                                <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">氣壓 Pressure</span>
-                                <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
-                                    {p.min_pressure:.0f} <span style="font-size: 12px; font-weight: 500;">hPa</span>
-                                </span>
-                                <span style="font-size: 11px; color: #DC2626; margin-left: 6px; font-weight: 600;">
-                                    低氣壓
-                                </span>
-                            </td>
-                        </tr>
-                    </table>
-                    """
-                
-                # ✅ 能見度區塊已完全移除
-                
-                html += f"""
-                </td>
+# ✅ 三種報告共用：詳細資料表格結尾
+_DETAIL_TABLE_CLOSE_HTML = """
+                </table>
+            </td>
+        </tr>
+        """
 
-                <td valign="top" style="padding: 15px; width: 45%;">
-                    <div style="margin-bottom: 12px;">
-                        <span style="background-color: #FEF2F2; color: #B91C1C; border: 1px solid #FCA5A5; font-size: 11px; font-weight: 600; padding: 4px 8px; border-radius: 4px; display: inline-block; line-height: 1.4;">
-                            ⚠️ 風險因素 Risk Factors: {', '.join(p.risk_factors[:3])}
-                        </span>
-                    </div>
+# ✅ 三種報告共用的頁尾（公司資訊、免責聲明、版權），只有年份與免責聲明文字不同
+_FOOTER_TMPL = """
+        <tr>
+            <td bgcolor="#F8F9FA" align="center" style="padding: 40px 25px; border-top: 3px solid #D1D5DB;">
+                <table border="0" cellpadding="0" cellspacing="0" width="600">
+                    <tr>
+                        <td align="center" style="padding-bottom: 8px;">
+                            <font size="5" color="#1F2937" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
+                                <strong>萬海航運股份有限公司</strong>
+                            </font>
+                        </td>
+                    </tr>
+                    <tr>
+                        <td align="center" style="padding-bottom: 20px;">
+                            <font size="3" color="#4B5563" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
+                                <strong>WAN HAI LINES LTD.</strong>
+                            </font>
+                        </td>
+                    </tr>
                     
-                    <table border="0" cellpadding="2" cellspacing="0" width="100%" style="font-size: 12px; border-collapse: collapse;">
-                        <tr>
-                            <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
-                                最大風速<br><span style="font-size: 10px;">Max Wind:</span>
-                            </td>
-                            <td valign="top" style="padding-bottom: 8px;">
-                                <div style="color: #111827; font-weight: 600;">{w_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
-                                <div style="color: #4B5563;">{w_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
-                            </td>
-                        </tr>
-                        <tr>
-                            <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
-                                最大陣風<br><span style="font-size: 10px;">Max Gust:</span>
-                            </td>
-                            <td valign="top" style="padding-bottom: 8px;">
-                                <div style="color: #111827; font-weight: 600;">{g_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
-                                <div style="color: #4B5563;">{g_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
-                            </td>
-                        </tr>
-                        <tr>
-                            <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
-                                最大浪高<br><span style="font-size: 10px;">Max Wave:</span>
-                            </td>
-                            <td valign="top" style="padding-bottom: 8px;">
-                                <div style="color: #111827; font-weight: 600;">{v_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
-                                <div style="color: #4B5563;">{v_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
-                            </td>
-                        </tr>
-                """
-                
-                if show_pressure_warning:
-                    html += f"""
-                        <tr>
-                            <td valign="top" style="color: #DC2626; width: 85px; padding-bottom: 8px; line-height: 1.3; font-weight: 600;">
-                                最低氣壓<br><span style="font-size: 10px;">Min Pressure:</span>
-                            </td>
-                            <td valign="top" style="padding-bottom: 8px;">
-                                <div style="color: #DC2626; font-weight: 600;">{pres_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
-                                <div style="color: #DC2626;">{pres_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
-                            </td>
-                        </tr>
-                    """
-                
-                html += f"""
-                        <tr>
-                            <td valign="top" style="color: #991B1B; width: 85px; padding-top: 8px; border-top: 1px dashed #E5E7EB; font-weight: 600; line-height: 1.3;">
-                                風險持續<br><span style="font-size: 10px;">Duration:</span>
-                            </td>
-                            <td valign="top" style="padding-top: 8px; border-top: 1px dashed #E5E7EB;">
-                                <div style="color: #991B1B; font-weight: 700; font-size: 13px;">
-                                    {risk_duration} <span style="font-size: 11px; font-weight: 600;">小時 Hrs</span>
-                                </div>
-                            </td>
-                        </tr>
-                    </table>
-                </td>
-            </tr>
-                """
-                
-                if hasattr(p, 'chart_base64_list') and p.chart_base64_list:
-                    chart_imgs = ""
-                    for idx, b64 in enumerate(p.chart_base64_list):
-                        b64_clean = b64.replace('\n', '').replace('\r', '').replace(' ', '')
-                        chart_imgs += f"""
-            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                <tr>
-                    <td align="center">
-                        <img src="data:image/png;base64,{b64_clean}" 
-                            width="750" 
-                            style="display:block; max-width: 100%; height: auto; border: 1px solid #ddd;" 
-                            alt="Chart {idx+1}">
-                    </td>
-                </tr>
-            </table>
-                        """
+                    <tr>
+                        <td align="center" style="padding-bottom: 20px;">
+                            <table border="0" cellpadding="0" cellspacing="0" width="120">
+                                <tr>
+                                    <td style="border-top: 2px solid #9CA3AF;"></td>
+                                </tr>
+                            </table>
+                        </td>
+                    </tr>
                     
-            html += f"""
-            <tr>
-                <td colspan="3" style="padding: 15px; background-color: {row_bg}; border-bottom: 1px solid #eee;">
-                    <div style="font-size: 13px; color: #666; margin-bottom: 8px; font-weight: 600;">
-                        📈 風浪趨勢圖表 Wind & Wave Trend Chart:
-                    </div>
-                    {chart_imgs}
-                </td>
-            </tr>
-
-                    """
-            
-            html += """
-            </table>
-        </td>
-    </tr>
-            """
-
-        # Footer（繼續下一部分）
-        html += f"""
-    <tr>
-        <td bgcolor="#F8F9FA" align="center" style="padding: 40px 25px; border-top: 3px solid #D1D5DB;">
-            <table border="0" cellpadding="0" cellspacing="0" width="600">
-                <tr>
-                    <td align="center" style="padding-bottom: 8px;">
-                        <font size="5" color="#1F2937" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                            <strong>萬海航運股份有限公司</strong>
-                        </font>
-                    </td>
-                </tr>
-                <tr>
-                    <td align="center" style="padding-bottom: 20px;">
-                        <font size="3" color="#4B5563" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                            <strong>WAN HAI LINES LTD.</strong>
-                        </font>
-                    </td>
-                </tr>
-                
-                <tr>
-                    <td align="center" style="padding-bottom: 20px;">
-                        <table border="0" cellpadding="0" cellspacing="0" width="120">
-                            <tr>
-                                <td style="border-top: 2px solid #9CA3AF;"></td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-                
-                <tr>
-                    <td align="center" style="padding-bottom: 25px;">
-                        <font size="2" color="#374151" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                            <strong>Marine Technology Division | Fleet Risk Management Dept.</strong>
-                        </font>
-                    </td>
-                </tr>
-                
-                <tr>
-                    <td>
-                        <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FEF3C7">
-                            <tr>
-                                <td style="padding: 18px 20px; border-left: 4px solid #F59E0B; border-radius: 4px;">
-                                    <table border="0" cellpadding="0" cellspacing="0">
-                                        <tr>
-                                            <td style="padding-bottom: 8px;">
-                                                <font size="2" color="#78350F" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                                    <strong>⚠️ 免責聲明 Disclaimer</strong>
-                                                </font>
-                                            </td>
-                                        </tr>
-                                        <tr>
-                                            <td>
-                                                <font size="2" color="#92400E" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                                    本信件內容僅供參考,船長仍應依據實際天候狀況與專業判斷採取適當措施。
-                                                    <br>
-                                                    <span style="color: #B45309;">This report is for reference only. Captains should take appropriate actions based on actual weather conditions.</span>
-                                                </font>
-                                            </td>
-                                        </tr>
-                                    </table>
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-                
-                <tr>
-                    <td align="center" style="padding-top: 25px;">
-                        <font size="1" color="#9CA3AF" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                            &copy; {now_str_TPE[:4]} Wan Hai Lines Ltd. All Rights Reserved.
-                        </font>
-                    </td>
-                </tr>
-            </table>
-        </td>
-    </tr>
-    </table>
-    </center>
-</body>
-</html>
+                    <tr>
+                        <td align="center" style="padding-bottom: 25px;">
+                            <font size="2" color="#374151" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
+                                <strong>Marine Technology Division | Fleet Risk Management Dept.</strong>
+                            </font>
+                        </td>
+                    </tr>
+                    
+                    <tr>
+                        <td>
+                            <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FEF3C7">
+                                <tr>
+                                    <td style="padding: 18px 20px; border-left: 4px solid #F59E0B; border-radius: 4px;">
+                                        <table border="0" cellpadding="0" cellspacing="0">
+                                            <tr>
+                                                <td style="padding-bottom: 8px;">
+                                                    <font size="2" color="#78350F" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
+                                                        <strong>⚠️ 免責聲明 Disclaimer</strong>
+                                                    </font>
+                                                </td>
+                                            </tr>
+                                            <tr>
+                                                <td>
+                                                    <font size="2" color="#92400E" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
+                                                        {disclaimer_zh}
+                                                        <br>
+                                                        <span style="color: #B45309;">{disclaimer_en}</span>
+                                                    </font>
+                                                </td>
+                                            </tr>
+                                        </table>
+                                    </td>
+                                </tr>
+                            </table>
+                        </td>
+                    </tr>
+                    
+                    <tr>
+                        <td align="center" style="padding-top: 25px;">
+                            <font size="1" color="#9CA3AF" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
+                                &copy; {year} Wan Hai Lines Ltd. All Rights Reserved.
+                            </font>
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+        </table>
+        </center>
+    </body>
+    </html>
         """
-        
-        return html
-    
-    
-    def _generate_visibility_html_report(self, vis_assessments: List[RiskAssessment]) -> str:
-        """✅ 生成能見度警報專用 HTML 報告（參考主報告風格）"""
-        
-        def format_time_display(time_str):
-            if not time_str:
-                return "N/A"
-            try:
-                if '(' in time_str:
-                    return time_str.split('(')[0].strip()
-                return time_str
-            except:
-                return time_str
-        
-        font_style = "font-family: 'Noto Sans TC', 'Microsoft JhengHei UI', 'Microsoft YaHei UI', 'Segoe UI', Arial, sans-serif;"
-        
-        try:
-            from zoneinfo import ZoneInfo
-            taipei_tz = ZoneInfo('Asia/Taipei')
-        except ImportError:
-            taipei_tz = timezone(timedelta(hours=8))
-        
-        utc_now = datetime.now(timezone.utc)
-        tpe_now = utc_now.astimezone(taipei_tz)
-        
-        now_str_TPE = f"{tpe_now.strftime('%Y-%m-%d %H:%M')} (TPE)"
-        now_str_UTC = f"{utc_now.strftime('%Y-%m-%d %H:%M')} (UTC)"
-
-        # 如果沒有能見度不良港口
-        if not vis_assessments:
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            </head>
-            <body style="margin: 0; padding: 20px; background-color: #F0F4F8; {font_style}">
-                <div style="max-width: 900px; margin: 0 auto; background-color: #E8F5E9; padding: 40px; border-left: 8px solid #4CAF50; border-radius: 4px; text-align: center;">
-                    <div style="font-size: 48px; margin-bottom: 15px;">✅</div>
-                    <h2 style="margin: 0 0 10px 0; font-size: 28px; color: #2E7D32;">
-                        所有港口能見度良好 All Ports Have Good Visibility
-                    </h2>
-                    <p style="margin: 0; font-size: 18px; color: #1B5E20; line-height: 1.8;">
-                        未來 48 小時內所有港口能見度均在安全範圍<br>
-                        All ports have visibility within safe limits for the next 48 hours.
-                    </p>
-                    <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid #A5D6A7; font-size: 13px; color: #558B2F;">
-                        📅 最後更新時間 Last Updated: {now_str_TPE} / {now_str_UTC}
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
 
-        html = f"""
+# ✅ 各報告的免責聲明 (中文, 英文)
+_FOOTER_DISCLAIMERS = MappingProxyType({
+    'weather': (
+        "本信件內容僅供參考,船長仍應依據實際天候狀況與專業判斷採取適當措施。",
+        "This report is for reference only. Captains should take appropriate actions based on actual weather conditions.",
+    ),
+    'temperature': (
+        "本信件內容僅供參考，船長仍應依據實際天候狀況與專業判斷採取適當措施。",
+        "This report is for reference only. Captains should take appropriate actions based on actual weather conditions.",
+    ),
+    'visibility': (
+        "本信件內容僅供參考，船長仍應依據實際天候狀況、雷達觀測與專業判斷採取適當措施。能見度不良時務必遵守 COLREG Rule 19 相關規定。",
+        "This report is for reference only. Captains should take appropriate actions based on actual weather conditions, radar observations, and professional judgment. Comply with COLREG Rule 19 in restricted visibility.",
+    ),
+})
+
+
+# ✅ 版權年份於匯入時決定一次（每日排程執行，跨年當天最多差一天可接受）
+_COPYRIGHT_YEAR = str(datetime.now(TAIPEI_TZ).year)
+
+
+@lru_cache(maxsize=8)
+def _footer_for_year(year: str, kind: str) -> str:
+    """依年份與報告種類產生頁尾 HTML（結果快取，同一年內直接重用）"""
+    disclaimer_zh, disclaimer_en = _FOOTER_DISCLAIMERS[kind]
+    return _FOOTER_TMPL.format(year=year, disclaimer_zh=disclaimer_zh, disclaimer_en=disclaimer_en)
+
+
+# ✅ 低溫報告共用 CSS：重複出現的行內樣式集中為 class，縮小每份報告的 HTML
+_TEMP_CSS = (
+    ".chk-icon{font-size:14px}"
+    ".chk-title{font-size:14px;color:#451A03;line-height:1.5}"
+    ".chk-text{font-size:14px;color:#78350F;line-height:1.5}"
+    ".chk-sub{font-size:13px;color:#92400E;line-height:1.4}"
+    ".port-code{font-size:20px;font-weight:800;color:#DC2626;margin-bottom:4px;line-height:1}"
+    ".port-name{font-size:13px;color:#4B5563;font-weight:600;margin-bottom:4px}"
+    ".port-country{font-size:12px;color:#6B7280;margin-bottom:8px}"
+    ".tz-tag{color:#9CA3AF;font-size:10px;font-weight:normal}"
+    ".time-cell{padding-bottom:8px}"
+)
+
+# ✅ 低溫報告：頁首 / 港口摘要模板（匯入時建立一次，字型樣式已帶入，其餘以 format_map 填值）
+#    CSS 內的大括號先跳脫成 {{ }}，format_map 後才會還原為原本的 CSS
+_TEMP_HDR = """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <style>{temp_css}</style>
     </head>
     <body bgcolor="#F0F4F8" style="margin: 0; padding: 0; {font_style}">
         <center>
@@ -2654,14 +2230,14 @@ class WeatherMonitorService:
             <td style="padding: 0 25px;">
                 <table border="0" cellpadding="0" cellspacing="0" width="100%">
                     <tr>
-                        <td bgcolor="#5B21B6" style="padding: 8px 20px;">
+                        <td bgcolor="#991B1B" style="padding: 8px 20px;">
                             <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                 <tr>
-                                    <td align="left" style="font-size: 13px; color: #DDD6FE; font-weight: bold;">
+                                    <td align="left" style="font-size: 13px; color: #FEE2E2; font-weight: bold;">
                                         📅 最後更新時間 Last Updated:
                                     </td>
                                     <td align="right" style="font-size: 13px; color: #ffffff; font-weight: bold;">
-                                        {now_str_TPE} | {now_str_UTC}
+                                        {now_tpe} | {now_utc}
                                     </td>
                                 </tr>
                             </table>
@@ -2675,45 +2251,47 @@ class WeatherMonitorService:
             <td style="padding: 25px 25px 0 25px;">
                 <table role="presentation" border="0" cellpadding="0" cellspacing="0" width="100%">
                     <tr>
-                        <td bgcolor="#7C3AED" style="padding: 20px 25px; border-radius: 8px 8px 0 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                        <td bgcolor="#DC2626" style="padding: 20px 25px; border-radius: 8px 8px 0 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
                             <h2 style="margin: 0; font-size: 24px; font-weight: 700; color: #ffffff; line-height: 1.4; letter-spacing: 0.3px;">
-                                🌫️ WHL Port Poor Visibility Alert
+                                ❄️ WHL Port Low Temperature Alert
                             </h2>
-                            <p style="margin: 8px 0 0 0; font-size: 16px; font-weight: 500; color: #EDE9FE; line-height: 1.3;">
-                                能見度不良警報：未來 48 小時能見度低於 1.5 海浬之港口預報
+                            <p style="margin: 8px 0 0 0; font-size: 16px; font-weight: 500; color: #FEE2E2; line-height: 1.3;">
+                                低溫警報：未來 7 天氣溫低於 0°C (32°F) 之港口預報
                             </p>
                         </td>
                     </tr>
                 </table>
             </td>
         </tr>
-        
+""".replace("{font_style}", _FONT_STYLE).replace("{temp_css}", _TEMP_CSS.replace("{", "{{").replace("}", "}}"))
+
+_TEMP_PORT_SUMMARY = """        
         <tr>
             <td style="padding: 0 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 3px solid #7C3AED; border-top: none;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 3px solid #DC2626; border-top: none;">
                     <tr>
-                        <td style="padding: 18px 20px; border-bottom: 2px solid #DDD6FE; background-color: #F3E8FF;">
+                        <td style="padding: 18px 20px; border-bottom: 2px solid #FCA5A5; background-color: #FEF2F2;">
                             <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                 <tr>
                                     <td width="240" valign="middle">
-                                        <div style="font-size: 22px; font-weight: bold; color: #7C3AED; line-height: 1.2;">
-                                            🌫️ 能見度不良港口
+                                        <div style="font-size: 22px; font-weight: bold; color: #DC2626; line-height: 1.2;">
+                                            ❄️ 低溫警報港口
                                         </div>
-                                        <div style="font-size: 16px; color: #6B21A8; margin-top: 2px; font-weight: 600;">
-                                            POOR VISIBILITY PORTS
+                                        <div style="font-size: 16px; color: #991B1B; margin-top: 2px; font-weight: 600;">
+                                            LOW TEMPERATURE PORTS
                                         </div>
                                     </td>
                                     <td width="120" valign="middle" align="center">
-                                        <div style="background-color: #7C3AED; color: #ffffff; font-size: 32px; font-weight: bold; padding: 8px 16px; border-radius: 8px; display: inline-block; min-width: 60px;">
-                                            {len(vis_assessments)}
+                                        <div style="background-color: #DC2626; color: #ffffff; font-size: 32px; font-weight: bold; padding: 8px 16px; border-radius: 8px; display: inline-block; min-width: 60px;">
+                                            {count}
                                         </div>
                                     </td>
                                     <td style="padding-left: 20px;" valign="middle">
                                         <div style="font-size: 17px; color: #1F2937; line-height: 1.8; margin-bottom: 8px;">
-                                            {', '.join([f"<strong style='font-size: 17px; color: #7C3AED;'>{p.port_code}</strong>" for p in vis_assessments])}
+                                            {port_badges}
                                         </div>
                                         <div style="font-size: 13px; color: #6B7280; line-height: 1.5; font-style: italic;">
-                                            條件 Criteria: 能見度 Visibility < 1.5 NM (2.778 km)
+                                            條件 Criteria: 氣溫 Temperature < 0°C (32°F)
                                         </div>
                                     </td>
                                 </tr>
@@ -2736,62 +2314,125 @@ class WeatherMonitorService:
                 </table>
             </td>
         </tr>
-        
-        <!-- ✅ 能見度不良應對措施 -->
+"""
+
+# ✅ 低溫報告：詳細港口資料表格的標題與表頭（純靜態內容）
+_TEMP_DETAIL_HEADER_HTML = """
         <tr>
-            <td style="padding: 0 25px 25px 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FFFBEB">
+            <td style="padding: 0 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-bottom: 10px;">
                     <tr>
-                        <td style="padding: 22px 25px; border-left: 5px solid #F59E0B; border-radius: 4px;">
-                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                <tr>
-                                    <td style="padding-bottom: 18px; border-bottom: 2px solid #FCD34D;">
-                                        <strong style="font-size: 16px; color: #78350F;">📋 能見度不良航行安全措施 (Reference: COLREG Rule 19)</strong>
-                                    </td>
-                                </tr>
-                                
-                                <tr>
-                                    <td style="padding-top: 15px; padding-bottom: 12px;">
-                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                            <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">👀</td>
-                                                <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">加強瞭望 (Proper Look-out)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">使用一切可用手段保持適當瞭望，包括<span style="background-color: #FEF3C7; padding: 2px 6px; border-radius: 3px; font-weight: bold;">正確使用雷達與 AIS</span>，調整雷達至最佳狀態以偵測小目標。</span>
-                                                    <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Maintain proper look-out by all available means, especially proper use of Radar and AIS. Adjust radar functions to optimum settings to detect even small targets.</span>
-                                                </td>
-                                            </tr>
-                                        </table>
-                                    </td>
-                                </tr>
-
-                                <tr>
-                                    <td style="padding-bottom: 12px;">
-                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                            <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">🐢</td>
-                                                <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">保持安全速度 (Safe Speed)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">依 COLREG Rule 19 規定，在能見度受限時必須以安全速度行駛，確保能在適當距離內停船。</span>
-                                                    <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Proceed at a safe speed as per COLREG Rule 19. Ensure the vessel can take proper action to avoid collision and stop within appropriate distance.</span>
-                                                </td>
-                                            </tr>
-                                        </table>
+                        <td style="background-color: #DC2626; color: white; padding: 10px 15px; font-weight: bold; font-size: 15px;">
+                            ❄️ 低溫港口詳情 LOW TEMPERATURE PORT DETAILS
+                        </td>
+                    </tr>
+                    <tr>
+                        <td style="font-size: 11px; color: #666; padding: 5px 0 8px 0;">
+                            條件 Criteria: 氣溫 Temperature < 0°C (32°F) | 參考文件 Reference: WRK-00-2412-379
+                        </td>
+                    </tr>
+                </table>
+                
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 1px solid #E5E7EB; margin-bottom: 30px;">
+                    <tr style="background-color: #FEF2F2; font-size: 12px; color: #666;">
+                        <th align="left" style="padding: 10px; border-bottom: 2px solid #DC2626; width: 18%; font-weight: 600;">港口資訊<br>Port Info</th>
+                        <th align="left" style="padding: 10px; border-bottom: 2px solid #DC2626; width: 25%; font-weight: 600;">溫度統計<br>Temperature Stats</th>
+                        <th align="left" style="padding: 10px; border-bottom: 2px solid #DC2626; width: 57%; font-weight: 600;">低溫時段資訊<br>Freezing Period Info</th>
+                    </tr>
+        """
+
+# ✅ 低溫報告：單一港口資料列（匯入時建立一次，每港以 format 填值）
+_TEMP_ROW_TPL = """
+                    <tr style="background-color: {row_bg}; border-bottom: 1px solid #E5E7EB;">
+                    <td valign="top" style="padding: 15px; width: 25%;">
+                        <div class="port-code">
+                            {port_code}
+                        </div>
+                        <div class="port-name">
+                            {port_name}
+                        </div>
+                        <div class="port-country">
+                            📍 {country}
+                        </div>
+                        <div>
+                            <span style="background-color: #FEF2F2; color: #DC2626; font-size: 11px; font-weight: 700; padding: 3px 6px; border-radius: 3px; display: inline-block;">
+                                ❄️ 低溫警報
+                            </span>
+                        </div>
+                    </td>
+
+                    <td valign="top" style="padding: 15px; width: 30%;">
+                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                            <tr>
+                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">🌡️</td>
+                                <td valign="top">
+                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">最低溫度 Min Temp</span>
+                                    <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
+                                        {min_c} <span style="font-size: 12px; font-weight: 500;">°C</span>
+                                    </span>
+                                    <span style="font-size: 11px; color: #DC2626; margin-left: 6px; font-weight: 600;">
+                                        ({min_f}°F)
+                                    </span>
+                                </td>
+                            </tr>
+                        </table>
+                    </td>
+
+                    <td valign="top" style="padding: 15px; width: 45%;">
+                        <div style="margin-bottom: 12px;">
+                            <span style="background-color: #FEF2F2; color: #B91C1C; border: 1px solid #FCA5A5; font-size: 11px; font-weight: 600; padding: 4px 8px; border-radius: 4px; display: inline-block; line-height: 1.4;">
+                                ❄️ 氣溫 < 0°C | Temperature < 32°F
+                            </span>
+                        </div>
+                        
+                        <table border="0" cellpadding="2" cellspacing="0" width="100%" style="font-size: 12px; border-collapse: collapse;">
+                            <tr>
+                                <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
+                                    首次冰點<br><span style="font-size: 10px;">First Freeze:</span>
+                                </td>
+                                <td valign="top" class="time-cell">
+                                    <div style="color: #111827; font-weight: 600;">{first_freeze_utc} <span class="tz-tag">UTC</span></div>
+                                    <div style="color: #4B5563;">{first_freeze_lct} <span class="tz-tag">LT</span></div>
+                                </td>
+                            </tr>
+                            <tr>
+                                <td valign="top" style="color: #DC2626; width: 85px; padding-bottom: 8px; line-height: 1.3; font-weight: 600;">
+                                    最低溫時間<br><span style="font-size: 10px;">Min Temp Time:</span>
+                                </td>
+                                <td valign="top" class="time-cell">
+                                    <div style="color: #DC2626; font-weight: 600;">{temp_utc} <span class="tz-tag">UTC</span></div>
+                                    <div style="color: #DC2626;">{temp_lct} <span class="tz-tag">LT</span></div>
+                                </td>
+                            </tr>
+                        </table>
+                    </td>
+                </tr>
+            """
+
+# ✅ 低溫報告：低溫應對措施與詳細資料分隔線（純靜態內容）
+_LOW_TEMP_ACTIONS_HTML = """
+        <tr>
+            <td style="padding: 0 25px 25px 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FFFBEB">
+                    <tr>
+                        <td style="padding: 22px 25px; border-left: 5px solid #F59E0B; border-radius: 4px;">
+                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                <tr>
+                                    <td style="padding-bottom: 18px; border-bottom: 2px solid #FCD34D;">
+                                        <strong style="font-size: 16px; color: #78350F;">📋 低溫應對措施 (Reference: WRK-00-2412-379)</strong>
                                     </td>
                                 </tr>
-
+                                
                                 <tr>
-                                    <td style="padding-bottom: 12px;">
+                                    <td style="padding-top: 15px; padding-bottom: 12px;">
                                         <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                             <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">📡</td>
+                                                <td width="20" valign="top" class="chk-icon">🔧</td>
                                                 <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">雙雷達運作 (Dual Radar Operation)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">開啟第二部雷達（尤其是 S-Band），配合 AIS 快速識別目標船名、航向、船速，以便及時採取有效避讓行動。</span>
+                                                    <strong class="chk-title">管路防護 (Pipe Protection)：</strong>
+                                                    <span class="chk-text">排空甲板兩舷淡水管路、救生艇淡水櫃及駕駛台洗窗水，防止凍裂。</span>
                                                     <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Switch on another radar (especially S-band) to easily locate small targets. Use AIS to promptly identify target ship's name, course, and speed for effective collision avoidance.</span>
+                                                    <span class="chk-sub">Drain fresh water pipes, lifeboat tanks, and window washing water to prevent bursting.</span>
                                                 </td>
                                             </tr>
                                         </table>
@@ -2802,12 +2443,12 @@ class WeatherMonitorService:
                                     <td style="padding-bottom: 12px;">
                                         <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                             <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">🔄</td>
+                                                <td width="20" valign="top" class="chk-icon">🧊</td>
                                                 <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">避免小角度轉向 (Avoid Small Alterations)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">採取<span style="background-color: #FEF3C7; padding: 2px 6px; border-radius: 3px; font-weight: bold;">明顯且足夠大的轉向角度</span>，避免連續小角度轉向導致對方船舶無法察覺。</span>
+                                                    <strong class="chk-title">甲板安全 (Deck Safety)：</strong>
+                                                    <span class="chk-text">定期剷除冰雪並撒鹽防滑；備妥除冰工具（鏟子、撬棍、噴燈）。</span>
                                                     <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Take substantial and obvious alterations of course. Avoid a succession of small alterations which may not be detected by other vessels.</span>
+                                                    <span class="chk-sub">Regularly remove ice/snow, apply salt, and keep de-icing tools ready.</span>
                                                 </td>
                                             </tr>
                                         </table>
@@ -2818,12 +2459,12 @@ class WeatherMonitorService:
                                     <td style="padding-bottom: 12px;">
                                         <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                             <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">📢</td>
+                                                <td width="20" valign="top" class="chk-icon">⚙️</td>
                                                 <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">鳴放霧號 (Sound Signals)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">依規定鳴放霧號，提醒周圍船舶注意；必要時使用 VHF 與附近船舶溝通確認動態。</span>
+                                                    <strong class="chk-title">機械保護 (Machinery Protection)：</strong>
+                                                    <span class="chk-text">提前啟動並保持甲板機械（絞機、起錨機）運轉；遮蓋暴露馬達。</span>
                                                     <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Sound appropriate fog signals as required. Use VHF to communicate with nearby vessels when necessary to confirm intentions.</span>
+                                                    <span class="chk-sub">Keep deck machinery running; cover exposed motors.</span>
                                                 </td>
                                             </tr>
                                         </table>
@@ -2834,12 +2475,12 @@ class WeatherMonitorService:
                                     <td>
                                         <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                             <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">⚓</td>
+                                                <td width="20" valign="top" class="chk-icon">⚓</td>
                                                 <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">考慮延遲進港或錨泊候泊 (Consider Delay or Anchoring)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">若能見度極差（< 500m），考慮在安全水域錨泊候泊或延遲進港，直到能見度改善。</span>
+                                                    <strong class="chk-title">航行安全 (Navigation Safety)：</strong>
+                                                    <span class="chk-text">注意船舶穩度（結冰導致 GM 減少）；與船管/代理保持聯繫。</span>
                                                     <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">If visibility is extremely poor (< 500m), consider anchoring in safe waters or delaying port entry until visibility improves.</span>
+                                                    <span class="chk-sub">Monitor stability (ice accretion); maintain contact with PIC/Agents.</span>
                                                 </td>
                                             </tr>
                                         </table>
@@ -2857,9 +2498,9 @@ class WeatherMonitorService:
                 <table border="0" cellpadding="0" cellspacing="0" width="100%">
                     <tr>
                         <td style="padding-top: 20px; padding-bottom: 20px; border-top: 3px dashed #D1D5DB; text-align: center;">
-                            <strong style="font-size: 16px; color: #374151;">⬇️ 以下為各港詳細能見度預報資料 ⬇️</strong>
+                            <strong style="font-size: 16px; color: #374151;">⬇️ 以下為各港詳細低溫預報資料 ⬇️</strong>
                             <br>
-                            <span style="font-size: 12px; color: #9CA3AF; letter-spacing: 0.5px;">DETAILED VISIBILITY FORECAST FOR EACH PORT</span>
+                            <span style="font-size: 12px; color: #9CA3AF; letter-spacing: 0.5px;">DETAILED TEMPERATURE FORECAST FOR EACH PORT</span>
                         </td>
                     </tr>
                 </table>
@@ -2867,619 +2508,1256 @@ class WeatherMonitorService:
         </tr>
         """
 
-        # ✅ 詳細港口資料表格
-        html += f"""
+
+# ✅ 能見度報告：無能見度不良港口時的「能見度良好」頁面（字型樣式於匯入時帶入，僅剩時間待填）
+_EMPTY_VIS_REPORT_HTML = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="UTF-8">
+                <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            </head>
+            <body style="margin: 0; padding: 20px; background-color: #F0F4F8; {font_style}">
+                <div style="max-width: 900px; margin: 0 auto; background-color: #E8F5E9; padding: 40px; border-left: 8px solid #4CAF50; border-radius: 4px; text-align: center;">
+                    <div style="font-size: 48px; margin-bottom: 15px;">✅</div>
+                    <h2 style="margin: 0 0 10px 0; font-size: 28px; color: #2E7D32;">
+                        所有港口能見度良好 All Ports Have Good Visibility
+                    </h2>
+                    <p style="margin: 0; font-size: 18px; color: #1B5E20; line-height: 1.8;">
+                        未來 48 小時內所有港口能見度均在安全範圍<br>
+                        All ports have visibility within safe limits for the next 48 hours.
+                    </p>
+                    <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid #A5D6A7; font-size: 13px; color: #558B2F;">
+                        📅 最後更新時間 Last Updated: {now_tpe} / {now_utc}
+                    </div>
+                </div>
+            </body>
+            </html>
+            """.replace("{font_style}", _FONT_STYLE)
+
+# ✅ 能見度報告：頁首 / 港口摘要 / 航行安全措施（匯入時建立一次，字型樣式已帶入，其餘以 format_map 填值）
+_VIS_HDR = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    </head>
+    <body bgcolor="#F0F4F8" style="margin: 0; padding: 0; {font_style}">
+        <center>
+        <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#ffffff" style="max-width: 900px; margin: 20px auto;">
         <tr>
             <td style="padding: 0 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-bottom: 10px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%">
                     <tr>
-                        <td style="background-color: #7C3AED; color: white; padding: 10px 15px; font-weight: bold; font-size: 15px;">
-                            🌫️ 能見度不良港口詳情 POOR VISIBILITY PORT DETAILS
+                        <td bgcolor="#5B21B6" style="padding: 8px 20px;">
+                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                <tr>
+                                    <td align="left" style="font-size: 13px; color: #DDD6FE; font-weight: bold;">
+                                        📅 最後更新時間 Last Updated:
+                                    </td>
+                                    <td align="right" style="font-size: 13px; color: #ffffff; font-weight: bold;">
+                                        {now_tpe} | {now_utc}
+                                    </td>
+                                </tr>
+                            </table>
                         </td>
                     </tr>
+                </table>
+            </td>
+        </tr>
+        
+        <tr>
+            <td style="padding: 25px 25px 0 25px;">
+                <table role="presentation" border="0" cellpadding="0" cellspacing="0" width="100%">
                     <tr>
-                        <td style="font-size: 11px; color: #666; padding: 5px 0 8px 0;">
-                            條件 Criteria: 能見度 Visibility < 1.5 NM (2.778 km)
+                        <td bgcolor="#7C3AED" style="padding: 20px 25px; border-radius: 8px 8px 0 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                            <h2 style="margin: 0; font-size: 24px; font-weight: 700; color: #ffffff; line-height: 1.4; letter-spacing: 0.3px;">
+                                🌫️ WHL Port Poor Visibility Alert
+                            </h2>
+                            <p style="margin: 8px 0 0 0; font-size: 16px; font-weight: 500; color: #EDE9FE; line-height: 1.3;">
+                                能見度不良警報：未來 48 小時能見度低於 1.5 海浬之港口預報
+                            </p>
                         </td>
                     </tr>
                 </table>
-                
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 1px solid #E5E7EB; margin-bottom: 30px;">
-                    <tr style="background-color: #F3E8FF; font-size: 12px; color: #666;">
-                        <th align="left" style="padding: 10px; border-bottom: 2px solid #7C3AED; width: 18%; font-weight: 600;">港口資訊<br>Port Info</th>
-                        <th align="left" style="padding: 10px; border-bottom: 2px solid #7C3AED; width: 25%; font-weight: 600;">能見度統計<br>Visibility Stats</th>
-                        <th align="left" style="padding: 10px; border-bottom: 2px solid #7C3AED; width: 57%; font-weight: 600;">能見度不良危險時段<br>Poor Visibility Danger Periods</th>
+            </td>
+        </tr>
+        
+        <tr>
+            <td style="padding: 0 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 3px solid #7C3AED; border-top: none;">
+                    <tr>
+                        <td style="padding: 18px 20px; border-bottom: 2px solid #DDD6FE; background-color: #F3E8FF;">
+                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                <tr>
+                                    <td width="240" valign="middle">
+                                        <div style="font-size: 22px; font-weight: bold; color: #7C3AED; line-height: 1.2;">
+                                            🌫️ 能見度不良港口
+                                        </div>
+                                        <div style="font-size: 16px; color: #6B21A8; margin-top: 2px; font-weight: 600;">
+                                            POOR VISIBILITY PORTS
+                                        </div>
+                                    </td>
+                                    <td width="120" valign="middle" align="center">
+                                        <div style="background-color: #7C3AED; color: #ffffff; font-size: 32px; font-weight: bold; padding: 8px 16px; border-radius: 8px; display: inline-block; min-width: 60px;">
+                                            {count}
+                                        </div>
+                                    </td>
+                                    <td style="padding-left: 20px;" valign="middle">
+                                        <div style="font-size: 17px; color: #1F2937; line-height: 1.8; margin-bottom: 8px;">
+                                            {port_badges}
+                                        </div>
+                                        <div style="font-size: 13px; color: #6B7280; line-height: 1.5; font-style: italic;">
+                                            條件 Criteria: 能見度 Visibility < 1.5 NM (2.778 km)
+                                        </div>
+                                    </td>
+                                </tr>
+                            </table>
+                        </td>
                     </tr>
-        """
+                </table>
+            </td>
+        </tr>
+        
+        <tr>
+            <td style="padding: 0 25px 20px 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#F3F4F6">
+                    <tr>
+                        <td style="padding: 15px 20px; font-size: 13px; color: #6B7280; text-align: center; border: 1px solid #D1D5DB; border-top: none; border-radius: 0 0 8px 8px;">
+                            <strong style="color: #374151;">資料來源: Weathernews Inc. (WNI)</strong><br>
+                            <span style="color: #9CA3AF;">Data Source: Weathernews Inc. (WNI)</span>
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+        
+        <!-- ✅ 能見度不良應對措施 -->
+        <tr>
+            <td style="padding: 0 25px 25px 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FFFBEB">
+                    <tr>
+                        <td style="padding: 22px 25px; border-left: 5px solid #F59E0B; border-radius: 4px;">
+                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                <tr>
+                                    <td style="padding-bottom: 18px; border-bottom: 2px solid #FCD34D;">
+                                        <strong style="font-size: 16px; color: #78350F;">📋 能見度不良航行安全措施 (Reference: COLREG Rule 19)</strong>
+                                    </td>
+                                </tr>
+                                
+                                <tr>
+                                    <td style="padding-top: 15px; padding-bottom: 12px;">
+                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                            <tr>
+                                                <td width="20" valign="top" style="font-size: 14px;">👀</td>
+                                                <td>
+                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">加強瞭望 (Proper Look-out)：</strong>
+                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">使用一切可用手段保持適當瞭望，包括<span style="background-color: #FEF3C7; padding: 2px 6px; border-radius: 3px; font-weight: bold;">正確使用雷達與 AIS</span>，調整雷達至最佳狀態以偵測小目標。</span>
+                                                    <br>
+                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Maintain proper look-out by all available means, especially proper use of Radar and AIS. Adjust radar functions to optimum settings to detect even small targets.</span>
+                                                </td>
+                                            </tr>
+                                        </table>
+                                    </td>
+                                </tr>
 
-        # 迴圈生成港口數據
-        for index, p in enumerate(vis_assessments):
-            row_bg = "#FFFFFF" if index % 2 == 0 else "#FAFBFC"
-            
-            # 計算總危險時數
-            total_danger_hours = 0
-            for period in p.poor_visibility_periods:
-                try:
-                    start_dt = datetime.strptime(period['start_utc'], '%Y-%m-%d %H:%M')
-                    end_dt = datetime.strptime(period['end_utc'], '%Y-%m-%d %H:%M')
-                    duration_hours = (end_dt - start_dt).total_seconds() / 3600
-                    total_danger_hours += duration_hours
-                except:
-                    pass
-            
-            # 生成能見度時段 HTML
-            vis_periods_html = ""
-            for i, period in enumerate(p.poor_visibility_periods[:10]):
-                start_lct = period['start_lct']
-                end_lct = period['end_lct']
-                min_vis_km = period['min_visibility_km']
-                min_vis_nm = min_vis_km / 1.852
-                
-                try:
-                    start_dt = datetime.strptime(period['start_utc'], '%Y-%m-%d %H:%M')
-                    end_dt = datetime.strptime(period['end_utc'], '%Y-%m-%d %H:%M')
-                    duration_hours = (end_dt - start_dt).total_seconds() / 3600
-                except:
-                    duration_hours = 0
-                
-                # 格式化時間顯示
-                try:
-                    start_dt_obj = datetime.strptime(start_lct, '%Y-%m-%d %H:%M')
-                    end_dt_obj = datetime.strptime(end_lct, '%Y-%m-%d %H:%M')
-                    
-                    if start_dt_obj.date() == end_dt_obj.date():
-                        time_display = f"{start_dt_obj.strftime('%m/%d')} {start_dt_obj.strftime('%H:%M')} ~ {end_dt_obj.strftime('%H:%M')}"
-                    else:
-                        time_display = f"{start_dt_obj.strftime('%m/%d %H:%M')} ~ {end_dt_obj.strftime('%m/%d %H:%M')}"
-                except:
-                    time_display = f"{start_lct} ~ {end_lct}"
-                
-                # 根據能見度設定顏色
-                if min_vis_km < 0.5:
-                    vis_color = "#7F1D1D"
-                    vis_bg = "#FEE2E2"
-                    vis_label = "極低"
-                    vis_icon = "🔴"
-                elif min_vis_km < 1.0:
-                    vis_color = "#991B1B"
-                    vis_bg = "#FEF2F2"
-                    vis_label = "很低"
-                    vis_icon = "🟠"
-                else:
-                    vis_color = "#C2410C"
-                    vis_bg = "#FFF7ED"
-                    vis_label = "低"
-                    vis_icon = "🟡"
-                
-                if i > 0:
-                    vis_periods_html += "<br>"
-                
-                vis_periods_html += f"""
-                <div style="background-color: {vis_bg}; padding: 8px 10px; border-left: 4px solid {vis_color}; margin-bottom: 6px; border-radius: 3px;">
-                    <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                        <tr>
-                            <td width="25" valign="top" style="font-size: 16px; padding-right: 6px;">{vis_icon}</td>
-                            <td valign="top">
-                                <div style="color: {vis_color}; font-size: 12px; font-weight: bold; margin-bottom: 3px;">
-                                    時段 {i+1} | Period {i+1}
-                                </div>
-                                <div style="color: #333333; font-size: 11px; line-height: 1.5;">
-                                    ⏰ <strong>{time_display}</strong> (LT)<br>
-                                    🌫️ 最低能見度: <strong style="color: {vis_color};">{min_vis_km:.2f} km ({min_vis_nm:.2f} NM)</strong> - {vis_label}<br>
-                                    ⏱️ 持續: <strong>{duration_hours:.1f}</strong> 小時
-                                </div>
-                            </td>
-                        </tr>
-                    </table>
-                </div>
-                """
-            
-            if len(p.poor_visibility_periods) > 10:
-                vis_periods_html += f"<div style='font-size: 11px; color: #888888; margin-top: 6px; text-align: center;'>... 及其他 {len(p.poor_visibility_periods) - 10} 個時段</div>"
-            
-            html += f"""
-                    <tr style="background-color: {row_bg}; border-bottom: 1px solid #E5E7EB;">
-                    <td valign="top" style="padding: 15px; width: 25%;">
-                        <div style="font-size: 20px; font-weight: 800; color: #7C3AED; margin-bottom: 4px; line-height: 1;">
-                            {p.port_code}
-                        </div>
-                        <div style="font-size: 13px; color: #4B5563; font-weight: 600; margin-bottom: 4px;">
-                            {p.port_name}
-                        </div>
-                        <div style="font-size: 12px; color: #6B7280; margin-bottom: 8px;">
-                            📍 {p.country}
-                        </div>
-                        <div>
-                            <span style="background-color: #F3E8FF; color: #7C3AED; font-size: 11px; font-weight: 700; padding: 3px 6px; border-radius: 3px; display: inline-block;">
-                                🌫️ 能見度不良
-                            </span>
-                        </div>
-                    </td>
-
-                    <td valign="top" style="padding: 15px; width: 30%;">
-                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                            <tr>
-                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">👁️</td>
-                                <td valign="top">
-                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">最低能見度 Min Vis</span>
-                                    <span style="color: #7C3AED; font-size: 16px; font-weight: 700;">
-                                        {p.min_visibility / 1000:.2f} <span style="font-size: 12px; font-weight: 500;">km</span>
-                                    </span>
-                                    <span style="font-size: 11px; color: #7C3AED; margin-left: 6px; font-weight: 600;">
-                                        ({p.min_visibility / 1852:.2f} NM)
-                                    </span>
-                                </td>
-                            </tr>
-                        </table>
-                        <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                            <tr>
-                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">⚠️</td>
-                                <td valign="top">
-                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">危險時段數 Periods</span>
-                                    <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
-                                        {len(p.poor_visibility_periods)} <span style="font-size: 12px; font-weight: 500;">個</span>
-                                    </span>
-                                </td>
-                            </tr>
-                        </table>
-                        <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                            <tr>
-                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">⏱️</td>
-                                <td valign="top">
-                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">總危險時數 Total Hrs</span>
-                                    <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
-                                        {total_danger_hours:.1f} <span style="font-size: 12px; font-weight: 500;">小時</span>
-                                    </span>
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-
-                    <td valign="top" style="padding: 15px; width: 45%;">
-                        <div style="margin-bottom: 10px;">
-                            <span style="background-color: #FEF2F2; color: #B91C1C; border: 1px solid #FCA5A5; font-size: 11px; font-weight: 600; padding: 4px 8px; border-radius: 4px; display: inline-block; line-height: 1.4;">
-                                🌫️ 能見度 < 1.5 NM | Visibility < 1.5 NM
-                            </span>
-                        </div>
-                        
-                        {vis_periods_html}
-                    </td>
-                </tr>
-            """
-            
-            # 加入能見度趨勢圖
-            if hasattr(p, 'chart_base64_list') and p.chart_base64_list:
-                vis_chart = None
-                for b64 in p.chart_base64_list:
-                    if len(b64) > 0:
-                        vis_chart = b64
-                        break
-                
-                if vis_chart:
-                    b64_clean = vis_chart.replace('\n', '').replace('\r', '').replace(' ', '')
-                    html += f"""
-                <tr>
-                    <td colspan="3" style="padding: 15px; background-color: {row_bg}; border-bottom: 1px solid #eee;">
-                        <div style="font-size: 13px; color: #666; margin-bottom: 8px; font-weight: 600;">
-                            📈 48小時能見度趨勢圖 48-Hour Visibility Forecast Chart:
-                        </div>
-                        <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
-                            <tr>
-                                <td align="center">
-                                    <img src="data:image/png;base64,{b64_clean}" 
-                                        width="750" 
-                                        style="display:block; max-width: 100%; height: auto; border: 1px solid #ddd;" 
-                                        alt="Visibility Chart">
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-                    """
-
-        html += """
-                </table>
-            </td>
-        </tr>
-        """
-
-        # Footer
-        html += f"""
-        <tr>
-            <td bgcolor="#F8F9FA" align="center" style="padding: 40px 25px; border-top: 3px solid #D1D5DB;">
-                <table border="0" cellpadding="0" cellspacing="0" width="600">
-                    <tr>
-                        <td align="center" style="padding-bottom: 8px;">
-                            <font size="5" color="#1F2937" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                <strong>萬海航運股份有限公司</strong>
-                            </font>
-                        </td>
-                    </tr>
-                    <tr>
-                        <td align="center" style="padding-bottom: 20px;">
-                            <font size="3" color="#4B5563" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                <strong>WAN HAI LINES LTD.</strong>
-                            </font>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td align="center" style="padding-bottom: 20px;">
-                            <table border="0" cellpadding="0" cellspacing="0" width="120">
                                 <tr>
-                                    <td style="border-top: 2px solid #9CA3AF;"></td>
+                                    <td style="padding-bottom: 12px;">
+                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                            <tr>
+                                                <td width="20" valign="top" style="font-size: 14px;">🐢</td>
+                                                <td>
+                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">保持安全速度 (Safe Speed)：</strong>
+                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">依 COLREG Rule 19 規定，在能見度受限時必須以安全速度行駛，確保能在適當距離內停船。</span>
+                                                    <br>
+                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Proceed at a safe speed as per COLREG Rule 19. Ensure the vessel can take proper action to avoid collision and stop within appropriate distance.</span>
+                                                </td>
+                                            </tr>
+                                        </table>
+                                    </td>
                                 </tr>
-                            </table>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td align="center" style="padding-bottom: 25px;">
-                            <font size="2" color="#374151" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                <strong>Marine Technology Division | Fleet Risk Management Dept.</strong>
-                            </font>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td>
-                            <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FEF3C7">
+
                                 <tr>
-                                    <td style="padding: 18px 20px; border-left: 4px solid #F59E0B; border-radius: 4px;">
-                                        <table border="0" cellpadding="0" cellspacing="0">
+                                    <td style="padding-bottom: 12px;">
+                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                             <tr>
-                                                <td style="padding-bottom: 8px;">
-                                                    <font size="2" color="#78350F" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                                        <strong>⚠️ 免責聲明 Disclaimer</strong>
-                                                    </font>
+                                                <td width="20" valign="top" style="font-size: 14px;">📡</td>
+                                                <td>
+                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">雙雷達運作 (Dual Radar Operation)：</strong>
+                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">開啟第二部雷達（尤其是 S-Band），配合 AIS 快速識別目標船名、航向、船速，以便及時採取有效避讓行動。</span>
+                                                    <br>
+                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Switch on another radar (especially S-band) to easily locate small targets. Use AIS to promptly identify target ship's name, course, and speed for effective collision avoidance.</span>
                                                 </td>
                                             </tr>
+                                        </table>
+                                    </td>
+                                </tr>
+
+                                <tr>
+                                    <td style="padding-bottom: 12px;">
+                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
                                             <tr>
+                                                <td width="20" valign="top" style="font-size: 14px;">🔄</td>
                                                 <td>
-                                                    <font size="2" color="#92400E" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                                        本信件內容僅供參考，船長仍應依據實際天候狀況、雷達觀測與專業判斷採取適當措施。能見度不良時務必遵守 COLREG Rule 19 相關規定。
-                                                        <br>
-                                                        <span style="color: #B45309;">This report is for reference only. Captains should take appropriate actions based on actual weather conditions, radar observations, and professional judgment. Comply with COLREG Rule 19 in restricted visibility.</span>
-                                                    </font>
+                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">避免小角度轉向 (Avoid Small Alterations)：</strong>
+                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">採取<span style="background-color: #FEF3C7; padding: 2px 6px; border-radius: 3px; font-weight: bold;">明顯且足夠大的轉向角度</span>，避免連續小角度轉向導致對方船舶無法察覺。</span>
+                                                    <br>
+                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Take substantial and obvious alterations of course. Avoid a succession of small alterations which may not be detected by other vessels.</span>
                                                 </td>
                                             </tr>
                                         </table>
                                     </td>
                                 </tr>
-                            </table>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td align="center" style="padding-top: 25px;">
-                            <font size="1" color="#9CA3AF" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                &copy; {now_str_TPE[:4]} Wan Hai Lines Ltd. All Rights Reserved.
-                            </font>
+
+                                <tr>
+                                    <td style="padding-bottom: 12px;">
+                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                            <tr>
+                                                <td width="20" valign="top" style="font-size: 14px;">📢</td>
+                                                <td>
+                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">鳴放霧號 (Sound Signals)：</strong>
+                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">依規定鳴放霧號，提醒周圍船舶注意；必要時使用 VHF 與附近船舶溝通確認動態。</span>
+                                                    <br>
+                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Sound appropriate fog signals as required. Use VHF to communicate with nearby vessels when necessary to confirm intentions.</span>
+                                                </td>
+                                            </tr>
+                                        </table>
+                                    </td>
+                                </tr>
+
+                                <tr>
+                                    <td>
+                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                                            <tr>
+                                                <td width="20" valign="top" style="font-size: 14px;">⚓</td>
+                                                <td>
+                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">考慮延遲進港或錨泊候泊 (Consider Delay or Anchoring)：</strong>
+                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">若能見度極差（< 500m），考慮在安全水域錨泊候泊或延遲進港，直到能見度改善。</span>
+                                                    <br>
+                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">If visibility is extremely poor (< 500m), consider anchoring in safe waters or delaying port entry until visibility improves.</span>
+                                                </td>
+                                            </tr>
+                                        </table>
+                                    </td>
+                                </tr>
+                            </table>
                         </td>
                     </tr>
                 </table>
             </td>
         </tr>
-        </table>
-        </center>
-    </body>
-    </html>
+
+        <tr>
+            <td style="padding: 0 25px 25px 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                    <tr>
+                        <td style="padding-top: 20px; padding-bottom: 20px; border-top: 3px dashed #D1D5DB; text-align: center;">
+                            <strong style="font-size: 16px; color: #374151;">⬇️ 以下為各港詳細能見度預報資料 ⬇️</strong>
+                            <br>
+                            <span style="font-size: 12px; color: #9CA3AF; letter-spacing: 0.5px;">DETAILED VISIBILITY FORECAST FOR EACH PORT</span>
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+        """.replace("{font_style}", _FONT_STYLE)
+
+# ✅ 能見度報告：詳細港口資料表格的標題與表頭（純靜態內容）
+_VIS_DETAIL_HEADER_HTML = """
+        <tr>
+            <td style="padding: 0 25px;">
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-bottom: 10px;">
+                    <tr>
+                        <td style="background-color: #7C3AED; color: white; padding: 10px 15px; font-weight: bold; font-size: 15px;">
+                            🌫️ 能見度不良港口詳情 POOR VISIBILITY PORT DETAILS
+                        </td>
+                    </tr>
+                    <tr>
+                        <td style="font-size: 11px; color: #666; padding: 5px 0 8px 0;">
+                            條件 Criteria: 能見度 Visibility < 1.5 NM (2.778 km)
+                        </td>
+                    </tr>
+                </table>
+                
+                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 1px solid #E5E7EB; margin-bottom: 30px;">
+                    <tr style="background-color: #F3E8FF; font-size: 12px; color: #666;">
+                        <th align="left" style="padding: 10px; border-bottom: 2px solid #7C3AED; width: 18%; font-weight: 600;">港口資訊<br>Port Info</th>
+                        <th align="left" style="padding: 10px; border-bottom: 2px solid #7C3AED; width: 25%; font-weight: 600;">能見度統計<br>Visibility Stats</th>
+                        <th align="left" style="padding: 10px; border-bottom: 2px solid #7C3AED; width: 57%; font-weight: 600;">能見度不良危險時段<br>Poor Visibility Danger Periods</th>
+                    </tr>
         """
+
+
+# ================= 主服務類別 =================
+
+class WeatherMonitorService:
+    """氣象監控服務（✅ 新增能見度獨立分析與報告）"""
+    
+    def __init__(self, username: str, password: str,
+                 teams_webhook_url: str = '',
+                 excel_path: str = EXCEL_FILE_PATH):
+        
+        print("🔧 正在初始化氣象監控服務...")
+        self.crawler = PortWeatherCrawler(username, password, excel_path, auto_login=False)
+        self.analyzer = WeatherRiskAnalyzer()
+        self.notifier = TeamsNotifier(teams_webhook_url)
+        self.db = WeatherDatabase()
+        self.email_notifier = GmailRelayNotifier()
+        self.chart_generator = ChartGenerator()
+        
+        print(f"✅ 系統初始化完成,共載入 {len(self.crawler.port_list)} 個港口")
+    
+    def run_daily_monitoring(self) -> Dict[str, Any]:
+        """執行每日監控（✅ 新增能見度獨立處理）"""
+        run_utc = datetime.now(timezone.utc)  # ✅ 本輪執行時間，報告共用
+        run_ts = datetime.now().isoformat()  # ✅ 三份 JSON 報告共用的 timestamp
+        
+        print("=" * 80)
+        print(f"🚀 開始執行每日氣象監控 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("=" * 80)
+        
+        # ✅ 1. 下載 48h 和 7d 資料
+        print("\n📡 步驟 1: 下載所有港口氣象資料 (48h + 7d)...")
+        download_stats = self.crawler.fetch_all_ports_both()
+        
+        # 2. 分析風險（不包含純低溫與能見度港口）
+        print("\n🔍 步驟 2: 分析港口風險（低溫與能見度單獨處理）...")
+        risk_assessments = self._analyze_all_ports()
+        
+        # ✅ 3. 分析低溫港口（獨立分析，不計入主報告）
+        print("\n❄️ 步驟 3: 分析低溫港口...")
+        temp_assessments = self._analyze_temperature_ports()
+        
+        # ✅ 4. 分析能見度不良港口（獨立分析，不計入主報告）
+        print("\n🌫️ 步驟 4: 分析能見度不良港口...")
+        visibility_assessments = self._analyze_visibility_ports()
+        
+        # 5. 生成圖表
+        print(f"\n📈 步驟 5: 生成氣象趨勢圖...")
+        self._generate_charts(risk_assessments)
+        charts_generated = sum(1 for r in risk_assessments if r.chart_png_list)
+        print(f"   ✅ 成功為 {charts_generated}/{len(risk_assessments)} 個港口生成圖表")
+        
+        # 6. 為低溫港口生成溫度圖
+        if temp_assessments:
+            print(f"\n❄️ 步驟 6: 為 {len(temp_assessments)} 個低溫港口生成溫度圖...")
+            for assessment in temp_assessments:
+                png_temp = self.chart_generator.generate_temperature_chart(
+                    assessment, assessment.port_code
+                )
+                if png_temp:
+                    assessment.chart_png_list.append(png_temp)
+                    print(f"      ✅ {assessment.port_code} 溫度圖已生成")
+
+        # ✅ 6.5. 為能見度不良港口生成能見度圖
+        if visibility_assessments:
+            print(f"\n🌫️ 步驟 6.5: 為 {len(visibility_assessments)} 個能見度不良港口生成能見度圖（48h）...")
+            for assessment in visibility_assessments:
+                png_vis = self.chart_generator.generate_visibility_chart(
+                    assessment, assessment.port_code
+                )
+                if png_vis:
+                    assessment.chart_png_list.append(png_vis)
+            print(f"      ✅ {assessment.port_code} 能見度圖已生成")
+        
+        # 7. 發送 Teams 通知（✅ 背景執行緒送出，同時預先登入 SMTP 並產生報告）
+        teams_sent = False
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            teams_future = None
+            if self.notifier.webhook_url:
+                print("\n📢 步驟 7: 發送 Teams 通知（背景執行）...")
+                teams_future = executor.submit(self.notifier.send_risk_alert, risk_assessments)
+            else:
+                print("\n⚠️ 步驟 7: 跳過 Teams 通知 (未設定 Webhook)")
+            executor.submit(self.email_notifier.connect)
+            
+            # 報告內容不依賴 Teams 結果，先行產生
+            report_html = self._generate_html_report(risk_assessments, run_utc)
+            report_images = _chart_images(risk_assessments, 'chart')
+            
+            # ✅ 低溫 / 能見度報告各自攔截例外：任一份產生失敗只略過該封信，不影響主要報告
+            temp_report_data = temp_report_html = temp_images = None
+            if temp_assessments:
+                try:
+                    temp_report_data = self._generate_temperature_report_data(temp_assessments, run_ts)
+                    temp_report_html = self._generate_temperature_html_report(temp_assessments)
+                    temp_images = _chart_images(temp_assessments, 'temp')
+                except Exception as e:
+                    temp_report_html = None
+                    logger.warning(f"⚠️ 低溫報告產生過程發生異常: {e}", exc_info=DEBUG)
+            
+            vis_report_data = vis_report_html = vis_images = None
+            if visibility_assessments:
+                try:
+                    vis_report_data = self._generate_visibility_report_data(visibility_assessments, run_ts)
+                    vis_report_html = self._generate_visibility_html_report(visibility_assessments)
+                    vis_images = _chart_images(visibility_assessments, 'vis')
+                except Exception as e:
+                    vis_report_html = None
+                    logger.warning(f"⚠️ 能見度報告產生過程發生異常: {e}", exc_info=DEBUG)
+            
+            if teams_future is not None:
+                try:
+                    teams_sent = teams_future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Teams 通知過程發生異常: {e}", exc_info=DEBUG)
+        
+        # 8. 生成報告（主要報告 JSON 需包含 Teams 發送結果）
+        print("\n📊 步驟 8: 生成數據報告...")
+        report_data = self._generate_data_report(download_stats, risk_assessments, teams_sent, run_ts)
+        
+        # 9. 發送主要氣象報告 Email（三封信共用同一條 SMTP 連線，依序送出）
+        print("\n📧 步驟 9: 發送主要氣象報告 Email...")
+        
+        email_sent = False
+        try:
+            email_sent = self.email_notifier.send_trigger_email(
+                report_data, report_html, report_images
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ 主要報告發信過程發生異常: {e}", exc_info=DEBUG)
+        
+        # ✅ 10. 發送低溫警報 Email
+        print("\n❄️ 步驟 10: 檢查是否需要發送低溫警報...")
+        
+        temp_email_sent = False
+        if temp_assessments and temp_report_html is None:
+            print("   ⚠️ 低溫報告產生失敗,跳過低溫警報發送")
+        elif temp_assessments:
+            print(f"   🔍 發現 {len(temp_assessments)} 個港口有低溫警告,準備發送專用報告...")
+            try:
+                temp_email_sent = self.email_notifier.send_temperature_alert(
+                    temp_report_data, temp_report_html, temp_images
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 低溫警報發信過程發生異常: {e}", exc_info=DEBUG)
+        else:
+            print("   ✅ 無低溫警告港口,跳過低溫警報發送")
+        
+        # ✅ 11. 發送能見度警報 Email
+        print("\n🌫️ 步驟 11: 檢查是否需要發送能見度警報...")
+        
+        vis_email_sent = False
+        if visibility_assessments and vis_report_html is None:
+            print("   ⚠️ 能見度報告產生失敗,跳過能見度警報發送")
+        elif visibility_assessments:
+            print(f"   🔍 發現 {len(visibility_assessments)} 個港口有能見度警告,準備發送專用報告...")
+            try:
+                vis_email_sent = self.email_notifier.send_visibility_alert(
+                    vis_report_data, vis_report_html, vis_images
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 能見度警報發信過程發生異常: {e}", exc_info=DEBUG)
+        else:
+            print("   ✅ 無能見度警告港口,跳過能見度警報發送")
+        
+        # ✅ 所有信件寄完後才關閉共用的 SMTP 連線
+        self.email_notifier.close()
+        
+        report_data['email_sent'] = email_sent
+        report_data['teams_sent'] = teams_sent
+        report_data['temp_email_sent'] = temp_email_sent
+        report_data['temp_ports_count'] = len(temp_assessments)
+        report_data['vis_email_sent'] = vis_email_sent  # ✅ 新增
+        report_data['vis_ports_count'] = len(visibility_assessments)  # ✅ 新增
+        
+        print("\n" + "=" * 80)
+        print("✅ 每日監控執行完成")
+        print(f"   - 風險港口（不含低溫/能見度）: {len(risk_assessments)}")
+        print(f"   - 低溫港口（獨立報告）: {len(temp_assessments)}")
+        print(f"   - 能見度不良港口（獨立報告）: {len(visibility_assessments)}")  # ✅ 新增
+        print(f"   - Teams 通知: {'✅' if teams_sent else '❌'}")
+        print(f"   - 主要報告 Email: {'✅' if email_sent else '❌'}")
+        print(f"   - 低溫警報 Email: {'✅' if temp_email_sent else '❌'}")
+        print(f"   - 能見度警報 Email: {'✅' if vis_email_sent else '❌'}")  # ✅ 新增
+        print("=" * 80)
+        
+        return report_data
+
+    def close(self) -> None:
+        """✅ 主動釋放資源（SMTP 連線、Teams Session、殘留的 matplotlib 圖表）"""
+        self.email_notifier.close()
+        self.notifier.session.close()
+        plt.close('all')
+
+    def _analyze_temperature_ports(self) -> List[RiskAssessment]:
+            """✅ 專門分析低溫港口（獨立於主風險分析）- 修正強健版"""
+            temp_assessments = []
+            total = len(self.crawler.port_list)
+            
+            print(f"   🔍 開始分析 {total} 個港口的溫度資料 (修正版)...")
+            
+            for i, port_code in enumerate(self.crawler.port_list, 1):
+                try:
+                    # 1. 取得資料來源 (7d 與 48h)
+                    data_7d = self.db.get_latest_content_7d(port_code)
+                    data_48h = self.db.get_latest_content(port_code)
+                    
+                    info = self.crawler.get_port_info(port_code)
+                    if not info:
+                        continue
+
+                    # 定義內部函式來處理天氣記錄，方便重複使用
+                    def process_weather_records(content, is_7d_source):
+                        parser = WeatherParser()
+                        try:
+                            if is_7d_source:
+                                p_name, _, w_records, _ = parser.parse_content_7d(content)
+                            else:
+                                p_name, _, w_records, _ = parser.parse_content_48h(content)
+                            return p_name, w_records
+                        except Exception as e:
+                            print(f"      ⚠️ 解析失敗 ({'7D' if is_7d_source else '48H'}): {e}")
+                            return None, []
+
+                    # 2. 嘗試解析與過濾溫度 (優先 7d -> 失敗則轉 48h)
+                    valid_temp_records = []
+                    weather_records = []
+                    port_name = info.get('port_name', port_code)
+                    issued_time = ""
+                    used_source = ""
+
+                    # --- 嘗試 7D ---
+                    if data_7d:
+                        content_7d, issued_7d, name_7d = data_7d
+                        p_name_7d, records_7d = process_weather_records(content_7d, True)
+                        
+                        if records_7d:
+                            # 檢查 7D 資料是否有有效溫度
+                            temp_valid_7d = []
+                            for r in records_7d:
+                                try:
+                                    # 🔥 修正：強制轉型 float，避免字串型態導致漏抓
+                                    t_val = float(r.temperature)
+                                    if -60 < t_val < 60: # 合理溫度範圍
+                                        # 為了避免汙染原始資料，這裡僅用於判斷
+                                        r.temperature = t_val 
+                                        temp_valid_7d.append(r)
+                                except (ValueError, TypeError):
+                                    continue
+                            
+                            if temp_valid_7d:
+                                valid_temp_records = temp_valid_7d
+                                weather_records = records_7d
+                                port_name = info.get('port_name', p_name_7d)
+                                issued_time = issued_7d
+                                used_source = "7D"
+
+                    # --- 如果 7D 無效或沒抓到溫度，嘗試 48H ---
+                    if not valid_temp_records and data_48h:
+                        content_48h, issued_48h, name_48h = data_48h
+                        p_name_48h, records_48h = process_weather_records(content_48h, False)
+                        
+                        if records_48h:
+                            temp_valid_48h = []
+                            for r in records_48h:
+                                try:
+                                    t_val = float(r.temperature)
+                                    if -60 < t_val < 60:
+                                        r.temperature = t_val
+                                        temp_valid_48h.append(r)
+                                except (ValueError, TypeError):
+                                    continue
+                            
+                            if temp_valid_48h:
+                                valid_temp_records = temp_valid_48h
+                                weather_records = records_48h
+                                port_name = info.get('port_name', p_name_48h)
+                                issued_time = issued_48h
+                                used_source = "48H"
+                                print(f"   [{i}/{total}] ⚠️ {port_code}: 7D 無有效溫度，改用 48H 資料")
+
+                    # 3. 最終檢查
+                    if not valid_temp_records:
+                        print(f"   [{i}/{total}] ⚠️ {port_code}: 無任何有效溫度資料")
+                        continue
+                    
+                    # 4. 找出最低溫
+                    min_temp_record = min(valid_temp_records, key=lambda r: r.temperature)
+                    
+                    # 🔥 修正：使用 <= 0，包含 0 度結冰點
+                    if min_temp_record.temperature <= RISK_THRESHOLDS['temp_freezing']:
+                        
+                        # 計算 LCT 時區偏移
+                        try:
+                            lct_offset_hours = int(min_temp_record.lct_time.utcoffset().total_seconds() / 3600)
+                        except:
+                            lct_offset_hours = 0
+                        
+                        # 建立評估報告
+                        assessment = RiskAssessment(
+                            port_code=port_code,
+                            port_name=port_name,
+                            country=info.get('country', 'N/A'),
+                            risk_level=0, # 低溫不計入風險等級
+                            risk_factors=[f"低溫 {min_temp_record.temperature:.1f}°C"],
+                            
+                            # 填入必填欄位 (Dummy values)
+                            max_wind_kts=0, max_wind_bft=0, max_gust_kts=0, max_gust_bft=0, max_wave=0,
+                            max_wind_time_utc="", max_wind_time_lct="", max_gust_time_utc="", max_gust_time_lct="", max_wave_time_utc="", max_wave_time_lct="",
+                            
+                            # 重要：溫度資料
+                            min_temperature=min_temp_record.temperature,
+                            min_temp_time_utc=f"{min_temp_record.time.strftime('%m/%d %H:%M')} (UTC)",
+                            min_temp_time_lct=f"{min_temp_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT+{lct_offset_hours})",
+                            
+                            risk_periods=[],
+                            issued_time=issued_time,
+                            latitude=info.get('latitude', 0.0),
+                            longitude=info.get('longitude', 0.0),
+                            weather_records=weather_records # 保留供繪圖
+                        )
+                        
+                        temp_assessments.append(assessment)
+                        print(f"   [{i}/{total}] ❄️ {port_code}: 發現低溫 {min_temp_record.temperature:.1f}°C (來源: {used_source})")
+                    else:
+                        print(f"   [{i}/{total}] ✅ {port_code}: 最低溫 {min_temp_record.temperature:.1f}°C (安全)")
+                        
+                except Exception as e:
+                    logger.error(f"   [{i}/{total}] ❌ {port_code}: 分析過程錯誤 - {e}", exc_info=DEBUG)
+            
+            print(f"\n✅ 低溫分析完成：共找到 {len(temp_assessments)} 個低溫港口")
+            return temp_assessments
+
+
+
+    def _analyze_visibility_ports(self) -> List[RiskAssessment]:
+
+            """✅ 專門分析能見度不良港口（改用 48h 資料）"""
+            vis_assessments = []
+            total = len(self.crawler.port_list)    
+
+            for i, port_code in enumerate(self.crawler.port_list, 1):
+                try:
+                    # ✅ 改用 48h 資料
+                    data_48h = self.db.get_latest_content(port_code)
+                    if not data_48h:
+                        continue            
+                    content_48h, issued_48h, name_48h = data_48h              
+                    info = self.crawler.get_port_info(port_code)
+                    if not info:
+                        continue
+                    # ✅ 修正：正確呼叫 48h 解析函式
+                    parser = WeatherParser()
+                    port_name_48h, wind_records_48h, weather_records_48h, warnings_48h = parser.parse_content_48h(content_48h)
+                    if not weather_records_48h:
+                        print(f"   [{i}/{total}] ⚠️ {port_code}: 無天氣記錄")
+                        continue
+                    # 過濾有效的能見度記錄
+                    valid_vis_records = []
+                    for r in weather_records_48h:
+                        vis_m = r.visibility_meters
+                        if vis_m is not None and isinstance(vis_m, (int, float)) and vis_m > 0:
+                            valid_vis_records.append(r)     
+                    if not valid_vis_records:
+                        print(f"   [{i}/{total}] ⚠️ {port_code}: 無有效能見度資料")
+                        continue
+                    
+                    # 找出最低能見度
+                    min_vis_record = min(valid_vis_records, key=lambda r: r.visibility_meters)
+                    print(f"   [{i}/{total}] 🔍 {port_code}: 檢查能見度 {min_vis_record.visibility_meters / 1000:.2f} km (閾值: {RISK_THRESHOLDS['visibility_poor'] / 1000:.2f} km)")
+                    # 檢查是否低於閾值
+                    if min_vis_record.visibility_meters < RISK_THRESHOLDS['visibility_poor']:
+                        # 找出所有能見度不良時段
+                        poor_vis_periods = []
+                        in_poor_vis = False
+                        period_start = None
+                        period_min_vis = float('inf')                   
+
+                        for r in valid_vis_records:
+                            if r.visibility_meters < RISK_THRESHOLDS['visibility_poor']:
+                                if not in_poor_vis:
+                                    # 開始新時段
+                                    period_start = r
+                                    period_min_vis = r.visibility_meters
+                                    in_poor_vis = True
+                                else:
+                                    # 更新最低能見度
+                                    period_min_vis = min(period_min_vis, r.visibility_meters)
+                            else:
+                                if in_poor_vis:
+                                    # 結束時段
+                                    prev_record = valid_vis_records[valid_vis_records.index(r) - 1]
+                                    poor_vis_periods.append({
+                                        'start_utc': period_start.time.strftime('%Y-%m-%d %H:%M'),
+                                        'end_utc': prev_record.time.strftime('%Y-%m-%d %H:%M'),
+                                        'start_lct': period_start.lct_time.strftime('%Y-%m-%d %H:%M'),
+                                        'end_lct': prev_record.lct_time.strftime('%Y-%m-%d %H:%M'),
+                                        'min_visibility_m': period_min_vis,
+                                        'min_visibility_km': period_min_vis / 1000
+                                    })
+
+                                    in_poor_vis = False
+                        # 如果最後還在能見度不良狀態
+                        if in_poor_vis:
+                            poor_vis_periods.append({
+                                'start_utc': period_start.time.strftime('%Y-%m-%d %H:%M'),
+                                'end_utc': valid_vis_records[-1].time.strftime('%Y-%m-%d %H:%M'),
+                                'start_lct': period_start.lct_time.strftime('%Y-%m-%d %H:%M'),
+                                'end_lct': valid_vis_records[-1].lct_time.strftime('%Y-%m-%d %H:%M'),
+                                'min_visibility_m': period_min_vis,
+                                'min_visibility_km': period_min_vis / 1000
+                            })
+                        # 建立能見度評估
+                        assessment = RiskAssessment(
+                            port_code=port_code,
+                            port_name=info.get('port_name', port_name_48h),
+                            country=info.get('country', 'N/A'),
+                            risk_level=0,
+                            risk_factors=[f"能見度不良 {min_vis_record.visibility_meters / 1000:.2f} km"],                      
+                            max_wind_kts=0,
+                            max_wind_bft=0,
+                            max_gust_kts=0,
+                            max_gust_bft=0,
+                            max_wave=0,                       
+                            max_wind_time_utc="",
+                            max_wind_time_lct="",
+                            max_gust_time_utc="",
+                            max_gust_time_lct="",
+                            max_wave_time_utc="",
+                            max_wave_time_lct="",                        
+
+                            min_visibility=min_vis_record.visibility_meters,
+                            min_visibility_time_utc=f"{min_vis_record.time.strftime('%m/%d %H:%M')} (UTC)",
+                            min_visibility_time_lct=f"{min_vis_record.lct_time.strftime('%Y-%m-%d %H:%M')} (LT)",
+                            poor_visibility_periods=poor_vis_periods,
+                            
+                            risk_periods=[],
+                            issued_time=issued_48h,
+                            latitude=info.get('latitude', 0.0),
+                            longitude=info.get('longitude', 0.0),
+                            weather_records=weather_records_48h  # ✅ 使用 48h 資料
+                        )
+                        vis_assessments.append(assessment)
+
+                        print(f"   [{i}/{total}] 🌫️ {port_code}: 能見度不良 {min_vis_record.visibility_meters / 1000:.2f} km ({len(poor_vis_periods)} 個時段)")
+                except Exception as e:
+
+                    logger.error(f"   [{i}/{total}] ❌ {port_code}: {e}", exc_info=DEBUG)
+
         
-        return html
 
+            print(f"\n✅ 能見度分析完成：共找到 {len(vis_assessments)} 個能見度不良港口")
 
-    def _generate_temperature_html_report(self, temp_assessments: List[RiskAssessment]) -> str:
-        """✅ 生成低溫警報專用 HTML 報告（統一風格版）"""
+            return vis_assessments
+
+
+
+    def _analyze_all_ports(self) -> List[RiskAssessment]:
+        """✅ 分析所有港口（風浪用 48h, 天氣用 7d）- 能見度不計入主報告
+        
+        資料庫讀取在主程序依序完成，解析與風險分析交由多程序平行處理。
+        """
+        assessments = []
+        total = len(self.crawler.port_list)
         
-        def format_time_display(time_str):
-            if not time_str:
-                return "N/A"
+        tasks = []
+        task_ports = []  # 與 tasks 對應的 (序號, 港口代碼)
+        
+        # ✅ 一次查詢取得所有港口的最新 48h / 7d 內容
+        contents_48h = self.db.get_latest_content_batch(self.crawler.port_list)
+        contents_7d = self.db.get_latest_content_7d_batch(self.crawler.port_list)
+        
+        for i, port_code in enumerate(self.crawler.port_list, 1):
             try:
-                if '(' in time_str:
-                    return time_str.split('(')[0].strip()
-                return time_str
-            except:
-                return time_str
+                # 取得 48h 風浪資料
+                data_48h = contents_48h.get(port_code)
+                if not data_48h:
+                    logger.warning(f"   [{i}/{total}] ⚠️ {port_code}: 無 48h 資料")
+                    continue
+                
+                content_48h, issued_48h, name_48h = data_48h
+                
+                # ✅ 取得 7d 天氣資料
+                data_7d = contents_7d.get(port_code)
+                if not data_7d:
+                    logger.warning(f"   [{i}/{total}] ⚠️ {port_code}: 無 7d 資料,使用 48h 備用")
+                    # 如果沒有 7d 資料,使用 48h 資料作為備用
+                    content_7d = content_48h
+                    issued_7d = issued_48h
+                else:
+                    content_7d, issued_7d, name_7d = data_7d
+                
+                info = self.crawler.get_port_info(port_code)
+                if not info:
+                    continue
+                
+                tasks.append((port_code, info, content_48h, content_7d, issued_48h))
+                task_ports.append((i, port_code))
+                    
+            except Exception as e:
+                logger.error(f"   [{i}/{total}] ❌ {port_code}: {e}", exc_info=DEBUG)
         
-        def find_first_freezing_time(weather_records):
-            """找出第一次低於 0°C 的時間"""
-            for record in weather_records:
-                if record.temperature < RISK_THRESHOLDS['temp_freezing']:
-                    return record.time
-            return None
+        # ✅ 分析風險（傳入 48h 和 7d 資料，多程序平行處理）
+        results = self._run_port_analysis(tasks)
+        
+        for (i, port_code), res in zip(task_ports, results):
+            if res:
+                assessments.append(res)
+                logger.info(f"   [{i}/{total}] ⚠️ {port_code}: {res.risk_label}")
+            else:
+                logger.debug(f"   [{i}/{total}] ✅ {port_code}: 安全")
         
-        font_style = "font-family: 'Noto Sans TC', 'Microsoft JhengHei UI', 'Microsoft YaHei UI', 'Segoe UI', Arial, sans-serif;"
+        logger.info(f"   ✅ 分析完成：{len(assessments)} 個風險港口 / {len(tasks) - len(assessments)} 個安全港口")
+        
+        assessments.sort(key=lambda x: x.risk_level, reverse=True)
+        return assessments
+    
+    @staticmethod
+    def _run_port_analysis(tasks: List[tuple]) -> List[Optional[RiskAssessment]]:
+        """以 ProcessPoolExecutor 平行分析港口，無法建立程序池時改為依序執行"""
+        if len(tasks) < 2:
+            return [WeatherRiskAnalyzer.analyze_port_task(t) for t in tasks]
         
         try:
-            from zoneinfo import ZoneInfo
-            taipei_tz = ZoneInfo('Asia/Taipei')
-        except ImportError:
-            taipei_tz = timezone(timedelta(hours=8))
+            workers = min(os.cpu_count() or 1, len(tasks))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(WeatherRiskAnalyzer.analyze_port_task, tasks, chunksize=4))
+        except Exception as e:
+            logger.warning(f"   ⚠️ 多程序分析失敗，改為依序分析: {e}")
+            return [WeatherRiskAnalyzer.analyze_port_task(t) for t in tasks]
+    
+    def _generate_charts(self, assessments: List[RiskAssessment]):
+        """✅ 生成風浪圖表（不包含溫度圖）"""
         
-        utc_now = datetime.now(timezone.utc)
-        tpe_now = utc_now.astimezone(taipei_tz)
+        if not assessments:
+            logger.info("   ⚠️ 沒有風險港口需要生成圖表")
+            return
+        
+        chart_targets = assessments[:20]
+        
+        logger.info(f"   📊 準備為 {len(chart_targets)} 個港口生成風浪圖表（多程序）...")
+        
+        try:
+            workers = min(os.cpu_count() or 1, len(chart_targets))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                jobs = [_ChartJob.from_assessment(a) for a in chart_targets]
+                results = list(executor.map(_worker_gen_charts, jobs))
+        except Exception as e:
+            logger.warning(f"   ⚠️ 多程序繪圖失敗，改為依序繪圖: {e}")
+            results = [_gen_port_charts(self.chart_generator, a) for a in chart_targets]
+        
+        success_count = 0
+        for i, (assessment, charts) in enumerate(zip(chart_targets, results), 1):
+            if charts:
+                assessment.chart_png_list.extend(charts)
+                success_count += 1
+                logger.info(f"   [{i}/{len(chart_targets)}] ✅ {assessment.port_code}: {len(charts)} 張圖表")
+            else:
+                logger.warning(f"   [{i}/{len(chart_targets)}] ❌ {assessment.port_code}: 圖表生成失敗")
         
-        now_str_TPE = f"{tpe_now.strftime('%Y-%m-%d %H:%M')} (TPE)"
-        now_str_UTC = f"{utc_now.strftime('%Y-%m-%d %H:%M')} (UTC)"
+        logger.info(f"   ✅ 風浪圖表生成完成：{success_count}/{len(chart_targets)} 個港口成功")
 
-        # 如果沒有低溫港口
-        if not temp_assessments:
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            </head>
-            <body style="margin: 0; padding: 20px; background-color: #F0F4F8; {font_style}">
-                <div style="max-width: 900px; margin: 0 auto; background-color: #E8F5E9; padding: 40px; border-left: 8px solid #4CAF50; border-radius: 4px; text-align: center;">
-                    <div style="font-size: 48px; margin-bottom: 15px;">✅</div>
-                    <h2 style="margin: 0 0 10px 0; font-size: 28px; color: #2E7D32;">
-                        所有港口溫度正常 All Ports Have Normal Temperature
-                    </h2>
-                    <p style="margin: 0; font-size: 18px; color: #1B5E20; line-height: 1.8;">
-                        未來 7 天內所有港口氣溫均在安全範圍<br>
-                        All ports have temperature within safe limits for the next 7 days.
-                    </p>
-                    <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid #A5D6A7; font-size: 13px; color: #558B2F;">
-                        📅 最後更新時間 Last Updated: {now_str_TPE} / {now_str_UTC}
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+        
+    def _generate_data_report(self, stats, assessments, teams_sent, timestamp: Optional[str] = None):
+        """生成 JSON 報告（timestamp 未提供時取當下時間）"""
+        # ✅ 單次走訪：同時統計各等級數量並轉換 dict
+        danger = warning = caution = 0
+        dicts = []
+        for a in assessments:
+            if a.risk_level == 3:
+                danger += 1
+            elif a.risk_level == 2:
+                warning += 1
+            elif a.risk_level == 1:
+                caution += 1
+            dicts.append(a.to_dict())
+        
+        return {
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "summary": {
+                "total_ports_checked": len(self.crawler.port_list),
+                "risk_ports_found": len(assessments),
+                "danger_count": danger,
+                "warning_count": warning,
+                "caution_count": caution,
+            },
+            "download_stats": stats,
+            "risk_assessments": dicts,
+            "notifications": {
+                "teams_sent": teams_sent
+            }
+        }
+    
+    def _generate_temperature_report_data(self, temp_assessments: List[RiskAssessment],
+                                          timestamp: Optional[str] = None) -> dict:
+        """生成低溫警報專用 JSON 報告（timestamp 未提供時取當下時間）"""
+        return {
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "alert_type": "LOW_TEMPERATURE",
+            "summary": {
+                "total_ports_with_freezing": len(temp_assessments),
+                "min_temperature": min(a.min_temperature for a in temp_assessments),
+            },
+            "freezing_ports": [
+                {
+                    "port_code": a.port_code,
+                    "port_name": a.port_name,
+                    "country": a.country,
+                    "min_temperature": a.min_temperature,
+                    "min_temp_time_utc": a.min_temp_time_utc,
+                    "min_temp_time_lct": a.min_temp_time_lct,
+                } for a in temp_assessments
+            ]
+        }
 
-        html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    </head>
-    <body bgcolor="#F0F4F8" style="margin: 0; padding: 0; {font_style}">
-        <center>
-        <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#ffffff" style="max-width: 900px; margin: 20px auto;">
-        <tr>
-            <td style="padding: 0 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                    <tr>
-                        <td bgcolor="#991B1B" style="padding: 8px 20px;">
-                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                <tr>
-                                    <td align="left" style="font-size: 13px; color: #FEE2E2; font-weight: bold;">
-                                        📅 最後更新時間 Last Updated:
-                                    </td>
-                                    <td align="right" style="font-size: 13px; color: #ffffff; font-weight: bold;">
-                                        {now_str_TPE} | {now_str_UTC}
-                                    </td>
-                                </tr>
-                            </table>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
+    def _generate_visibility_report_data(self, vis_assessments: List[RiskAssessment],
+                                         timestamp: Optional[str] = None) -> dict:
+        """✅ 生成能見度警報專用 JSON 報告（timestamp 未提供時取當下時間）"""
+        return {
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "alert_type": "POOR_VISIBILITY",
+            "summary": {
+                "total_ports_with_poor_visibility": len(vis_assessments),
+                "min_visibility_km": min(a.min_visibility / 1000 for a in vis_assessments),
+            },
+            "poor_visibility_ports": [
+                {
+                    "port_code": a.port_code,
+                    "port_name": a.port_name,
+                    "country": a.country,
+                    "min_visibility_km": a.min_visibility / 1000,
+                    "poor_visibility_periods": a.poor_visibility_periods,
+                } for a in vis_assessments
+            ]
+        }
+
+    def _generate_html_report(self, assessments: List[RiskAssessment],
+                              utc_now: Optional[datetime] = None) -> bytes:
+        """✅ 生成主要氣象風險 HTML 報告（完整版，能見度已移除）
+        
+        回傳 UTF-8 編碼後的 bytes，可直接交給 MIMEText，不需再轉一次。
+        
+        Args:
+            assessments: 風險評估列表
+            utc_now: 本輪執行的 UTC 時間（未提供時取現在時間）
+        """
+        
+        if utc_now is None:
+            utc_now = datetime.now(timezone.utc)
+        tpe_now = utc_now.astimezone(TAIPEI_TZ)
+        
+        now_str_TPE = tpe_now.strftime('%Y-%m-%d %H:%M (TPE)')
+        now_str_UTC = utc_now.strftime('%Y-%m-%d %H:%M (UTC)')
+
+        risk_groups = {3: [], 2: [], 1: []}
+        for a in assessments or ():
+            group = risk_groups.get(a.risk_level)
+            if group is not None:
+                group.append(a)
+
+        # ✅ 沒有任何風險港口時直接回傳預先建好的「全部安全」頁面
+        if not (risk_groups[3] or risk_groups[2] or risk_groups[1]):
+            return _EMPTY_REPORT_HTML.format(now_tpe=now_str_TPE, now_utc=now_str_UTC).encode('utf-8')
+
+        parts = []
+        parts.append(f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body bgcolor="#F0F4F8" style="margin: 0; padding: 0; {_FONT_STYLE}">
+    <center>
+    <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#ffffff" style="max-width: 900px; margin: 20px auto;">
+    <tr>
+        <td style="padding: 0 25px;">
+            <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                <tr>
+                    <td bgcolor="#7F1D1D" style="padding: 8px 20px;">
+                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                            <tr>
+                                <td align="left" style="font-size: 13px; color: #FEE2E2; font-weight: bold;">
+                                    📅 最後更新時間 Last Updated:
+                                </td>
+                                <td align="right" style="font-size: 13px; color: #ffffff; font-weight: bold;">
+                                    {now_str_TPE} | {now_str_UTC}
+                                </td>
+                            </tr>
+                        </table>
+                    </td>
+                </tr>
+            </table>
+        </td>
+    </tr>
+    
+    <tr>
+        <td style="padding: 25px 25px 0 25px;">
+            <table role="presentation" border="0" cellpadding="0" cellspacing="0" width="100%">
+                <tr>
+                    <td bgcolor="#1E3A8A" style="padding: 20px 25px; border-radius: 8px 8px 0 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                        <h2 style="margin: 0; font-size: 24px; font-weight: 700; color: #ffffff; line-height: 1.4; letter-spacing: 0.3px;">
+                            WHL Port Weather Risk Monitor
+                        </h2>
+                        <p style="margin: 8px 0 0 0; font-size: 16px; font-weight: 500; color: #E0E7FF; line-height: 1.3;">
+                            Weather Warning for Next 48 Hours
+                        </p>
+                    </td>
+                </tr>
+            </table>
+        </td>
+    </tr>
+    
+    <tr>
+        <td style="padding: 0 25px;">
+            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 3px solid #1E3A8A; border-top: none;">
+        """)
         
-        <tr>
-            <td style="padding: 25px 25px 0 25px;">
-                <table role="presentation" border="0" cellpadding="0" cellspacing="0" width="100%">
-                    <tr>
-                        <td bgcolor="#DC2626" style="padding: 20px 25px; border-radius: 8px 8px 0 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                            <h2 style="margin: 0; font-size: 24px; font-weight: 700; color: #ffffff; line-height: 1.4; letter-spacing: 0.3px;">
-                                ❄️ WHL Port Low Temperature Alert
-                            </h2>
-                            <p style="margin: 8px 0 0 0; font-size: 16px; font-weight: 500; color: #FEE2E2; line-height: 1.3;">
-                                低溫警報：未來 7 天氣溫低於 0°C (32°F) 之港口預報
-                            </p>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
+        parts.append(''.join(
+            _render_summary_row(risk_groups[level], _LEVEL_META[level])
+            for level in (3, 2, 1) if risk_groups[level]
+        ))
         
-        <tr>
-            <td style="padding: 0 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 3px solid #DC2626; border-top: none;">
-                    <tr>
-                        <td style="padding: 18px 20px; border-bottom: 2px solid #FCA5A5; background-color: #FEF2F2;">
-                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                <tr>
-                                    <td width="240" valign="middle">
-                                        <div style="font-size: 22px; font-weight: bold; color: #DC2626; line-height: 1.2;">
-                                            ❄️ 低溫警報港口
-                                        </div>
-                                        <div style="font-size: 16px; color: #991B1B; margin-top: 2px; font-weight: 600;">
-                                            LOW TEMPERATURE PORTS
-                                        </div>
-                                    </td>
-                                    <td width="120" valign="middle" align="center">
-                                        <div style="background-color: #DC2626; color: #ffffff; font-size: 32px; font-weight: bold; padding: 8px 16px; border-radius: 8px; display: inline-block; min-width: 60px;">
-                                            {len(temp_assessments)}
-                                        </div>
-                                    </td>
-                                    <td style="padding-left: 20px;" valign="middle">
-                                        <div style="font-size: 17px; color: #1F2937; line-height: 1.8; margin-bottom: 8px;">
-                                            {', '.join([f"<strong style='font-size: 17px; color: #DC2626;'>{p.port_code}</strong>" for p in temp_assessments])}
-                                        </div>
-                                        <div style="font-size: 13px; color: #6B7280; line-height: 1.5; font-style: italic;">
-                                            條件 Criteria: 氣溫 Temperature < 0°C (32°F)
-                                        </div>
-                                    </td>
-                                </tr>
-                            </table>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
+        parts.append(_RISK_ACTIONS_HTML)
         
-        <tr>
-            <td style="padding: 0 25px 20px 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#F3F4F6">
-                    <tr>
-                        <td style="padding: 15px 20px; font-size: 13px; color: #6B7280; text-align: center; border: 1px solid #D1D5DB; border-top: none; border-radius: 0 0 8px 8px;">
-                            <strong style="color: #374151;">資料來源: Weathernews Inc. (WNI)</strong><br>
-                            <span style="color: #9CA3AF;">Data Source: Weathernews Inc. (WNI)</span>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
+        # ✅ 港口迴圈內反覆使用的全域名稱先綁成區域變數
+        fmt_time, parse_ts, band_for, esc = format_time_display, _parse_ts, _band_for, _esc
+        row_tpl, metric_tpl = _PORT_ROW_TPL.format, _METRIC_ROW_TPL.format
+        high_style, normal_style = _HIGH_STYLE, _NORMAL_STYLE
         
-        <tr>
-            <td style="padding: 0 25px 25px 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FFFBEB">
-                    <tr>
-                        <td style="padding: 22px 25px; border-left: 5px solid #F59E0B; border-radius: 4px;">
-                            <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                <tr>
-                                    <td style="padding-bottom: 18px; border-bottom: 2px solid #FCD34D;">
-                                        <strong style="font-size: 16px; color: #78350F;">📋 低溫應對措施 (Reference: WRK-00-2412-379)</strong>
-                                    </td>
-                                </tr>
-                                
-                                <tr>
-                                    <td style="padding-top: 15px; padding-bottom: 12px;">
-                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                            <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">🔧</td>
-                                                <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">管路防護 (Pipe Protection)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">排空甲板兩舷淡水管路、救生艇淡水櫃及駕駛台洗窗水，防止凍裂。</span>
-                                                    <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Drain fresh water pipes, lifeboat tanks, and window washing water to prevent bursting.</span>
-                                                </td>
-                                            </tr>
-                                        </table>
-                                    </td>
-                                </tr>
+        # ✅ 詳細港口資料表格（能見度已移除）：每個等級的區塊各自組成字串
+        def render_level(level: int, ports: List[RiskAssessment]) -> str:
+            parts = []  # ✅ 該等級自己的片段，不與其他等級共用
+            
+            # ✅ 等級標題與表頭每個等級只格式化一次
+            parts.append(_DETAIL_LEVEL_HEADER_TPL.format_map(_LEVEL_META[level]))
+            
+            for index, p in enumerate(ports):
+                port_parts = []  # ✅ 單一港口的片段先收在小 list，迴圈尾端一次併入 parts
+                row_bg = "#FFFFFF" if index % 2 == 0 else "#FAFBFC"
+                
+                wind_style = high_style if p.max_wind_kts >= 28 else normal_style
+                gust_style = high_style if p.max_gust_kts >= 34 else normal_style
+                wave_style = high_style if p.max_wave >= 3.5 else normal_style
+                
+                meta = p.level_meta
+                wind_level_text, wind_level_color = band_for(p.max_wind_kts, _WIND_BANDS)
+                gust_level_text, gust_level_color = band_for(p.max_gust_kts, _GUST_BANDS)
+                wave_level_text, wave_level_color = band_for(p.max_wave, _WAVE_BANDS)
 
-                                <tr>
-                                    <td style="padding-bottom: 12px;">
-                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                            <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">🧊</td>
-                                                <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">甲板安全 (Deck Safety)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">定期剷除冰雪並撒鹽防滑；備妥除冰工具（鏟子、撬棍、噴燈）。</span>
-                                                    <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Regularly remove ice/snow, apply salt, and keep de-icing tools ready.</span>
-                                                </td>
-                                            </tr>
-                                        </table>
-                                    </td>
-                                </tr>
+                if p.risk_periods:
+                    try:
+                        first_risk = parse_ts(p.risk_periods[0]['time'])
+                        last_risk = parse_ts(p.risk_periods[-1]['time'])
+                        duration_hours = int((last_risk - first_risk).total_seconds() / 3600) + 3
+                        risk_duration = str(min(duration_hours, 48))
+                    except:
+                        risk_duration = str(len(p.risk_periods) * 3)
+                else:
+                    risk_duration = "0"
 
-                                <tr>
-                                    <td style="padding-bottom: 12px;">
-                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                            <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">⚙️</td>
-                                                <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">機械保護 (Machinery Protection)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">提前啟動並保持甲板機械（絞機、起錨機）運轉；遮蓋暴露馬達。</span>
-                                                    <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Keep deck machinery running; cover exposed motors.</span>
-                                                </td>
-                                            </tr>
-                                        </table>
-                                    </td>
-                                </tr>
+                w_utc, w_lct, g_utc, g_lct, v_utc, v_lct, pres_utc, pres_lct = map(fmt_time, (
+                    p.max_wind_time_utc, p.max_wind_time_lct,
+                    p.max_gust_time_utc, p.max_gust_time_lct,
+                    p.max_wave_time_utc, p.max_wave_time_lct,
+                    p.min_pressure_time_utc, p.min_pressure_time_lct
+                ))
+
+                # ✅ 數值字串每港只格式化一次，模板內只做純字串代入
+                wind_s = format(p.max_wind_kts, '.0f')
+                gust_s = format(p.max_gust_kts, '.0f')
+                wave_s = format(p.max_wave, '.1f')
+
+                # ✅ 風速 / 陣風 / 浪高三個數值區塊共用同一模板
+                metrics_html = "".join(
+                    metric_tpl(
+                        margin=margin, icon=icon, label=label, value_style=value_style,
+                        value=value, unit=unit, band_text=band_text, band_color=band_color
+                    )
+                    for margin, icon, label, value_style, value, unit, band_text, band_color in (
+                        ("0", "💨", "風速 Wind", wind_style, wind_s, "kts", wind_level_text, wind_level_color),
+                        ("10px", "🌪️", "陣風 Gust", gust_style, gust_s, "kts", gust_level_text, gust_level_color),
+                        ("10px", "🌊", "浪高 Wave", wave_style, wave_s, "m", wave_level_text, wave_level_color),
+                    )
+                )
 
-                                <tr>
-                                    <td>
-                                        <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                                            <tr>
-                                                <td width="20" valign="top" style="font-size: 14px;">⚓</td>
-                                                <td>
-                                                    <strong style="font-size: 14px; color: #451A03; line-height: 1.5;">航行安全 (Navigation Safety)：</strong>
-                                                    <span style="font-size: 14px; color: #78350F; line-height: 1.5;">注意船舶穩度（結冰導致 GM 減少）；與船管/代理保持聯繫。</span>
-                                                    <br>
-                                                    <span style="font-size: 13px; color: #92400E; line-height: 1.4;">Monitor stability (ice accretion); maintain contact with PIC/Agents.</span>
-                                                </td>
-                                            </tr>
-                                        </table>
-                                    </td>
-                                </tr>
-                            </table>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
+                # ✅ 低氣壓區塊預先組好，未達門檻為空字串，主區塊一次 append
+                pressure_metric = _pressure_metric_html(p)
+                pressure_time_row = _pressure_time_row_html(p, pres_utc, pres_lct)
+                # ✅ 能見度不再顯示在主報告中
+                
+                port_parts.append(row_tpl(
+                    row_bg=row_bg,
+                    port_code=esc(p.port_code),
+                    port_name=esc(p.port_name),
+                    country=esc(p.country),
+                    risk_level_bg=meta['bg'],
+                    risk_level_color=meta['color'],
+                    risk_level_icon=meta['emoji'],
+                    risk_level_text=meta['chip_text'],
+                    metrics_html=metrics_html,
+                    pressure_metric=pressure_metric,
+                    risk_factors=esc(', '.join(p.risk_factors[:3])),
+                    w_utc=w_utc, w_lct=w_lct,
+                    g_utc=g_utc, g_lct=g_lct,
+                    v_utc=v_utc, v_lct=v_lct,
+                    pressure_time_row=pressure_time_row,
+                    risk_duration=risk_duration,
+                ))
+                
+                if p.chart_png_list:
+                    # ✅ 圖表以 Content-ID 參照郵件內的 PNG 附件，圖表列以單一 join 組成
+                    chart_imgs = "".join(f"""
+            <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
+                <tr>
+                    <td align="center">
+                        <img src="cid:{_chart_cid('chart', p.port_code, idx)}" 
+                            width="750" 
+                            style="display:block; max-width: 100%; height: auto; border: 1px solid #ddd;" 
+                            alt="Chart {idx+1}">
+                    </td>
+                </tr>
+            </table>
+                        """
+                        for idx, png in enumerate(p.chart_png_list)
+                        if png
+                    )
+                    
+                    # ✅ 圖表列放在該港口資料列之後（原本誤置於港口迴圈外，只會顯示最後一港的圖）
+                    port_parts.append(f"""
+            <tr>
+                <td colspan="3" style="padding: 15px; background-color: {row_bg}; border-bottom: 1px solid #eee;">
+                    <div style="font-size: 13px; color: #666; margin-bottom: 8px; font-weight: 600;">
+                        📈 風浪趨勢圖表 Wind & Wave Trend Chart:
+                    </div>
+                    {chart_imgs}
+                </td>
+            </tr>
 
-        <tr>
-            <td style="padding: 0 25px 25px 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%">
-                    <tr>
-                        <td style="padding-top: 20px; padding-bottom: 20px; border-top: 3px dashed #D1D5DB; text-align: center;">
-                            <strong style="font-size: 16px; color: #374151;">⬇️ 以下為各港詳細低溫預報資料 ⬇️</strong>
-                            <br>
-                            <span style="font-size: 12px; color: #9CA3AF; letter-spacing: 0.5px;">DETAILED TEMPERATURE FORECAST FOR EACH PORT</span>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
-        """
+                    """)
+                
+                parts.extend(port_parts)
+            
+            parts.append(_DETAIL_TABLE_CLOSE_HTML)
+            return ''.join(parts)
+
+        # ✅ 依 3 → 2 → 1 順序組出各等級區塊（純字串格式化，直接在本執行緒完成）
+        levels = [level for level in (3, 2, 1) if risk_groups[level]]
+        parts.extend(render_level(level, risk_groups[level]) for level in levels)
+
+        # Footer
+        parts.append(_footer_for_year(_COPYRIGHT_YEAR, 'weather'))
+        
+        return ''.join(parts).encode('utf-8')
+    
+    
+    def _generate_visibility_html_report(self, vis_assessments: List[RiskAssessment]) -> str:
+        """✅ 生成能見度警報專用 HTML 報告（參考主報告風格）"""
+        
+        utc_now = datetime.now(timezone.utc)
+        tpe_now = utc_now.astimezone(TAIPEI_TZ)
+        
+        now_str_TPE = tpe_now.strftime('%Y-%m-%d %H:%M (TPE)')
+        now_str_UTC = utc_now.strftime('%Y-%m-%d %H:%M (UTC)')
+
+        # 如果沒有能見度不良港口
+        if not vis_assessments:
+            return _EMPTY_VIS_REPORT_HTML.format(now_tpe=now_str_TPE, now_utc=now_str_UTC)
+
+        ctx = {
+            "now_tpe": now_str_TPE,
+            "now_utc": now_str_UTC,
+            "count": len(vis_assessments),
+            "port_badges": ', '.join(f"<strong style='font-size: 17px; color: #7C3AED;'>{p.port_code}</strong>" for p in vis_assessments),
+        }
+
+        buf = io.StringIO()
+        buf.write(_VIS_HDR.format_map(ctx))
 
         # ✅ 詳細港口資料表格
-        html += f"""
-        <tr>
-            <td style="padding: 0 25px;">
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-bottom: 10px;">
-                    <tr>
-                        <td style="background-color: #DC2626; color: white; padding: 10px 15px; font-weight: bold; font-size: 15px;">
-                            ❄️ 低溫港口詳情 LOW TEMPERATURE PORT DETAILS
-                        </td>
-                    </tr>
-                    <tr>
-                        <td style="font-size: 11px; color: #666; padding: 5px 0 8px 0;">
-                            條件 Criteria: 氣溫 Temperature < 0°C (32°F) | 參考文件 Reference: WRK-00-2412-379
-                        </td>
-                    </tr>
-                </table>
-                
-                <table border="0" cellpadding="0" cellspacing="0" width="100%" style="border: 1px solid #E5E7EB; margin-bottom: 30px;">
-                    <tr style="background-color: #FEF2F2; font-size: 12px; color: #666;">
-                        <th align="left" style="padding: 10px; border-bottom: 2px solid #DC2626; width: 18%; font-weight: 600;">港口資訊<br>Port Info</th>
-                        <th align="left" style="padding: 10px; border-bottom: 2px solid #DC2626; width: 25%; font-weight: 600;">溫度統計<br>Temperature Stats</th>
-                        <th align="left" style="padding: 10px; border-bottom: 2px solid #DC2626; width: 57%; font-weight: 600;">低溫時段資訊<br>Freezing Period Info</th>
-                    </tr>
-        """
+        buf.write(_VIS_DETAIL_HEADER_HTML)
 
         # 迴圈生成港口數據
-        for index, p in enumerate(temp_assessments):
+        for index, p in enumerate(vis_assessments):
             row_bg = "#FFFFFF" if index % 2 == 0 else "#FAFBFC"
             
-            # 計算時間
-            first_freezing_time = find_first_freezing_time(p.weather_records) if p.weather_records else None
+            # 計算總危險時數
+            total_danger_hours = 0
+            for period in p.poor_visibility_periods:
+                try:
+                    start_dt = datetime.strptime(period['start_utc'], '%Y-%m-%d %H:%M')
+                    end_dt = datetime.strptime(period['end_utc'], '%Y-%m-%d %H:%M')
+                    duration_hours = (end_dt - start_dt).total_seconds() / 3600
+                    total_danger_hours += duration_hours
+                except:
+                    pass
             
-            if first_freezing_time:
+            # 生成能見度時段 HTML（先收集片段，最後以 <br> 一次串接）
+            vis_period_parts = []
+            for i, period in enumerate(p.poor_visibility_periods[:10]):
+                start_lct = period['start_lct']
+                end_lct = period['end_lct']
+                min_vis_km = period['min_visibility_km']
+                min_vis_nm = min_vis_km / 1.852
+                
                 try:
-                    first_freeze_utc = first_freezing_time.strftime('%m/%d %H:%M')
-                    if hasattr(p, 'weather_records') and p.weather_records:
-                        lct_offset = p.weather_records[0].lct_time.utcoffset()
-                        first_freeze_lct_dt = first_freezing_time + lct_offset
-                        first_freeze_lct = first_freeze_lct_dt.strftime('%m/%d %H:%M')
+                    start_dt = datetime.strptime(period['start_utc'], '%Y-%m-%d %H:%M')
+                    end_dt = datetime.strptime(period['end_utc'], '%Y-%m-%d %H:%M')
+                    duration_hours = (end_dt - start_dt).total_seconds() / 3600
+                except:
+                    duration_hours = 0
+                
+                # 格式化時間顯示
+                try:
+                    start_dt_obj = datetime.strptime(start_lct, '%Y-%m-%d %H:%M')
+                    end_dt_obj = datetime.strptime(end_lct, '%Y-%m-%d %H:%M')
+                    
+                    if start_dt_obj.date() == end_dt_obj.date():
+                        time_display = f"{start_dt_obj.strftime('%m/%d')} {start_dt_obj.strftime('%H:%M')} ~ {end_dt_obj.strftime('%H:%M')}"
                     else:
-                        first_freeze_lct = "N/A"
+                        time_display = f"{start_dt_obj.strftime('%m/%d %H:%M')} ~ {end_dt_obj.strftime('%m/%d %H:%M')}"
                 except:
-                    first_freeze_utc = "N/A"
-                    first_freeze_lct = "N/A"
-            else:
-                first_freeze_utc = "N/A"
-                first_freeze_lct = "N/A"
+                    time_display = f"{start_lct} ~ {end_lct}"
+                
+                # 根據能見度設定顏色
+                if min_vis_km < 0.5:
+                    vis_color = "#7F1D1D"
+                    vis_bg = "#FEE2E2"
+                    vis_label = "極低"
+                    vis_icon = "🔴"
+                elif min_vis_km < 1.0:
+                    vis_color = "#991B1B"
+                    vis_bg = "#FEF2F2"
+                    vis_label = "很低"
+                    vis_icon = "🟠"
+                else:
+                    vis_color = "#C2410C"
+                    vis_bg = "#FFF7ED"
+                    vis_label = "低"
+                    vis_icon = "🟡"
+                
+                vis_period_parts.append(f"""
+                <div style="background-color: {vis_bg}; padding: 8px 10px; border-left: 4px solid {vis_color}; margin-bottom: 6px; border-radius: 3px;">
+                    <table border="0" cellpadding="0" cellspacing="0" width="100%">
+                        <tr>
+                            <td width="25" valign="top" style="font-size: 16px; padding-right: 6px;">{vis_icon}</td>
+                            <td valign="top">
+                                <div style="color: {vis_color}; font-size: 12px; font-weight: bold; margin-bottom: 3px;">
+                                    時段 {i+1} | Period {i+1}
+                                </div>
+                                <div style="color: #333333; font-size: 11px; line-height: 1.5;">
+                                    ⏰ <strong>{time_display}</strong> (LT)<br>
+                                    🌫️ 最低能見度: <strong style="color: {vis_color};">{min_vis_km:.2f} km ({min_vis_nm:.2f} NM)</strong> - {vis_label}<br>
+                                    ⏱️ 持續: <strong>{duration_hours:.1f}</strong> 小時
+                                </div>
+                            </td>
+                        </tr>
+                    </table>
+                </div>
+                """)
             
-            temp_utc = format_time_display(p.min_temp_time_utc) if p.min_temp_time_utc else "N/A"
-            temp_lct = format_time_display(p.min_temp_time_lct) if p.min_temp_time_lct else "N/A"
+            vis_periods_html = "<br>".join(vis_period_parts)
+            if len(p.poor_visibility_periods) > 10:
+                vis_periods_html += f"<div style='font-size: 11px; color: #888888; margin-top: 6px; text-align: center;'>... 及其他 {len(p.poor_visibility_periods) - 10} 個時段</div>"
             
-            html += f"""
+            buf.write(f"""
                     <tr style="background-color: {row_bg}; border-bottom: 1px solid #E5E7EB;">
                     <td valign="top" style="padding: 15px; width: 25%;">
-                        <div style="font-size: 20px; font-weight: 800; color: #DC2626; margin-bottom: 4px; line-height: 1;">
+                        <div style="font-size: 20px; font-weight: 800; color: #7C3AED; margin-bottom: 4px; line-height: 1;">
                             {p.port_code}
                         </div>
                         <div style="font-size: 13px; color: #4B5563; font-weight: 600; margin-bottom: 4px;">
@@ -3489,8 +3767,8 @@ class WeatherMonitorService:
                             📍 {p.country}
                         </div>
                         <div>
-                            <span style="background-color: #FEF2F2; color: #DC2626; font-size: 11px; font-weight: 700; padding: 3px 6px; border-radius: 3px; display: inline-block;">
-                                ❄️ 低溫警報
+                            <span style="background-color: #F3E8FF; color: #7C3AED; font-size: 11px; font-weight: 700; padding: 3px 6px; border-radius: 3px; display: inline-block;">
+                                🌫️ 能見度不良
                             </span>
                         </div>
                     </td>
@@ -3498,14 +3776,36 @@ class WeatherMonitorService:
                     <td valign="top" style="padding: 15px; width: 30%;">
                         <table border="0" cellpadding="0" cellspacing="0" width="100%">
                             <tr>
-                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">🌡️</td>
+                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">👁️</td>
                                 <td valign="top">
-                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">最低溫度 Min Temp</span>
+                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">最低能見度 Min Vis</span>
+                                    <span style="color: #7C3AED; font-size: 16px; font-weight: 700;">
+                                        {p.min_visibility / 1000:.2f} <span style="font-size: 12px; font-weight: 500;">km</span>
+                                    </span>
+                                    <span style="font-size: 11px; color: #7C3AED; margin-left: 6px; font-weight: 600;">
+                                        ({p.min_visibility / 1852:.2f} NM)
+                                    </span>
+                                </td>
+                            </tr>
+                        </table>
+                        <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
+                            <tr>
+                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">⚠️</td>
+                                <td valign="top">
+                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">危險時段數 Periods</span>
                                     <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
-                                        {p.min_temperature:.1f} <span style="font-size: 12px; font-weight: 500;">°C</span>
+                                        {len(p.poor_visibility_periods)} <span style="font-size: 12px; font-weight: 500;">個</span>
                                     </span>
-                                    <span style="font-size: 11px; color: #DC2626; margin-left: 6px; font-weight: 600;">
-                                        ({p.min_temperature * 9/5 + 32:.1f}°F)
+                                </td>
+                            </tr>
+                        </table>
+                        <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
+                            <tr>
+                                <td width="24" valign="top" style="font-size: 16px; padding-top: 2px;">⏱️</td>
+                                <td valign="top">
+                                    <span style="font-size: 11px; color: #6B7280; text-transform: uppercase; display: block; line-height: 1; margin-bottom: 2px;">總危險時數 Total Hrs</span>
+                                    <span style="color: #DC2626; font-size: 16px; font-weight: 700;">
+                                        {total_danger_hours:.1f} <span style="font-size: 12px; font-weight: 500;">小時</span>
                                     </span>
                                 </td>
                             </tr>
@@ -3513,47 +3813,152 @@ class WeatherMonitorService:
                     </td>
 
                     <td valign="top" style="padding: 15px; width: 45%;">
-                        <div style="margin-bottom: 12px;">
+                        <div style="margin-bottom: 10px;">
                             <span style="background-color: #FEF2F2; color: #B91C1C; border: 1px solid #FCA5A5; font-size: 11px; font-weight: 600; padding: 4px 8px; border-radius: 4px; display: inline-block; line-height: 1.4;">
-                                ❄️ 氣溫 < 0°C | Temperature < 32°F
+                                🌫️ 能見度 < 1.5 NM | Visibility < 1.5 NM
                             </span>
                         </div>
                         
-                        <table border="0" cellpadding="2" cellspacing="0" width="100%" style="font-size: 12px; border-collapse: collapse;">
-                            <tr>
-                                <td valign="top" style="color: #6B7280; width: 85px; padding-bottom: 8px; line-height: 1.3;">
-                                    首次冰點<br><span style="font-size: 10px;">First Freeze:</span>
-                                </td>
-                                <td valign="top" style="padding-bottom: 8px;">
-                                    <div style="color: #111827; font-weight: 600;">{first_freeze_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
-                                    <div style="color: #4B5563;">{first_freeze_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
-                                </td>
-                            </tr>
+                        {vis_periods_html}
+                    </td>
+                </tr>
+            """)
+            
+            # 加入能見度趨勢圖（以 Content-ID 參照郵件內的 PNG 附件）
+            if p.chart_png_list:
+                vis_chart_cid = next(
+                    (_chart_cid('vis', p.port_code, idx) for idx, png in enumerate(p.chart_png_list) if png),
+                    None
+                )
+                
+                if vis_chart_cid:
+                    buf.write(f"""
+                <tr>
+                    <td colspan="3" style="padding: 15px; background-color: {row_bg}; border-bottom: 1px solid #eee;">
+                        <div style="font-size: 13px; color: #666; margin-bottom: 8px; font-weight: 600;">
+                            📈 48小時能見度趨勢圖 48-Hour Visibility Forecast Chart:
+                        </div>
+                        <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
                             <tr>
-                                <td valign="top" style="color: #DC2626; width: 85px; padding-bottom: 8px; line-height: 1.3; font-weight: 600;">
-                                    最低溫時間<br><span style="font-size: 10px;">Min Temp Time:</span>
-                                </td>
-                                <td valign="top" style="padding-bottom: 8px;">
-                                    <div style="color: #DC2626; font-weight: 600;">{temp_utc} <span style="color: #9CA3AF; font-size: 10px; font-weight: normal;">UTC</span></div>
-                                    <div style="color: #DC2626;">{temp_lct} <span style="color: #9CA3AF; font-size: 10px;">LT</span></div>
+                                <td align="center">
+                                    <img src="cid:{vis_chart_cid}" 
+                                        width="750" 
+                                        style="display:block; max-width: 100%; height: auto; border: 1px solid #ddd;" 
+                                        alt="Visibility Chart">
                                 </td>
                             </tr>
                         </table>
                     </td>
                 </tr>
-            """
+                    """)
+
+        buf.write(_DETAIL_TABLE_CLOSE_HTML)
+
+        # Footer
+        buf.write(_footer_for_year(_COPYRIGHT_YEAR, 'visibility'))
+        
+        return buf.getvalue()
+
+
+    def _generate_temperature_html_report(self, temp_assessments: List[RiskAssessment]) -> str:
+        """✅ 生成低溫警報專用 HTML 報告（統一風格版）"""
+        buf = io.StringIO()
+        self._write_temperature_html_report(temp_assessments, buf)
+        return buf.getvalue()
+
+    def _write_temperature_html_report(self, temp_assessments: List[RiskAssessment], out: TextIO) -> None:
+        """✅ 將低溫警報 HTML 報告逐段寫入 out（任何具 write() 的文字輸出皆可）"""
+        write = out.write
+        
+        utc_now = datetime.now(timezone.utc)
+        tpe_now = utc_now.astimezone(TAIPEI_TZ)
+        
+        now_str_TPE = tpe_now.strftime('%Y-%m-%d %H:%M (TPE)')
+        now_str_UTC = utc_now.strftime('%Y-%m-%d %H:%M (UTC)')
+
+        # ✅ 沒有低溫港口：直接輸出預先建立的頁面，略過其餘組裝
+        if not temp_assessments:
+            write(_EMPTY_TEMP_REPORT_HTML.format(now_tpe=now_str_TPE, now_utc=now_str_UTC))
+            return
+        
+        def find_first_freezing_time(weather_records):
+            """找出第一次低於 0°C 的時間"""
+            for record in weather_records:
+                if record.temperature < RISK_THRESHOLDS['temp_freezing']:
+                    return record.time
+            return None
+
+        ctx = {
+            "now_tpe": now_str_TPE,
+            "now_utc": now_str_UTC,
+            "count": len(temp_assessments),
+            "port_badges": ', '.join(f"<strong style='font-size: 17px; color: #DC2626;'>{p.port_code}</strong>" for p in temp_assessments),
+        }
+
+        write(_TEMP_HDR.format_map(ctx))
+        write(_TEMP_PORT_SUMMARY.format_map(ctx))
+        write(_LOW_TEMP_ACTIONS_HTML)
+
+        # ✅ 詳細港口資料表格
+        write(_TEMP_DETAIL_HEADER_HTML)
+
+        # ✅ 攝氏→華氏一次向量化換算，並先格式化成字串
+        temps_c = np.fromiter((p.min_temperature for p in temp_assessments),
+                              dtype=np.float64, count=len(temp_assessments))
+        temps_f = temps_c * 9 / 5 + 32
+        min_c_strs = [format(t, '.1f') for t in temps_c.tolist()]
+        min_f_strs = [format(t, '.1f') for t in temps_f.tolist()]
+
+        def render_row(item) -> str:
+            """渲染單一港口的資料列（含趨勢圖），各列互相獨立"""
+            index, p = item
+            row_parts = []
+            row_bg = "#FFFFFF" if index % 2 == 0 else "#FAFBFC"
+            
+            # 計算時間
+            first_freezing_time = find_first_freezing_time(p.weather_records) if p.weather_records else None
+            
+            if first_freezing_time:
+                try:
+                    first_freeze_utc = first_freezing_time.strftime('%m/%d %H:%M')
+                    if p.weather_records:
+                        lct_offset = p.weather_records[0].lct_time.utcoffset()
+                        first_freeze_lct_dt = first_freezing_time + lct_offset
+                        first_freeze_lct = first_freeze_lct_dt.strftime('%m/%d %H:%M')
+                    else:
+                        first_freeze_lct = "N/A"
+                except:
+                    first_freeze_utc = "N/A"
+                    first_freeze_lct = "N/A"
+            else:
+                first_freeze_utc = "N/A"
+                first_freeze_lct = "N/A"
             
-            # 加入溫度趨勢圖
-            if hasattr(p, 'chart_base64_list') and p.chart_base64_list:
-                temp_chart = None
-                for b64 in p.chart_base64_list:
-                    if len(b64) > 0:
-                        temp_chart = b64
-                        break
+            temp_utc = format_time_display(p.min_temp_time_utc)
+            temp_lct = format_time_display(p.min_temp_time_lct)
+            
+            row_parts.append(_TEMP_ROW_TPL.format(
+                row_bg=row_bg,
+                port_code=p.port_code,
+                port_name=p.port_name,
+                country=p.country,
+                min_c=min_c_strs[index],
+                min_f=min_f_strs[index],
+                first_freeze_utc=first_freeze_utc,
+                first_freeze_lct=first_freeze_lct,
+                temp_utc=temp_utc,
+                temp_lct=temp_lct,
+            ))
+            
+            # 加入溫度趨勢圖（以 Content-ID 參照郵件內的 PNG 附件）
+            if p.chart_png_list:
+                temp_chart_cid = next(
+                    (_chart_cid('temp', p.port_code, idx) for idx, png in enumerate(p.chart_png_list) if png),
+                    None
+                )
                 
-                if temp_chart:
-                    b64_clean = temp_chart.replace('\n', '').replace('\r', '').replace(' ', '')
-                    html += f"""
+                if temp_chart_cid:
+                    row_parts.append(f"""
                 <tr>
                     <td colspan="3" style="padding: 15px; background-color: {row_bg}; border-bottom: 1px solid #eee;">
                         <div style="font-size: 13px; color: #666; margin-bottom: 8px; font-weight: 600;">
@@ -3562,7 +3967,7 @@ class WeatherMonitorService:
                         <table border="0" cellpadding="0" cellspacing="0" width="100%" style="margin-top: 10px;">
                             <tr>
                                 <td align="center">
-                                    <img src="data:image/png;base64,{b64_clean}" 
+                                    <img src="cid:{temp_chart_cid}" 
                                         width="750" 
                                         style="display:block; max-width: 100%; height: auto; border: 1px solid #ddd;" 
                                         alt="Temperature Chart">
@@ -3571,121 +3976,61 @@ class WeatherMonitorService:
                         </table>
                     </td>
                 </tr>
-                    """
+                    """)
 
-        html += """
-                </table>
-            </td>
-        </tr>
-        """
+            return ''.join(row_parts)
+
+        # ✅ 各列為純 Python 字串格式化（受 GIL 限制），直接依序渲染，不另開執行緒
+        for item in enumerate(temp_assessments):
+            write(render_row(item))
+
+        write(_DETAIL_TABLE_CLOSE_HTML)
 
         # Footer
-        html += f"""
-        <tr>
-            <td bgcolor="#F8F9FA" align="center" style="padding: 40px 25px; border-top: 3px solid #D1D5DB;">
-                <table border="0" cellpadding="0" cellspacing="0" width="600">
-                    <tr>
-                        <td align="center" style="padding-bottom: 8px;">
-                            <font size="5" color="#1F2937" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                <strong>萬海航運股份有限公司</strong>
-                            </font>
-                        </td>
-                    </tr>
-                    <tr>
-                        <td align="center" style="padding-bottom: 20px;">
-                            <font size="3" color="#4B5563" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                <strong>WAN HAI LINES LTD.</strong>
-                            </font>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td align="center" style="padding-bottom: 20px;">
-                            <table border="0" cellpadding="0" cellspacing="0" width="120">
-                                <tr>
-                                    <td style="border-top: 2px solid #9CA3AF;"></td>
-                                </tr>
-                            </table>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td align="center" style="padding-bottom: 25px;">
-                            <font size="2" color="#374151" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                <strong>Marine Technology Division | Fleet Risk Management Dept.</strong>
-                            </font>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td>
-                            <table border="0" cellpadding="0" cellspacing="0" width="100%" bgcolor="#FEF3C7">
-                                <tr>
-                                    <td style="padding: 18px 20px; border-left: 4px solid #F59E0B; border-radius: 4px;">
-                                        <table border="0" cellpadding="0" cellspacing="0">
-                                            <tr>
-                                                <td style="padding-bottom: 8px;">
-                                                    <font size="2" color="#78350F" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                                        <strong>⚠️ 免責聲明 Disclaimer</strong>
-                                                    </font>
-                                                </td>
-                                            </tr>
-                                            <tr>
-                                                <td>
-                                                    <font size="2" color="#92400E" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                                        本信件內容僅供參考，船長仍應依據實際天候狀況與專業判斷採取適當措施。
-                                                        <br>
-                                                        <span style="color: #B45309;">This report is for reference only. Captains should take appropriate actions based on actual weather conditions.</span>
-                                                    </font>
-                                                </td>
-                                            </tr>
-                                        </table>
-                                    </td>
-                                </tr>
-                            </table>
-                        </td>
-                    </tr>
-                    
-                    <tr>
-                        <td align="center" style="padding-top: 25px;">
-                            <font size="1" color="#9CA3AF" face="Arial, Noto Sans TC, Microsoft JhengHei UI, sans-serif">
-                                &copy; {now_str_TPE[:4]} Wan Hai Lines Ltd. All Rights Reserved.
-                            </font>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
-        </table>
-        </center>
-    </body>
-    </html>
-        """
-        
-        return html
+        write(_footer_for_year(_COPYRIGHT_YEAR, 'temperature'))
 
     
-    def save_report_to_file(self, report, output_dir='reports'):
-        """儲存報告到檔案"""
+    def save_report_to_file(self, report, output_dir='reports', announce=True):
+        """儲存報告到檔案（有 orjson 時直接寫入 bytes）
+
+        announce=False 時不印出路徑，供背景執行緒呼叫、避免與 stdout 的 JSON 輸出交錯。
+        """
         os.makedirs(output_dir, exist_ok=True)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         path = os.path.join(output_dir, f"report_{timestamp}.json")
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(path, 'wb') as f:
+            f.write(_dump_json_bytes(report))
         
-        print(f"📄 報告已儲存: {path}")
+        if announce:
+            print(f"📄 報告已儲存: {path}")
         return path
     
     # ================= 主程式 =================
 
+class ExitCode(IntEnum):
+    """程式結束代碼"""
+    SUCCESS = 0
+    FAILURE = 1
+    INTERRUPTED = 130
+
+
 def main():
     """主程式進入點"""
     
+    # ✅ 進度訊息走 logging（WMS_DEBUG=1 時顯示逐港明細與 traceback）
+    logging.basicConfig(
+        level=logging.DEBUG if DEBUG else logging.INFO,
+        format='%(message)s',
+        stream=sys.stdout
+    )
+    for noisy in ('urllib3', 'matplotlib', 'PIL'):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+    
     # 檢查必要環境變數
     if not AEDYN_USERNAME or not AEDYN_PASSWORD:
         print("❌ 錯誤: 未設定 AEDYN_USERNAME 或 AEDYN_PASSWORD")
-        sys.exit(1)
+        sys.exit(ExitCode.FAILURE)
     
     if not MAIL_USER or not MAIL_PASSWORD:
         print("⚠️ 警告: 未設定 MAIL_USER 或 MAIL_PASSWORD,將無法發送 Email")
@@ -3701,29 +4046,44 @@ def main():
         # 執行監控
         report = service.run_daily_monitoring()
         
-        # 儲存報告
-        service.save_report_to_file(report)
-        
-        # 輸出 JSON (供 GitHub Actions 使用)
-        print("\n" + "="*80)
-        print("📤 JSON OUTPUT (for GitHub Actions):")
-        print("="*80)
-        print(json.dumps(report, ensure_ascii=False, indent=2))
+        # ✅ 儲存報告改在背景執行緒進行，與下方 stdout 的 JSON 輸出重疊
+        with ThreadPoolExecutor(max_workers=1) as io_pool:
+            save_future = io_pool.submit(service.save_report_to_file, report, 'reports', False)
+            
+            # 輸出 JSON (供 GitHub Actions 使用)
+            print("\n" + "="*80)
+            print("📤 JSON OUTPUT (for GitHub Actions):")
+            print("="*80)
+            # ✅ 直接序列化到 stdout：有 orjson 時將 bytes 寫入 stdout.buffer（免再編碼），
+            #    否則由 json.dump 逐段（iterencode）寫出，不建立完整 JSON 字串
+            if orjson is not None:
+                sys.stdout.flush()
+                sys.stdout.buffer.write(_dump_json_bytes(report) + b'\n')
+                sys.stdout.buffer.flush()
+            else:
+                json.dump(report, sys.stdout, ensure_ascii=False, indent=2, default=str)
+                sys.stdout.write('\n')
+            
+            print(f"📄 報告已儲存: {save_future.result()}")
         
         # 根據結果設定退出碼
-        if report.get('email_sent', False):
-            sys.exit(0)  # 成功
-        else:
-            sys.exit(1)  # 失敗
+        exit_code = ExitCode.SUCCESS if report.get('email_sent', False) else ExitCode.FAILURE
+        
+        # ✅ 主動釋放資源並清空輸出緩衝後以 os._exit 結束，
+        #    略過 matplotlib / selenium 等模組在直譯器收尾時的 atexit 與 GC 成本
+        service.close()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
         
     except KeyboardInterrupt:
         print("\n⚠️ 使用者中斷執行")
-        sys.exit(130)
+        sys.exit(ExitCode.INTERRUPTED)
         
     except Exception as e:
         print(f"\n❌ 執行過程發生嚴重錯誤: {e}")
         traceback.print_exc()
-        sys.exit(1)
+        sys.exit(ExitCode.FAILURE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""低溫警報 HTML 報告渲染測試"""
+import os
+import sys
+import unittest
+
+# 主程式位於專案根目錄（非套件），測試時加入 sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import n8n_weather_monitor as wm
+
+
+def _low_temp_assessment(port_code: str, min_temperature: float) -> wm.RiskAssessment:
+    """建立只帶低溫資訊的最小 RiskAssessment"""
+    return wm.RiskAssessment(
+        port_code=port_code,
+        port_name=f"{port_code} Port",
+        country="Testland",
+        risk_level=0,
+        risk_factors=[],
+        max_wind_kts=10.0,
+        max_wind_bft=3,
+        max_gust_kts=15.0,
+        max_gust_bft=4,
+        max_wave=1.0,
+        max_wind_time_utc="",
+        max_wind_time_lct="",
+        max_gust_time_utc="",
+        max_gust_time_lct="",
+        max_wave_time_utc="",
+        max_wave_time_lct="",
+        risk_periods=[],
+        issued_time="",
+        latitude=0.0,
+        longitude=0.0,
+        min_temperature=min_temperature,
+        min_temp_time_utc="01/15 18:00 (UTC)",
+        min_temp_time_lct="2026-01-16 02:00 (LT+8)",
+    )
+
+
+class TemperatureReportRenderTest(unittest.TestCase):
+
+    def setUp(self):
+        # 報告渲染不需要 SMTP / Teams 等外部資源，略過 __init__
+        self.service = object.__new__(wm.WeatherMonitorService)
+
+    def test_single_port(self):
+        html = self.service._generate_temperature_html_report([
+            _low_temp_assessment("CNDLC", -5.0),
+        ])
+        self.assertIn("CNDLC", html)
+        self.assertIn("-5.0", html)
+        self.assertIn("23.0", html)  # -5°C = 23°F
+        self.assertIn(wm._TEMP_CSS, html)
+
+    def test_multiple_ports_keep_order(self):
+        ports = [
+            _low_temp_assessment("CNDLC", -5.0),
+            _low_temp_assessment("KRINC", -2.5),
+            _low_temp_assessment("RUVVO", -12.0),
+        ]
+        html = self.service._generate_temperature_html_report(ports)
+        positions = [html.index(p.port_code, html.index("<table")) for p in ports]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn(wm._TEMP_CSS, html)
+        self.assertNotIn("{{", html)
+
+    def test_no_ports(self):
+        html = self.service._generate_temperature_html_report([])
+        self.assertIn("</html>", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,6 +26,7 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 DB_FILE = 'WNI_port_weather.db'
 EXCEL_FILE_WANHAI = 'WHL_all_ports_list.xlsx'
 COOKIE_FILE = 'aedyn_cookies.pkl'
+PORT_SHEET_NAME = 'all_ports_list'
 TIMEOUT = 30
 MAX_RETRIES = 3
 COOKIE_EXPIRY_HOURS = 24
@@ -423,6 +424,61 @@ class WeatherDatabase:
             ''', (whl_port_code,))
             return cursor.fetchone()
 
+    # ✅ 新增: 一次查詢多個港口的最新內容
+    def get_latest_content_batch(self, whl_port_codes: List[str]) -> Dict[str, Tuple[str, str, str]]:
+        """
+        批次取得多個港口最新的氣象內容 (48小時)
+        
+        Args:
+            whl_port_codes: 港口代碼列表
+            
+        Returns:
+            Dict[港口代碼, Tuple[content, issued_time, port_name]] (無資料的港口不會出現)
+        """
+        return self._latest_content_batch('weather_data', whl_port_codes)
+
+    def get_latest_content_7d_batch(self, whl_port_codes: List[str]) -> Dict[str, Tuple[str, str, str]]:
+        """
+        批次取得多個港口最新的 7 天氣象內容
+        
+        Args:
+            whl_port_codes: 港口代碼列表
+            
+        Returns:
+            Dict[港口代碼, Tuple[content, issued_time, port_name]] (無資料的港口不會出現)
+        """
+        return self._latest_content_batch('weather_data_7d', whl_port_codes)
+
+    def _latest_content_batch(self, table: str, whl_port_codes: List[str]) -> Dict[str, Tuple[str, str, str]]:
+        """以 ROW_NUMBER() 視窗函數一次取出各港口最新一筆資料"""
+        if table not in ('weather_data', 'weather_data_7d'):
+            raise ValueError(f"未知的資料表: {table}")
+        
+        codes = list(dict.fromkeys(whl_port_codes))
+        result: Dict[str, Tuple[str, str, str]] = {}
+        chunk_size = 500  # SQLite 參數數量上限
+        
+        with sqlite3.connect(self.db_file) as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(codes), chunk_size):
+                chunk = codes[start:start + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f'''
+                    SELECT whl_port_code, content, issued_time, port_name FROM (
+                        SELECT whl_port_code, content, issued_time, port_name,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY whl_port_code ORDER BY issued_time DESC
+                               ) AS rn
+                        FROM {table}
+                        WHERE whl_port_code IN ({placeholders})
+                    )
+                    WHERE rn = 1
+                ''', chunk)
+                for code, content, issued_time, port_name in cursor.fetchall():
+                    result[code] = (content, issued_time, port_name)
+        
+        return result
+
     def get_latest_time(self, whl_port_code: str) -> Optional[str]:
         """
         取得指定港口最新的發布時間 (48小時)
@@ -545,6 +601,7 @@ class PortWeatherCrawler:
         self.port_map: Dict[str, Dict[str, Any]] = {}
         self.ports_data: Dict[str, Dict[str, Any]] = {}
         self.port_list: List[str] = []
+        self._port_info_map: Dict[str, Dict[str, Any]] = {}  # ✅ get_port_info 的預先組好結果
         self.login_manager = AedynLoginManager(username, password)
         self.headers: Dict[str, str] = {}
         
@@ -562,7 +619,7 @@ class PortWeatherCrawler:
 
         try:
             print("⏳ 正在載入港口資料...")
-            df = pd.read_excel(self.excel_path, sheet_name='all_ports_list')
+            df = self._read_port_sheet()
             
             # 清理欄位名稱(去除前後空格)
             df.columns = df.columns.str.strip()
@@ -607,6 +664,17 @@ class PortWeatherCrawler:
                     }
                     
                     self.port_list.append(code)
+                    
+                    # ✅ 預先組好 get_port_info 的回傳內容，查詢時直接取用
+                    self._port_info_map[code] = {
+                        'port_name': port_info['name'],
+                        'whl_port_code': code,
+                        'wni_port_code': port_info['wni_code'],
+                        'country': port_info['country'],
+                        'station_id': port_info['id'],
+                        'latitude': lat,
+                        'longitude': lon
+                    }
             
             print(f"✅ 已載入 {len(self.port_map)} 個港口資料")
             
@@ -615,6 +683,22 @@ class PortWeatherCrawler:
             import traceback
             traceback.print_exc()
 
+    def _read_port_sheet(self) -> pd.DataFrame:
+        """✅ 讀取港口清單工作表；Excel 未更新時直接讀取 pickle 快取，略過 openpyxl 解析"""
+        cache_path = f"{os.path.splitext(self.excel_path)[0]}.{PORT_SHEET_NAME}.pkl"
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(self.excel_path):
+                return pd.read_pickle(cache_path)
+        except Exception:
+            pass  # 快取不存在或損毀，改讀 Excel
+
+        df = pd.read_excel(self.excel_path, sheet_name=PORT_SHEET_NAME)
+        try:
+            df.to_pickle(cache_path)
+        except Exception as e:
+            print(f"⚠️ 港口清單快取寫入失敗: {e}")
+        return df
+
     def _smart_login(self, force_login: bool = False) -> None:
         """
         智能登入:只在需要時才登入
@@ -1020,23 +1104,12 @@ class PortWeatherCrawler:
             whl_port_code: 港口代碼
             
         Returns:
-            Dict: 港口資訊字典或 None
+            Dict: 港口資訊字典或 None (為共用的快取物件,請勿修改)
         """
-        if whl_port_code not in self.port_map:
+        info = self._port_info_map.get(whl_port_code)
+        if info is None:
             print(f"❌ 港口代碼 {whl_port_code} 不在 port_map 中")
-            return None
-        
-        info = self.port_map[whl_port_code]
-        
-        return {
-            'port_name': info['name'],
-            'whl_port_code': whl_port_code,
-            'wni_port_code': info['wni_code'],
-            'country': info['country'],
-            'station_id': info['id'],
-            'latitude': info.get('latitude', 0.0),
-            'longitude': info.get('longitude', 0.0)
-        }
+        return info
 
 
 # ================= 使用範例 =================